@@ -3,22 +3,47 @@ import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.typing import ConfigType
-from .const import DOMAIN, PLATFORMS
+from .const import DOMAIN, PLATFORMS, DATA_GROUPS
+from .dispatcher import async_get_dispatcher
+from .light import parse_entry_parameters
+from .storage import async_get_store
+from .tuning import async_register_websocket_commands
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    # Domänenweiter Child-Index, gemeinsam für alle Gruppen
+    async_get_dispatcher(hass)
+    await async_get_store(hass).async_load()
+    # Live-Tuning von Faktoren/Min/Max über die Websocket-API
+    async_register_websocket_commands(hass)
     return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    # Reload the entry when options are updated so entities pick up changes
+    # Apply option updates in place where possible, reload otherwise
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     return True
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    # Per Service gesetzte Werte gehören zum Eintrag; nicht für eine spätere gleiche ID aufheben
+    store = async_get_store(hass)
+    if not store.loaded:
+        await store.async_load()
+    store.async_clear(entry.entry_id)
+
 
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    await hass.config_entries.async_reload(entry.entry_id)
\ No newline at end of file
+    # Faktoren/Min/Max/Fenster direkt an der laufenden Entität ändern; nur bei
+    # geänderten Farbmodi neu laden, damit das Gerät im Matter-Bridge erhalten bleibt
+    # Per Service gesetzte Werte überlagern weiterhin (der Options-Flow übernimmt und leert sie selbst)
+    group = hass.data.get(DOMAIN, {}).get(DATA_GROUPS, {}).get(entry.entry_id)
+    if group is not None and group.async_update_parameters(
+        parse_entry_parameters(async_get_store(hass).merge(entry.entry_id, {**entry.data, **entry.options}))
+    ):
+        _LOGGER.debug("Applied options of %s in place", entry.title)
+        return
+    await hass.config_entries.async_reload(entry.entry_id)
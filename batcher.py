@@ -0,0 +1,106 @@
+from __future__ import annotations
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN, DATA_BATCHER, DEFAULT_BATCH_WINDOW
+from .ratelimit import ChildCommand, QueuedCommand, async_get_limiter
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DispatchBatcher:
+    """Collects the fan-outs of all groups into dispatch waves.
+
+    Commands submitted within a short micro-window are merged per child. A
+    child addressed by several groups (or twice by one) gets only the last
+    submitted command, so the outcome follows the order in which the groups
+    were commanded, not the order in which their calls would complete. The
+    wave then passes the limiter as a whole, and the admitted children of all
+    groups are sent with one service call per distinct payload.
+    """
+
+    def __init__(self, hass: HomeAssistant, window: float = DEFAULT_BATCH_WINDOW) -> None:
+        self.hass = hass
+        self.window = window
+        self._pending: dict[str, QueuedCommand] = {}
+        # Planungsbeginn je Gruppe der offenen Welle (für die Fan-out-Latenz)
+        self._started: dict[RelativeLightGroup, float] = {}
+        self._unsub_timer: Callable[[], None] | None = None
+        self.waves = 0
+        self.submitted = 0
+        self.conflicts = 0
+        self.superseded = 0
+
+    @callback
+    def async_submit(
+        self,
+        group: RelativeLightGroup,
+        service: str,
+        commands: dict[str, ChildCommand],
+        started: float | None = None,
+    ) -> None:
+        pending = self._pending
+        for child, (payload, key) in commands.items():
+            previous = pending.pop(child, None)
+            if previous is not None:
+                # Last writer wins; neu einfügen, damit die Reihenfolge der letzten Schreiber gilt
+                if previous.group is group:
+                    self.superseded += 1
+                else:
+                    self.conflicts += 1
+                    _LOGGER.debug(
+                        "%s: command for %s from %s replaced within the batch window",
+                        group.entity_id, child, previous.group.entity_id,
+                    )
+            pending[child] = QueuedCommand(group, service, payload, key)
+        self.submitted += len(commands)
+        self._started.setdefault(group, started if started is not None else time.perf_counter())
+        if self._unsub_timer is None and pending:
+            self._unsub_timer = async_call_later(self.hass, self.window, self._flush)
+
+    @callback
+    def async_forget_group(self, group: RelativeLightGroup) -> None:
+        for child in [c for c, item in self._pending.items() if item.group is group]:
+            del self._pending[child]
+        self._started.pop(group, None)
+
+    @callback
+    def _flush(self, _now: Any) -> None:
+        self._unsub_timer = None
+        wave, self._pending = self._pending, {}
+        started, self._started = self._started, {}
+        if not wave:
+            return
+        self.waves += 1
+        self.hass.async_create_task(self._async_send(wave, started))
+
+    async def _async_send(self, wave: dict[str, QueuedCommand], started: dict[RelativeLightGroup, float]) -> None:
+        await async_get_limiter(self.hass).async_dispatch(wave)
+        now = time.perf_counter()
+        for group, begin in started.items():
+            group.metrics.latency["fanout"].observe(now - begin)
+
+    def diagnostics(self) -> dict[str, Any]:
+        return {
+            "window_s": self.window,
+            "waves": self.waves,
+            "submitted": self.submitted,
+            "conflicts": self.conflicts,
+            "superseded": self.superseded,
+            "pending": len(self._pending),
+        }
+
+
+@callback
+def async_get_batcher(hass: HomeAssistant) -> DispatchBatcher:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (batcher := domain_data.get(DATA_BATCHER)) is None:
+        batcher = domain_data[DATA_BATCHER] = DispatchBatcher(hass)
+    return batcher
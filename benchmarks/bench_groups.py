@@ -0,0 +1,300 @@
+"""Offline benchmarks for the group's hot paths.
+
+Runs against ``fake_core.FakeHass`` and prints one JSON document with a
+result record per scenario, e.g.::
+
+    python benchmarks/bench_groups.py --output bench_output.txt
+    python benchmarks/bench_groups.py --quick
+
+Scenarios:
+
+* ``fanout``  – sequential commands to one group, swept over group size
+* ``burst``   – slider-like command bursts at a given rate through the scheduler
+* ``events``  – child state-change events with children shared by several groups
+* ``scene``   – many groups with shared children commanded at once (one dispatch wave);
+  waits until every child has reported and fails if a child was never addressed
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_core import FakeHass, attach_group, install, load_integration  # noqa: E402
+
+SIZES = [1, 10, 50, 100, 250, 500, 1000]
+OVERLAPS = [1, 5, 20]
+RATES = [5, 20, 60]
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "p50": round(pick(0.50) * 1000, 4),
+        "p90": round(pick(0.90) * 1000, 4),
+        "p99": round(pick(0.99) * 1000, 4),
+        "max": round(ordered[-1] * 1000, 4),
+        "mean": round(statistics.fmean(ordered) * 1000, 4),
+    }
+
+
+def make_group(hass: FakeHass, light: Any, name: str, children: list[str], window: float, **kwargs: Any) -> Any:
+    factors = {c: 0.5 + (i % 7) * 0.15 for i, c in enumerate(children)}
+    group = light.RelativeLightGroup(
+        hass,
+        name,
+        list(children),
+        factors,
+        {c: 1 for c in children},
+        {c: 254 for c in children},
+        True,
+        True,
+        unique_id=name,
+        command_window=window,
+        **kwargs,
+    )
+    attach_group(hass, group, f"light.{name}")
+    return group
+
+
+def instrument(group: Any) -> list[float]:
+    """Record the duration of every fan-out the group runs."""
+    samples: list[float] = []
+    original = group.async_apply_to_children
+
+    async def _timed(*args: Any, **kwargs: Any) -> None:
+        t0 = time.perf_counter()
+        try:
+            await original(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - t0)
+
+    group.async_apply_to_children = _timed
+    return samples
+
+
+async def settle(hass: FakeHass, group: Any | None = None, delay: float = 0.0) -> None:
+    if delay:
+        await asyncio.sleep(delay)
+    if group is not None:
+        inflight = group._scheduler._inflight
+        if inflight is not None and not inflight.done():
+            await asyncio.gather(inflight, return_exceptions=True)
+    # Offene Dispatch-Welle abwarten (gruppenübergreifendes Mikro-Fenster)
+    batcher = hass.data.get("relative_light_group", {}).get("batcher")
+    while batcher is not None and batcher._unsub_timer is not None:
+        await asyncio.sleep(batcher.window)
+    # Kinder-Events und gebündelte State-Writes abarbeiten lassen
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def bench_fanout(light: Any, size: int, commands: int) -> dict[str, Any]:
+    hass = FakeHass(asyncio.get_running_loop())
+    install(hass, sys.modules["relative_light_group"])
+    children = [f"light.child_{i}" for i in range(size)]
+    hass.add_children(children)
+    group = make_group(hass, light, "bench", children, window=0.0)
+    fanouts = instrument(group)
+    hass.reset_counters()
+    latencies: list[float] = []
+    for n in range(commands):
+        t0 = time.perf_counter()
+        await group.async_turn_on(brightness=1 + (n * 37) % 254, color_temp_kelvin=2700 + (n % 5) * 200)
+        await settle(hass, group)
+        latencies.append(time.perf_counter() - t0)
+    return {
+        "scenario": "fanout",
+        "children": size,
+        "commands": commands,
+        "latency_ms": percentiles(latencies),
+        "fanout_ms": percentiles(fanouts),
+        "service_calls": len(hass.services.calls),
+        "service_calls_per_command": round(len(hass.services.calls) / commands, 3),
+        "state_writes_per_command": round(hass.state_writes / commands, 3),
+    }
+
+
+async def bench_burst(light: Any, size: int, rate: int, duration: float, window: float) -> dict[str, Any]:
+    hass = FakeHass(asyncio.get_running_loop())
+    install(hass, sys.modules["relative_light_group"])
+    children = [f"light.child_{i}" for i in range(size)]
+    hass.add_children(children)
+    group = make_group(hass, light, "burst", children, window=window)
+    fanouts = instrument(group)
+    hass.reset_counters()
+    commands = max(1, int(rate * duration))
+    submit: list[float] = []
+    for n in range(commands):
+        t0 = time.perf_counter()
+        await group.async_turn_on(brightness=20 + (n * 3) % 230)
+        submit.append(time.perf_counter() - t0)
+        await asyncio.sleep(1.0 / rate)
+    await settle(hass, group, delay=window + 0.05)
+    await settle(hass, group)
+    final = {c: hass.states.get(c).attributes.get("brightness") for c in children}
+    expected = group._master_brightness
+    return {
+        "scenario": "burst",
+        "children": size,
+        "rate_per_s": rate,
+        "window_s": window,
+        "commands": commands,
+        "fanouts": len(fanouts),
+        "submit_ms": percentiles(submit),
+        "fanout_ms": percentiles(fanouts),
+        "service_calls": len(hass.services.calls),
+        "service_calls_per_command": round(len(hass.services.calls) / commands, 3),
+        "state_writes_per_command": round(hass.state_writes / commands, 3),
+        "final_master": expected,
+        "children_reporting": sum(1 for v in final.values() if v is not None),
+    }
+
+
+async def bench_events(light: Any, size: int, overlap: int, toggles: int) -> dict[str, Any]:
+    hass = FakeHass(asyncio.get_running_loop())
+    install(hass, sys.modules["relative_light_group"])
+    children = [f"light.child_{i}" for i in range(size)]
+    hass.add_children(children)
+    groups = [make_group(hass, light, f"g{i}", children, window=0.0) for i in range(overlap)]
+    hass.reset_counters()
+    per_event: list[float] = []
+    for n in range(toggles):
+        child = hass.children[children[n % size]]
+        child.state = "on" if child.state == "off" else "off"
+        t0 = time.perf_counter()
+        child.publish()
+        per_event.append(time.perf_counter() - t0)
+    await settle(hass)
+    return {
+        "scenario": "events",
+        "children": size,
+        "groups": len(groups),
+        "events": toggles,
+        "listeners": hass.listener_count,
+        "event_ms": percentiles(per_event),
+        "listener_callbacks": hass.events_fired,
+        "state_writes": hass.state_writes,
+        "state_writes_per_event": round(hass.state_writes / toggles, 3),
+    }
+
+
+async def bench_scene(light: Any, groups: int, size: int, overlap: int, timeout: float = 10.0) -> dict[str, Any]:
+    hass = FakeHass(asyncio.get_running_loop())
+    install(hass, sys.modules["relative_light_group"])
+    # Jede Gruppe teilt `overlap` Kinder mit der nächsten (z. B. Raum- und Zonen-Gruppen)
+    step = max(1, size - overlap)
+    children = [f"light.child_{i}" for i in range(step * groups + overlap)]
+    hass.add_children(children)
+    members = [make_group(hass, light, f"s{g}", children[g * step:g * step + size], window=0.0) for g in range(groups)]
+    hass.reset_counters()
+    t0 = time.perf_counter()
+    # Szene: alle Gruppen gleichzeitig, wie ein einzelner light.turn_on über viele Entitäten
+    await asyncio.gather(*(group.async_turn_on(brightness=180) for group in members))
+    for group in members:
+        await settle(hass, group)
+    elapsed = time.perf_counter() - t0
+    batcher = hass.data["relative_light_group"]["batcher"]
+    limiter = sys.modules["relative_light_group.ratelimit"].async_get_limiter(hass)
+    # Limiter-Queue abarbeiten lassen, bis jedes Kind den zuletzt gesendeten Wert meldet
+    deadline = t0 + timeout
+    while True:
+        expected: dict[str, int] = {}
+        for _domain, _service, data in hass.services.calls:
+            for eid in data["entity_id"]:
+                expected[eid] = data.get("brightness")
+        converged = not limiter.queue_length and len(expected) == len(children) and all(
+            hass.states.get(eid).attributes.get("brightness") == bri for eid, bri in expected.items()
+        )
+        if converged or time.perf_counter() > deadline:
+            break
+        await asyncio.sleep(0.005)
+    convergence = time.perf_counter() - t0
+    missing = sorted(set(children).difference(expected))
+    if missing:
+        raise AssertionError(f"scene: {len(missing)} of {len(children)} children were never addressed, e.g. {missing[:5]}")
+    if not converged:
+        raise AssertionError(f"scene: children did not converge within {timeout} s")
+    addressed = sum(len(call[2]["entity_id"]) for call in hass.services.calls)
+    return {
+        "scenario": "scene",
+        "groups": groups,
+        "children_per_group": size,
+        "shared_per_group": overlap,
+        "children": len(children),
+        "elapsed_ms": round(elapsed * 1000, 4),
+        "convergence_ms": round(convergence * 1000, 4),
+        "waves": batcher.waves,
+        "dispatch_waves": limiter.waves,
+        "conflicts": batcher.conflicts,
+        "service_calls": len(hass.services.calls),
+        "children_addressed": addressed,
+        "children_deferred": limiter.queued,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    light = sys.modules["relative_light_group.light"]
+    results: list[dict[str, Any]] = []
+    for size in args.sizes:
+        results.append(await bench_fanout(light, size, args.commands))
+    for rate in args.rates:
+        results.append(await bench_burst(light, args.burst_size, rate, args.duration, args.window))
+    for overlap in args.overlaps:
+        results.append(await bench_events(light, args.event_size, overlap, args.toggles))
+    for groups in args.scene_groups:
+        results.append(await bench_scene(light, groups, args.scene_size, args.scene_overlap))
+    return {
+        "python": platform.python_version(),
+        "timestamp": time.time(),
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--commands", type=int, default=50)
+    parser.add_argument("--rates", type=int, nargs="+", default=RATES)
+    parser.add_argument("--burst-size", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=1.0)
+    parser.add_argument("--window", type=float, default=0.2)
+    parser.add_argument("--overlaps", type=int, nargs="+", default=OVERLAPS)
+    parser.add_argument("--event-size", type=int, default=100)
+    parser.add_argument("--toggles", type=int, default=500)
+    parser.add_argument("--scene-groups", type=int, nargs="+", default=[10, 40])
+    parser.add_argument("--scene-size", type=int, default=10)
+    parser.add_argument("--scene-overlap", type=int, default=2)
+    parser.add_argument("--quick", action="store_true", help="small sweep for a smoke run")
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.sizes, args.commands, args.rates, args.overlaps, args.toggles = [1, 50], 10, [20], [1, 5], 100
+        args.scene_groups = [40]
+
+    load_integration()
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""Lightweight stand-in for the parts of Home Assistant the group touches.
+
+Only the state machine, service registry, event routing and timers used by
+the integration are modelled. Child lights "apply" service calls after a
+configurable latency and report back through state-change events, just like
+real light entities would.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import sys
+import time
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "relative_light_group"
+
+
+def load_integration() -> ModuleType:
+    """Import the repository root as the ``relative_light_group`` package."""
+    if PACKAGE in sys.modules:
+        return sys.modules[PACKAGE]
+    spec = importlib.util.spec_from_file_location(
+        PACKAGE, ROOT / "__init__.py", submodule_search_locations=[str(ROOT)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[PACKAGE] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeState:
+    __slots__ = ("entity_id", "state", "attributes", "name", "last_updated")
+
+    def __init__(self, entity_id: str, state: str, attributes: dict[str, Any]) -> None:
+        self.entity_id = entity_id
+        self.state = state
+        self.attributes = attributes
+        self.name = attributes.get("friendly_name", entity_id)
+        self.last_updated = time.monotonic()
+
+
+class FakeEvent:
+    __slots__ = ("data", "time_fired")
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        self.data = data
+        self.time_fired = time.monotonic()
+
+
+class FakeStates:
+    def __init__(self, core: FakeHass) -> None:
+        self._core = core
+        self._states: dict[str, FakeState] = {}
+
+    def get(self, entity_id: str) -> FakeState | None:
+        return self._states.get(entity_id)
+
+    def is_state(self, entity_id: str, state: str) -> bool:
+        st = self._states.get(entity_id)
+        return st is not None and st.state == state
+
+    def async_set(self, entity_id: str, state: str, attributes: dict[str, Any] | None = None) -> None:
+        old = self._states.get(entity_id)
+        attributes = dict(attributes or {})
+        if old is not None and old.state == state and old.attributes == attributes:
+            # Wie HA: unveränderter Zustand löst kein state_changed aus
+            return
+        new = FakeState(entity_id, state, attributes)
+        self._states[entity_id] = new
+        self._core.fire_state_changed(entity_id, old, new)
+
+
+class FakeServices:
+    """Service registry that counts calls and drives the simulated children."""
+
+    def __init__(self, core: FakeHass) -> None:
+        self._core = core
+        self.calls: list[tuple[str, str, dict[str, Any]]] = []
+
+    async def async_call(self, domain: str, service: str, data: dict[str, Any], blocking: bool = False, **_: Any) -> None:
+        self.calls.append((domain, service, data))
+        entity_ids = data.get("entity_id", [])
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        for eid in entity_ids:
+            child = self._core.children.get(eid)
+            if child is not None:
+                child.receive(service, data)
+
+
+class SimulatedLight:
+    """Child light that applies commands after ``latency`` seconds.
+
+    While unavailable it ignores commands and reports ``unavailable``.
+    """
+
+    def __init__(self, core: FakeHass, entity_id: str, latency: float = 0.0, color: bool = True) -> None:
+        self.core = core
+        self.entity_id = entity_id
+        self.latency = latency
+        self.attributes: dict[str, Any] = {
+            "supported_color_modes": ["color_temp", "hs"] if color else ["brightness"],
+            "min_color_temp_kelvin": 2000,
+            "max_color_temp_kelvin": 6500,
+        }
+        self.state = "off"
+        self.available = True
+        self.commands = 0
+        self.dropped = 0
+
+    def publish(self) -> None:
+        self.core.states.async_set(self.entity_id, self.state if self.available else "unavailable", self.attributes)
+
+    def set_available(self, available: bool) -> None:
+        if available != self.available:
+            self.available = available
+            self.publish()
+
+    def receive(self, service: str, data: dict[str, Any]) -> None:
+        self.commands += 1
+        if not self.available:
+            self.dropped += 1
+            return
+        if self.latency > 0:
+            self.core.loop.call_later(self.latency, self._apply, service, data)
+        else:
+            self.core.loop.call_soon(self._apply, service, data)
+
+    def _apply(self, service: str, data: dict[str, Any]) -> None:
+        if not self.available:
+            # Während der Latenz weggefallen: Befehl geht verloren
+            self.dropped += 1
+            return
+        attrs = dict(self.attributes)
+        if service == "turn_off":
+            self.state = "off"
+            attrs.pop("brightness", None)
+        else:
+            self.state = "on"
+            for key in ("brightness", "color_temp_kelvin", "hs_color"):
+                if key in data:
+                    attrs[key] = data[key]
+        self.attributes = attrs
+        self.publish()
+
+
+class FakeEntityRegistry:
+    """Maps children to a backing integration (``platform``) for the rate limiter."""
+
+    def __init__(self) -> None:
+        self.platforms: dict[str, str] = {}
+
+    def async_get(self, entity_id: str) -> SimpleNamespace | None:
+        return SimpleNamespace(platform=self.platforms.get(entity_id, "simulated"))
+
+
+class FakeHass:
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.data: dict[str, Any] = {}
+        self.states = FakeStates(self)
+        self.services = FakeServices(self)
+        self.children: dict[str, SimulatedLight] = {}
+        self.entity_registry = FakeEntityRegistry()
+        self.state_writes = 0
+        self.events_fired = 0
+        self._state_listeners: dict[str, list[Callable[[FakeEvent], None]]] = {}
+
+    # --- helpers the integration calls ---
+    def async_create_task(self, target, name: str | None = None, eager_start: bool = True) -> asyncio.Task:
+        return self.loop.create_task(target)
+
+    def track_state_change(self, entity_ids: list[str], action: Callable[[FakeEvent], None]) -> Callable[[], None]:
+        for eid in entity_ids:
+            self._state_listeners.setdefault(eid, []).append(action)
+
+        def _remove() -> None:
+            for eid in entity_ids:
+                listeners = self._state_listeners.get(eid, [])
+                if action in listeners:
+                    listeners.remove(action)
+
+        return _remove
+
+    def call_later(self, delay: float, action: Callable[[Any], None]) -> Callable[[], None]:
+        handle = self.loop.call_later(float(delay), action, None)
+        return handle.cancel
+
+    def fire_state_changed(self, entity_id: str, old: FakeState | None, new: FakeState | None) -> None:
+        listeners = self._state_listeners.get(entity_id)
+        if not listeners:
+            return
+        event = FakeEvent({"entity_id": entity_id, "old_state": old, "new_state": new})
+        for action in tuple(listeners):
+            self.events_fired += 1
+            action(event)
+
+    @property
+    def listener_count(self) -> int:
+        return sum(len(v) for v in self._state_listeners.values())
+
+    # --- setup ---
+    def add_children(self, entity_ids: list[str], latency: float = 0.0, color: bool = True, platform: str = "simulated") -> None:
+        for eid in entity_ids:
+            self.entity_registry.platforms[eid] = platform
+            child = SimulatedLight(self, eid, latency, color)
+            self.children[eid] = child
+            child.publish()
+
+    def reset_counters(self) -> None:
+        self.services.calls.clear()
+        self.state_writes = 0
+        self.events_fired = 0
+
+
+def install(hass: FakeHass, integration: ModuleType) -> None:
+    """Route the integration's Home Assistant helper calls to the fake core."""
+    dispatcher = sys.modules[f"{integration.__name__}.dispatcher"]
+    dispatcher.async_track_state_change_event = lambda _hass, eids, action: hass.track_state_change(eids, action)
+    for name in ("scheduler", "fade", "ratelimit", "batcher", "light"):
+        module = sys.modules[f"{integration.__name__}.{name}"]
+        module.async_call_later = lambda _hass, delay, action: hass.call_later(delay, action)
+    sys.modules[f"{integration.__name__}.ratelimit"].er = SimpleNamespace(async_get=lambda _hass: hass.entity_registry)
+
+
+def attach_group(hass: FakeHass, group: Any, entity_id: str) -> None:
+    """Do what ``async_added_to_hass`` does, minus restore-state and the entity registry."""
+    group.entity_id = entity_id
+
+    def _write_state() -> None:
+        # Attribute wie beim echten State-Write auswerten, damit ihr Aufwand mitgemessen wird
+        hass.state_writes += 1
+        attrs = dict(group.extra_state_attributes)
+        attrs["brightness"] = group.brightness
+        hass.states._states[entity_id] = FakeState(entity_id, "on" if group.is_on else "off", attrs)
+
+    group.async_write_ha_state = _write_state
+    sys.modules[f"{PACKAGE}.nesting"].async_get_group_index(hass).async_register(group)
+    group._subscribe_child_states()
+    group.async_finalize_capabilities()
@@ -0,0 +1,310 @@
+"""Replay a recorded command trace against the simulated core.
+
+A trace is written by a group with the ``record_trace`` option (see
+``tracing.py``). The replay rebuilds the group from the trace header, creates
+simulated children with the configured latency and feeds the recorded
+commands and child events in at their original offsets. The same trace can
+be replayed with different dispatch options to compare them on identical
+input, e.g.::
+
+    python benchmarks/replay_trace.py trace.jsonl.gz --latency 0.05 --latency-spread 0.03
+    python benchmarks/replay_trace.py trace.jsonl.gz --command-window 0 --batch-window 0.02
+
+Child events (``--events``):
+
+* ``availability`` – only children dropping out and coming back (default)
+* ``all``          – every recorded child state, including the children's own
+  reactions to the group; useful to reproduce event storms
+* ``none``         – commands only
+
+The report lists the service calls issued, whether every available child
+ended in the state the group's plan expects, and the convergence latency from
+a command until all children reported its target.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_groups import percentiles, settle  # noqa: E402
+from fake_core import FakeHass, attach_group, install, load_integration  # noqa: E402
+
+EVENT_MODES = ("availability", "all", "none")
+_UNAVAILABLE = (None, "unavailable", "unknown")
+
+
+class ConvergenceProbe:
+    """Tracks which children have not yet reached the target of the latest command."""
+
+    def __init__(self, hass: FakeHass, group: Any) -> None:
+        self.hass = hass
+        self.group = group
+        self.samples: list[float] = []
+        self.superseded = 0
+        self._expected: dict[str, int | str] = {}
+        self._missing: set[str] = set()
+        self._started: float | None = None
+
+    def expected(self) -> dict[str, int | str]:
+        group = self.group
+        if not group.is_on:
+            return {eid: "off" for eid in group.entities}
+        base = group.master_brightness
+        return {eid: flat.table[base] for eid, flat in group._flat_plan().items}
+
+    def matches(self, eid: str, target: int | str) -> bool:
+        state = self.hass.states.get(eid)
+        if state is None:
+            return False
+        if target == "off":
+            return state.state == "off"
+        return state.state == "on" and state.attributes.get("brightness") == target
+
+    def available(self, eid: str) -> bool:
+        child = self.hass.children.get(eid)
+        return child is None or child.available
+
+    def command(self) -> None:
+        if self._started is not None:
+            self.superseded += 1
+        self._expected = self.expected()
+        self._missing = {eid for eid, target in self._expected.items() if self.available(eid) and not self.matches(eid, target)}
+        self._started = time.perf_counter()
+        self._check()
+
+    def child_changed(self, event: Any) -> None:
+        if self._started is None:
+            return
+        eid = event.data["entity_id"]
+        if eid in self._missing and (not self.available(eid) or self.matches(eid, self._expected[eid])):
+            self._missing.discard(eid)
+            self._check()
+
+    def _check(self) -> None:
+        if not self._missing and self._started is not None:
+            self.samples.append(time.perf_counter() - self._started)
+            self._started = None
+
+    @property
+    def pending(self) -> bool:
+        return self._started is not None
+
+
+def build_group(hass: FakeHass, header: dict[str, Any], args: argparse.Namespace) -> Any:
+    light = sys.modules["relative_light_group.light"]
+    calibration = sys.modules["relative_light_group.calibration"]
+    cfg = header["group"]
+    rng = random.Random(args.seed)
+    for eid in cfg["entities"]:
+        snap = header.get("children", {}).get(eid, {})
+        modes = set(snap.get("modes") or ("color_temp", "hs"))
+        latency = max(0.0, args.latency + rng.uniform(-args.latency_spread, args.latency_spread))
+        hass.add_children([eid], latency=latency, color=bool(modes - {"brightness", "onoff"}))
+        child = hass.children[eid]
+        state = snap.get("s", "off")
+        if state in _UNAVAILABLE:
+            child.available = False
+        elif state == "on":
+            child.state = "on"
+            child.attributes["brightness"] = snap.get("b")
+        child.publish()
+    profiles = {eid: calibration.parse_color_profile(spec) for eid, spec in cfg.get("color_profiles", {}).items()}
+    group = light.RelativeLightGroup(
+        hass,
+        cfg["entity_id"],
+        list(cfg["entities"]),
+        dict(cfg["factors"]),
+        dict(cfg["min"]),
+        dict(cfg["max"]),
+        cfg["forward_ct"],
+        cfg["forward_color"],
+        unique_id="replay",
+        command_window=cfg["command_window"] if args.command_window is None else args.command_window,
+        software_fade=cfg["software_fade"] if args.software_fade is None else args.software_fade,
+        confirm_delivery=cfg["confirm_delivery"] if args.confirm_delivery is None else args.confirm_delivery,
+        curves=dict(cfg.get("curves", {})),
+        color_profiles={eid: p for eid, p in profiles.items() if p is not None},
+        default_factor=cfg.get("default_factor", 1.0),
+        default_min=cfg.get("default_min", 1),
+        default_max=cfg.get("default_max", 254),
+    )
+    attach_group(hass, group, cfg["entity_id"])
+    group._is_on = bool(header.get("is_on", False))
+    group._master_brightness = int(header.get("master_brightness", group.master_brightness))
+    return group
+
+
+def inject_event(hass: FakeHass, record: dict[str, Any], mode: str) -> bool:
+    child = hass.children.get(record["e"])
+    if child is None or mode == "none":
+        return False
+    state = record.get("s")
+    if state in _UNAVAILABLE:
+        if not child.available:
+            return False
+        child.set_available(False)
+        return True
+    if not child.available:
+        child.set_available(True)
+        if mode == "availability":
+            return True
+    if mode != "all":
+        return False
+    # Aufgezeichneten Zustand übernehmen (auch Reaktionen der Kinder auf die Gruppe)
+    child.state = state
+    attrs = dict(child.attributes)
+    for short, attr in (("b", "brightness"), ("k", "color_temp_kelvin"), ("h", "hs_color")):
+        if short in record:
+            attrs[attr] = tuple(record[short]) if short == "h" else record[short]
+        elif state == "off":
+            attrs.pop(attr, None)
+    child.attributes = attrs
+    child.publish()
+    return True
+
+
+async def replay(header: dict[str, Any], records: list[dict[str, Any]], args: argparse.Namespace) -> dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    hass = FakeHass(loop)
+    integration = sys.modules["relative_light_group"]
+    install(hass, integration)
+    batcher = sys.modules["relative_light_group.batcher"].async_get_batcher(hass)
+    if args.batch_window is not None:
+        batcher.window = args.batch_window
+    group = build_group(hass, header, args)
+    probe = ConvergenceProbe(hass, group)
+    hass.track_state_change(list(group.entities), probe.child_changed)
+    hass.reset_counters()
+
+    commands = [r for r in records if "c" in r]
+    events = [r for r in records if "e" in r]
+    injected = 0
+    done = loop.create_future()
+    remaining = len(records)
+
+    async def _command(record: dict[str, Any]) -> None:
+        kwargs = {k: (tuple(v) if isinstance(v, list) else v) for k, v in record.get("a", {}).items()}
+        if record["c"] == "turn_off":
+            await group.async_turn_off(**kwargs)
+        else:
+            await group.async_turn_on(**kwargs)
+        probe.command()
+
+    def _fire(record: dict[str, Any]) -> None:
+        nonlocal injected, remaining
+        if "c" in record:
+            loop.create_task(_command(record))
+        elif inject_event(hass, record, args.events):
+            injected += 1
+        remaining -= 1
+        if remaining == 0 and not done.done():
+            done.set_result(None)
+
+    started = loop.time()
+    wall = time.perf_counter()
+    for record in records:
+        loop.call_at(started + record.get("t", 0.0) / args.speed, _fire, record)
+    if records:
+        await done
+    # Nachlauf: Latenzen, Befehlsfenster und Bestätigungen abklingen lassen
+    await asyncio.sleep(args.tail)
+    await settle(hass, group)
+    elapsed = time.perf_counter() - wall
+
+    expected = probe.expected()
+    wrong = sorted(eid for eid, target in expected.items() if probe.available(eid) and not probe.matches(eid, target))
+    unavailable = sorted(eid for eid in expected if not probe.available(eid))
+    calls = hass.services.calls
+    addressed = sum(len(call[2]["entity_id"]) for call in calls)
+    metrics = group.metrics.as_dict()
+    return {
+        "trace": {
+            "group": header["group"]["entity_id"],
+            "started": header.get("start"),
+            "children": len(group.entities),
+            "commands": len(commands),
+            "child_events": len(events),
+            "duration_s": round(records[-1].get("t", 0.0), 3) if records else 0.0,
+        },
+        "options": {
+            "events": args.events,
+            "speed": args.speed,
+            "latency_s": args.latency,
+            "latency_spread_s": args.latency_spread,
+            "seed": args.seed,
+            "command_window_s": group._scheduler.window,
+            "batch_window_s": batcher.window,
+            "software_fade": group.software_fade,
+            "confirm_delivery": group._delivery is not None,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "events_injected": injected,
+        "service_calls": len(calls),
+        "children_addressed": addressed,
+        "service_calls_per_command": round(len(calls) / len(commands), 3) if commands else 0.0,
+        "commands_dropped_unavailable": sum(child.dropped for child in hass.children.values()),
+        "children_skipped": metrics["children_skipped"],
+        "catch_ups": metrics["catch_ups"],
+        "state_writes": hass.state_writes,
+        "convergence_ms": percentiles(probe.samples),
+        "converged": len(probe.samples),
+        "superseded": probe.superseded,
+        "unconverged": int(probe.pending),
+        "final": {
+            "is_on": group.is_on,
+            "master_brightness": group.master_brightness,
+            "correct": not wrong,
+            "children_wrong": len(wrong),
+            "wrong": wrong[: args.list_limit],
+            "children_unavailable": len(unavailable),
+        },
+        "latency": metrics["latency"],
+        "batcher": batcher.diagnostics(),
+        "limiter": sys.modules["relative_light_group.ratelimit"].async_get_limiter(hass).diagnostics(),
+    }
+
+
+def _flag(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", type=Path, help="trace file written by the record_trace option")
+    parser.add_argument("--latency", type=float, default=0.02, help="child latency in seconds")
+    parser.add_argument("--latency-spread", type=float, default=0.0, help="± uniform spread per child")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale; 2 replays twice as fast")
+    parser.add_argument("--events", choices=EVENT_MODES, default="availability")
+    parser.add_argument("--command-window", type=float, help="override the recorded command window")
+    parser.add_argument("--batch-window", type=float, help="override the domain-wide batch window")
+    parser.add_argument("--software-fade", type=_flag, help="override software fade (true/false)")
+    parser.add_argument("--confirm-delivery", type=_flag, help="override delivery confirmation (true/false)")
+    parser.add_argument("--tail", type=float, default=1.0, help="seconds to keep running after the last record")
+    parser.add_argument("--list-limit", type=int, default=20, help="children listed by name in the report")
+    parser.add_argument("--output", type=Path, help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+
+    load_integration()
+    header, records = sys.modules["relative_light_group.tracing"].load_trace(str(args.trace))
+    report = asyncio.run(replay(header, records, args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
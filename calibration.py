@@ -0,0 +1,116 @@
+from __future__ import annotations
+from functools import lru_cache
+from typing import NamedTuple
+
+from homeassistant.util import color as color_util
+
+# Obergrenze des gemeinsamen Umrechnungs-Caches (Profil, Eingangsfarbe)
+COLOR_CACHE_SIZE = 4096
+
+# Farbräume der gängigen Leuchtmittel-Generationen (Philips Hue Gamut A/B/C)
+GAMUTS = {
+    "A": color_util.GamutType(
+        color_util.XYPoint(0.704, 0.296), color_util.XYPoint(0.2151, 0.7106), color_util.XYPoint(0.138, 0.08)
+    ),
+    "B": color_util.GamutType(
+        color_util.XYPoint(0.675, 0.322), color_util.XYPoint(0.409, 0.518), color_util.XYPoint(0.167, 0.04)
+    ),
+    "C": color_util.GamutType(
+        color_util.XYPoint(0.6915, 0.3083), color_util.XYPoint(0.17, 0.7), color_util.XYPoint(0.1532, 0.0475)
+    ),
+}
+
+
+class ColorProfile(NamedTuple):
+    """Color calibration of one child; hashable, so it can key the conversion cache."""
+
+    gamut: str | None = None
+    hue: float = 0.0
+    sat: float = 1.0
+    wx: float = 0.0
+    wy: float = 0.0
+    ct: int = 0
+
+    @property
+    def spec(self) -> str:
+        parts = []
+        if self.gamut is not None:
+            parts.append(f"gamut:{self.gamut}")
+        if self.hue:
+            parts.append(f"hue:{self.hue:g}")
+        if self.sat != 1.0:
+            parts.append(f"sat:{self.sat:g}")
+        if self.wx:
+            parts.append(f"wx:{self.wx:g}")
+        if self.wy:
+            parts.append(f"wy:{self.wy:g}")
+        if self.ct:
+            parts.append(f"ct:{self.ct}")
+        return ",".join(parts)
+
+
+def parse_color_profile(spec: str | None) -> ColorProfile | None:
+    """Parse ``gamut:C,hue:3,sat:0.95,wx:0.004,wy:-0.002,ct:-150``.
+
+    Every key is optional; an empty spec means no calibration (``None``).
+    Raises ``ValueError`` for unknown keys or out-of-range values.
+    """
+    text = (spec or "").strip().replace(" ", "")
+    if not text:
+        return None
+    values: dict[str, object] = {}
+    for part in text.split(","):
+        key, _, value = part.partition(":")
+        key = key.lower()
+        if key == "gamut":
+            if value.upper() not in GAMUTS:
+                raise ValueError(f"unknown gamut: {value}")
+            values[key] = value.upper()
+        elif key == "hue":
+            values[key] = float(value)
+            if not -180 <= values[key] <= 180:
+                raise ValueError(f"hue offset out of range: {value}")
+        elif key == "sat":
+            values[key] = float(value)
+            if not 0 <= values[key] <= 2:
+                raise ValueError(f"saturation scale out of range: {value}")
+        elif key in ("wx", "wy"):
+            values[key] = float(value)
+            if not -0.1 <= values[key] <= 0.1:
+                raise ValueError(f"white point offset out of range: {value}")
+        elif key == "ct":
+            values[key] = int(float(value))
+            if not -2000 <= values[key] <= 2000:
+                raise ValueError(f"color temperature offset out of range: {value}")
+        else:
+            raise ValueError(f"unknown calibration key: {key}")
+    profile = ColorProfile(**values)
+    return profile if profile != ColorProfile() else None
+
+
+@lru_cache(maxsize=COLOR_CACHE_SIZE)
+def calibrate_hs(profile: ColorProfile, hs: tuple[float, float]) -> tuple[float, float]:
+    """Map the group's hs color into the child's calibrated hs color."""
+    hue = (hs[0] + profile.hue) % 360
+    sat = max(0.0, min(100.0, hs[1] * profile.sat))
+    x, y = color_util.color_hs_to_xy(hue, sat)
+    # Weißpunkt-Korrektur wirkt bei Weiß voll und verschwindet bei voller Sättigung
+    weight = 1.0 - sat / 100.0
+    x += profile.wx * weight
+    y += profile.wy * weight
+    gamut = GAMUTS.get(profile.gamut) if profile.gamut is not None else None
+    out_h, out_s = color_util.color_xy_to_hs(x, y, gamut)
+    # Gerundet, damit gleiche Zielfarben im Fan-out zusammengefasst werden
+    return round(out_h, 2), round(out_s, 2)
+
+
+def calibrate_kelvin(profile: ColorProfile, kelvin: int, kelvin_range: tuple[int, int] | None) -> int:
+    kelvin += profile.ct
+    if kelvin_range is not None:
+        kelvin = max(kelvin_range[0], min(kelvin_range[1], kelvin))
+    return kelvin
+
+
+def cache_info() -> dict[str, int]:
+    info = calibrate_hs.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize or 0}
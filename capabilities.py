@@ -0,0 +1,147 @@
+from __future__ import annotations
+from typing import Any
+
+from homeassistant.components.light import LightEntityFeature
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import Event, HomeAssistant, State, callback
+
+# Farbmodi, die beliebige Farbe (nicht nur Weißtöne) ermöglichen
+COLOR_MODES = frozenset({"hs", "xy", "rgb", "rgbw", "rgbww", "rgbcw"})
+# Attribute, aus denen die Fähigkeiten eines Kindes abgeleitet werden
+CAPABILITY_ATTRS = (
+    "supported_color_modes",
+    "min_color_temp_kelvin",
+    "max_color_temp_kelvin",
+    "min_mireds",
+    "max_mireds",
+    "supported_features",
+)
+
+
+class ChildCapabilities:
+    """Parsed color capabilities of one child light."""
+
+    __slots__ = ("supports_ct", "supports_color", "min_kelvin", "max_kelvin", "supports_transition", "_source")
+
+    def __init__(
+        self,
+        supports_ct: bool = False,
+        supports_color: bool = False,
+        min_kelvin: int | None = None,
+        max_kelvin: int | None = None,
+        source: tuple = (),
+        supports_transition: bool = False,
+    ) -> None:
+        self.supports_ct = supports_ct
+        self.supports_color = supports_color
+        self.min_kelvin = min_kelvin
+        self.max_kelvin = max_kelvin
+        self.supports_transition = supports_transition
+        self._source = source
+
+    @property
+    def kelvin_range(self) -> tuple[int, int] | None:
+        if self.min_kelvin is None or self.max_kelvin is None:
+            return None
+        return self.min_kelvin, self.max_kelvin
+
+
+NO_CAPABILITIES = ChildCapabilities()
+
+
+def _capability_source(state: State) -> tuple:
+    attrs = state.attributes
+    source = []
+    for attr in CAPABILITY_ATTRS:
+        value = attrs.get(attr)
+        # Listen sind nicht hashbar/vergleichbar in Tupeln ohne Umwandlung
+        source.append(tuple(value) if isinstance(value, (list, set)) else value)
+    return tuple(source)
+
+
+def _mireds_to_kelvin(value: Any) -> int | None:
+    try:
+        return int(round(1000000.0 / float(value)))
+    except Exception:
+        return None
+
+
+def parse_capabilities(state: State | None) -> ChildCapabilities:
+    if state is None:
+        return NO_CAPABILITIES
+    source = _capability_source(state)
+    supports_ct = False
+    supports_color = False
+    scm = state.attributes.get("supported_color_modes")
+    if isinstance(scm, (list, set, tuple)):
+        modes = {str(m).lower() for m in scm}
+        # Farbtemperatur
+        supports_ct = "color_temp" in modes
+        # Farbe (beliebiger Farbraum)
+        supports_color = not COLOR_MODES.isdisjoint(modes)
+    min_k: int | None = None
+    max_k: int | None = None
+    # Kelvin-Bereich ermitteln
+    if supports_ct:
+        child_min_k = state.attributes.get("min_color_temp_kelvin")
+        child_max_k = state.attributes.get("max_color_temp_kelvin")
+        if child_min_k is None or child_max_k is None:
+            # Fallback über mireds
+            max_mireds = state.attributes.get("max_mireds")
+            min_mireds = state.attributes.get("min_mireds")
+            child_min_k = _mireds_to_kelvin(max_mireds) if max_mireds is not None else None
+            child_max_k = _mireds_to_kelvin(min_mireds) if min_mireds is not None else None
+        if isinstance(child_min_k, (int, float)):
+            min_k = int(child_min_k)
+        if isinstance(child_max_k, (int, float)):
+            max_k = int(child_max_k)
+    features = state.attributes.get("supported_features")
+    # Native Übergänge: diese Kinder brauchen keinen Software-Fade
+    supports_transition = isinstance(features, int) and bool(features & LightEntityFeature.TRANSITION)
+    return ChildCapabilities(supports_ct, supports_color, min_k, max_k, source, supports_transition)
+
+
+class CapabilityCache:
+    """Domain-wide cache of parsed child capabilities, keyed by entity_id.
+
+    Entries are invalidated only when a child's capability attributes change;
+    children becoming unavailable keep their last known capabilities.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._cache: dict[str, ChildCapabilities] = {}
+
+    def get(self, entity_id: str) -> ChildCapabilities:
+        caps = self._cache.get(entity_id)
+        if caps is None:
+            caps = parse_capabilities(self.hass.states.get(entity_id))
+            if caps is not NO_CAPABILITIES:
+                self._cache[entity_id] = caps
+        return caps
+
+    @callback
+    def async_forget(self, entity_id: str) -> None:
+        self._cache.pop(entity_id, None)
+
+    @callback
+    def async_state_changed(self, event: Event[Any]) -> bool:
+        """Update the cache from a state event; True if capabilities changed."""
+        new_state: State | None = event.data.get("new_state")
+        if new_state is None or new_state.state in (STATE_UNAVAILABLE, STATE_UNKNOWN):
+            return False
+        entity_id = event.data.get("entity_id")
+        cached = self._cache.get(entity_id)
+        if cached is not None and cached._source == _capability_source(new_state):
+            return False
+        caps = parse_capabilities(new_state)
+        self._cache[entity_id] = caps
+        if cached is None:
+            # Erstes Auftauchen nach dem Start
+            return True
+        return (
+            cached.supports_ct != caps.supports_ct
+            or cached.supports_color != caps.supports_color
+            or cached.kelvin_range != caps.kelvin_range
+            or cached.supports_transition != caps.supports_transition
+        )
@@ -11,16 +11,74 @@ from .const import (
     CONF_FACTORS,
     CONF_MIN,
     CONF_MAX,
+    CONF_CURVES,
+    CONF_COLOR_PROFILES,
     CONF_FORWARD_CT,
     CONF_FORWARD_COLOR,
+    CONF_COMMAND_WINDOW,
+    CONF_DEBUG_TRACE,
+    CONF_RECORD_TRACE,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_SOFTWARE_FADE,
+    CONF_CONFIRM_DELIVERY,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_FEEDBACK,
+    CONF_AREAS,
+    CONF_FLOORS,
+    CONF_LABELS,
+    CONF_DEFAULT_FACTOR,
+    CONF_DEFAULT_MIN,
+    CONF_DEFAULT_MAX,
+    DATA_GROUPS,
     DEFAULT_NAME,
+    DEFAULT_COMMAND_WINDOW,
+    DEFAULT_MIN_BRIGHTNESS,
+    DEFAULT_MAX_BRIGHTNESS,
 )
+from .calibration import parse_color_profile
+from .curves import CURVE_LINEAR, CurveNotMonotone, normalize_curve
+from .dispatcher import async_get_dispatcher
+from .storage import async_get_store
+
+_FACTOR_SELECTOR = selector.NumberSelector(
+    selector.NumberSelectorConfig(min=0, max=5, step=0.01, mode=selector.NumberSelectorMode.BOX)
+)
+
+
+def _membership_schema(data: dict) -> dict:
+    """Fields for dynamic membership (area/floor/label) and the default rules of its children."""
+    return {
+        vol.Optional(CONF_AREAS, default=list(data.get(CONF_AREAS) or [])): selector.selector({"area": {"multiple": True}}),
+        vol.Optional(CONF_FLOORS, default=list(data.get(CONF_FLOORS) or [])): selector.selector({"floor": {"multiple": True}}),
+        vol.Optional(CONF_LABELS, default=list(data.get(CONF_LABELS) or [])): selector.selector({"label": {"multiple": True}}),
+        vol.Optional(CONF_DEFAULT_FACTOR, default=float(data.get(CONF_DEFAULT_FACTOR, 1.0))): _FACTOR_SELECTOR,
+        vol.Optional(CONF_DEFAULT_MIN, default=int(data.get(CONF_DEFAULT_MIN, DEFAULT_MIN_BRIGHTNESS))): int,
+        vol.Optional(CONF_DEFAULT_MAX, default=int(data.get(CONF_DEFAULT_MAX, DEFAULT_MAX_BRIGHTNESS))): int,
+    }
+
+
+def _membership_values(user_input: dict, data: dict) -> dict:
+    return {
+        CONF_AREAS: list(user_input.get(CONF_AREAS, data.get(CONF_AREAS)) or []),
+        CONF_FLOORS: list(user_input.get(CONF_FLOORS, data.get(CONF_FLOORS)) or []),
+        CONF_LABELS: list(user_input.get(CONF_LABELS, data.get(CONF_LABELS)) or []),
+        CONF_DEFAULT_FACTOR: float(user_input.get(CONF_DEFAULT_FACTOR, data.get(CONF_DEFAULT_FACTOR, 1.0))),
+        CONF_DEFAULT_MIN: int(user_input.get(CONF_DEFAULT_MIN, data.get(CONF_DEFAULT_MIN, DEFAULT_MIN_BRIGHTNESS))),
+        CONF_DEFAULT_MAX: int(user_input.get(CONF_DEFAULT_MAX, data.get(CONF_DEFAULT_MAX, DEFAULT_MAX_BRIGHTNESS))),
+    }
+
+
+def _has_selector(values: dict) -> bool:
+    return bool(values[CONF_AREAS] or values[CONF_FLOORS] or values[CONF_LABELS])
+
 
 STEP_USER = vol.Schema({
     vol.Optional(CONF_NAME, default=DEFAULT_NAME): str,
-    vol.Required(CONF_ENTITIES): selector.selector({
+    # Optional: Gruppen können rein über Bereich/Etage/Label definiert werden
+    vol.Optional(CONF_ENTITIES, default=[]): selector.selector({
         "entity": {"multiple": True, "reorder": True, "domain": "light"}
     }),
+    **_membership_schema({}),
     vol.Optional(CONF_FORWARD_CT, default=False): bool,
     vol.Optional(CONF_FORWARD_COLOR, default=False): bool,
 })
@@ -48,6 +106,18 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._user_data = dict(user_input)
         # normalize entities to list[str]
         self._user_data[CONF_ENTITIES] = _normalize_entities(self._user_data.get(CONF_ENTITIES, []))
+        membership = _membership_values(user_input, {})
+        self._user_data.update(membership)
+        if not self._user_data[CONF_ENTITIES]:
+            if not _has_selector(membership):
+                return self.async_show_form(
+                    step_id="user",
+                    data_schema=self.add_suggested_values_to_schema(STEP_USER, user_input),
+                    errors={"base": "no_members"},
+                )
+            # Nur dynamische Mitglieder: keine Felder je Kind, Standardregeln gelten
+            data = self._user_data
+            return self.async_create_entry(title=data.get(CONF_NAME, DEFAULT_NAME), data=data)
         return await self.async_step_members()
 
     async def async_step_members(self, user_input=None):
@@ -56,16 +126,18 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         # Dynamic schema per child with friendly labels
         schema: dict = {}
         self._members_keymap = {}
+        # Vorgaben aus den Standardregeln des ersten Schritts
+        default_factor = self._user_data[CONF_DEFAULT_FACTOR]
+        default_min = self._user_data[CONF_DEFAULT_MIN]
+        default_max = self._user_data[CONF_DEFAULT_MAX]
         for e in entities:
             friendly = self._friendly_name(e)
             k_factor = f"Faktor – {friendly}"
             k_min = f"Minimum – {friendly}"
             k_max = f"Maximum – {friendly}"
-            schema[vol.Optional(k_factor, default=1.0)] = selector.NumberSelector(
-                selector.NumberSelectorConfig(min=0, max=5, step=0.01, mode=selector.NumberSelectorMode.BOX)
-            )
-            schema[vol.Optional(k_min, default=1)] = int
-            schema[vol.Optional(k_max, default=255)] = int
+            schema[vol.Optional(k_factor, default=default_factor)] = _FACTOR_SELECTOR
+            schema[vol.Optional(k_min, default=default_min)] = int
+            schema[vol.Optional(k_max, default=default_max)] = int
             self._members_keymap[k_factor] = ("factor", e)
             self._members_keymap[k_min] = ("min", e)
             self._members_keymap[k_max] = ("max", e)
@@ -80,11 +152,11 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         data[CONF_MAX] = {}
         for label, (kind, eid) in self._members_keymap.items():
             if kind == "factor":
-                data[CONF_FACTORS][eid] = float(user_input.get(label, 1.0))
+                data[CONF_FACTORS][eid] = float(user_input.get(label, default_factor))
             elif kind == "min":
-                data[CONF_MIN][eid] = int(user_input.get(label, 1))
+                data[CONF_MIN][eid] = int(user_input.get(label, default_min))
             elif kind == "max":
-                data[CONF_MAX][eid] = int(user_input.get(label, 255))
+                data[CONF_MAX][eid] = int(user_input.get(label, default_max))
 
         return self.async_create_entry(title=data.get(CONF_NAME, DEFAULT_NAME), data=data)
     def _friendly_name(self, eid: str) -> str:
@@ -113,30 +185,61 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     async def async_step_edit(self, user_input=None):
         data = self._merged()
         entities = _normalize_entities(data.get(CONF_ENTITIES, []))
-        # Fähigkeiten der aktuellen Mitglieder ermitteln
-        caps = self._capabilities(entities)
+        # Fähigkeiten der aktuellen Mitglieder ermitteln (inkl. dynamisch aufgelöster)
+        group = self.hass.data.get(DOMAIN, {}).get(DATA_GROUPS, {}).get(self.config_entry.entry_id)
+        caps = self._capabilities(group.entities if group is not None else entities)
         schema = {
             vol.Optional(CONF_NAME, default=data.get(CONF_NAME, DEFAULT_NAME)): str,
             vol.Optional(CONF_ENTITIES, default=entities): selector.selector({
                 "entity": {"multiple": True, "reorder": True, "domain": "light"}
             }),
+            **_membership_schema(data),
         }
         # Biete globale Optionen nur an, wenn mindestens ein Kind sie unterstützt
         if caps.get("any_ct"):
             schema[vol.Optional(CONF_FORWARD_CT, default=data.get(CONF_FORWARD_CT, False))] = bool
         if caps.get("any_color"):
             schema[vol.Optional(CONF_FORWARD_COLOR, default=data.get(CONF_FORWARD_COLOR, False))] = bool
+        schema[vol.Optional(
+            CONF_COMMAND_WINDOW,
+            default=float(data.get(CONF_COMMAND_WINDOW, DEFAULT_COMMAND_WINDOW)),
+        )] = selector.NumberSelector(
+            selector.NumberSelectorConfig(min=0, max=2, step=0.05, mode=selector.NumberSelectorMode.BOX)
+        )
+        schema[vol.Optional(CONF_SOFTWARE_FADE, default=data.get(CONF_SOFTWARE_FADE, False))] = bool
+        schema[vol.Optional(CONF_CONFIRM_DELIVERY, default=data.get(CONF_CONFIRM_DELIVERY, False))] = bool
+        schema[vol.Optional(CONF_FEEDBACK, default=data.get(CONF_FEEDBACK, False))] = bool
+        schema[vol.Optional(CONF_COMPACT_ATTRIBUTES, default=data.get(CONF_COMPACT_ATTRIBUTES, False))] = bool
+        schema[vol.Optional(CONF_DIAGNOSTIC_SENSORS, default=data.get(CONF_DIAGNOSTIC_SENSORS, False))] = bool
+        schema[vol.Optional(CONF_DEBUG_TRACE, default=data.get(CONF_DEBUG_TRACE, False))] = bool
+        schema[vol.Optional(CONF_RECORD_TRACE, default=data.get(CONF_RECORD_TRACE, False))] = bool
 
         if user_input is None:
             return self.async_show_form(step_id="edit", data_schema=vol.Schema(schema))
 
         # Store globals and go to per-member edit
         new_entities = _normalize_entities(user_input.get(CONF_ENTITIES, entities))
+        membership = _membership_values(user_input, data)
+        if not new_entities and not _has_selector(membership):
+            return self.async_show_form(
+                step_id="edit",
+                data_schema=self.add_suggested_values_to_schema(vol.Schema(schema), user_input),
+                errors={"base": "no_members"},
+            )
         self._draft_globals = {
             CONF_NAME: user_input.get(CONF_NAME, data.get(CONF_NAME, DEFAULT_NAME)),
             CONF_ENTITIES: new_entities,
+            **membership,
             CONF_FORWARD_CT: bool(user_input.get(CONF_FORWARD_CT, data.get(CONF_FORWARD_CT, False))),
             CONF_FORWARD_COLOR: bool(user_input.get(CONF_FORWARD_COLOR, data.get(CONF_FORWARD_COLOR, False))),
+            CONF_COMMAND_WINDOW: float(user_input.get(CONF_COMMAND_WINDOW, data.get(CONF_COMMAND_WINDOW, DEFAULT_COMMAND_WINDOW))),
+            CONF_SOFTWARE_FADE: bool(user_input.get(CONF_SOFTWARE_FADE, data.get(CONF_SOFTWARE_FADE, False))),
+            CONF_CONFIRM_DELIVERY: bool(user_input.get(CONF_CONFIRM_DELIVERY, data.get(CONF_CONFIRM_DELIVERY, False))),
+            CONF_FEEDBACK: bool(user_input.get(CONF_FEEDBACK, data.get(CONF_FEEDBACK, False))),
+            CONF_COMPACT_ATTRIBUTES: bool(user_input.get(CONF_COMPACT_ATTRIBUTES, data.get(CONF_COMPACT_ATTRIBUTES, False))),
+            CONF_DIAGNOSTIC_SENSORS: bool(user_input.get(CONF_DIAGNOSTIC_SENSORS, data.get(CONF_DIAGNOSTIC_SENSORS, False))),
+            CONF_DEBUG_TRACE: bool(user_input.get(CONF_DEBUG_TRACE, data.get(CONF_DEBUG_TRACE, False))),
+            CONF_RECORD_TRACE: bool(user_input.get(CONF_RECORD_TRACE, data.get(CONF_RECORD_TRACE, False))),
         }
         return await self.async_step_edit_members()
 
@@ -144,39 +247,87 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         data = self._merged()
         draft = self._draft_globals or {}
         entities = _normalize_entities(draft.get(CONF_ENTITIES, data.get(CONF_ENTITIES, [])))
+        membership = {k: draft.get(k, v) for k, v in _membership_values({}, data).items()}
+        default_factor = membership[CONF_DEFAULT_FACTOR]
+        default_min = membership[CONF_DEFAULT_MIN]
+        default_max = membership[CONF_DEFAULT_MAX]
 
-        # Dynamic per-child schema with friendly labels
+        # Dynamic per-child schema with friendly labels (nur feste Mitglieder; dynamische folgen den Standardregeln)
         schema: dict = {}
         self._members_keymap = {}
+        dispatcher = async_get_dispatcher(self.hass)
         for e in entities:
             friendly = self._friendly_name(e)
             k_factor = f"Faktor – {friendly}"
             k_min = f"Minimum – {friendly}"
             k_max = f"Maximum – {friendly}"
+            k_curve = f"Kurve – {friendly}"
             schema[vol.Optional(
                 k_factor,
-                default=float(data.get(CONF_FACTORS, {}).get(e, 1.0)),
-            )] = selector.NumberSelector(
-                selector.NumberSelectorConfig(min=0, max=5, step=0.01, mode=selector.NumberSelectorMode.BOX)
-            )
-            schema[vol.Optional(k_min, default=int(data.get(CONF_MIN, {}).get(e, 1)))] = int
-            schema[vol.Optional(k_max, default=int(data.get(CONF_MAX, {}).get(e, 255)))] = int
+                default=float(data.get(CONF_FACTORS, {}).get(e, default_factor)),
+            )] = _FACTOR_SELECTOR
+            schema[vol.Optional(k_min, default=int(data.get(CONF_MIN, {}).get(e, default_min)))] = int
+            schema[vol.Optional(k_max, default=int(data.get(CONF_MAX, {}).get(e, default_max)))] = int
+            # linear, cie, gamma:2.2 oder points:x:y,x:y (0–254)
+            schema[vol.Optional(k_curve, default=str((data.get(CONF_CURVES) or {}).get(e, CURVE_LINEAR)))] = str
             self._members_keymap[k_factor] = ("factor", e)
             self._members_keymap[k_min] = ("min", e)
             self._members_keymap[k_max] = ("max", e)
+            self._members_keymap[k_curve] = ("curve", e)
+            caps = dispatcher.get_capabilities(e)
+            if caps.supports_color or caps.supports_ct:
+                # z. B. gamut:C,hue:3,sat:0.95,wx:0.004,wy:-0.002,ct:-150 (leer = keine Kalibrierung)
+                k_color = f"Farbkalibrierung – {friendly}"
+                schema[vol.Optional(
+                    k_color, default=str((data.get(CONF_COLOR_PROFILES) or {}).get(e, ""))
+                )] = str
+                self._members_keymap[k_color] = ("color", e)
 
+        if user_input is None and not entities:
+            # Nur dynamische Mitglieder: nichts je Kind abzufragen
+            user_input = {}
         if user_input is None:
             return self.async_show_form(step_id="edit_members", data_schema=vol.Schema(schema))
 
+        curves: dict[str, str] = {}
+        color_profiles: dict[str, str] = {}
+        for label, (kind, eid) in self._members_keymap.items():
+            if kind not in ("curve", "color"):
+                continue
+            try:
+                if kind == "curve":
+                    spec = normalize_curve(user_input.get(label))
+                    if spec != CURVE_LINEAR:
+                        curves[eid] = spec
+                elif (profile := parse_color_profile(user_input.get(label))) is not None:
+                    color_profiles[eid] = profile.spec
+            except ValueError as err:
+                return self.async_show_form(
+                    step_id="edit_members",
+                    data_schema=self.add_suggested_values_to_schema(vol.Schema(schema), user_input),
+                    errors={label: "curve_not_monotone" if isinstance(err, CurveNotMonotone) else f"invalid_{kind}"},
+                )
+
         # Build final options
         opts = {
             CONF_NAME: draft.get(CONF_NAME, data.get(CONF_NAME, DEFAULT_NAME)),
             CONF_FORWARD_CT: bool(draft.get(CONF_FORWARD_CT, data.get(CONF_FORWARD_CT, False))),
             CONF_FORWARD_COLOR: bool(draft.get(CONF_FORWARD_COLOR, data.get(CONF_FORWARD_COLOR, False))),
+            CONF_COMMAND_WINDOW: float(draft.get(CONF_COMMAND_WINDOW, data.get(CONF_COMMAND_WINDOW, DEFAULT_COMMAND_WINDOW))),
+            CONF_SOFTWARE_FADE: bool(draft.get(CONF_SOFTWARE_FADE, data.get(CONF_SOFTWARE_FADE, False))),
+            CONF_CONFIRM_DELIVERY: bool(draft.get(CONF_CONFIRM_DELIVERY, data.get(CONF_CONFIRM_DELIVERY, False))),
+            CONF_FEEDBACK: bool(draft.get(CONF_FEEDBACK, data.get(CONF_FEEDBACK, False))),
+            CONF_COMPACT_ATTRIBUTES: bool(draft.get(CONF_COMPACT_ATTRIBUTES, data.get(CONF_COMPACT_ATTRIBUTES, False))),
+            CONF_DIAGNOSTIC_SENSORS: bool(draft.get(CONF_DIAGNOSTIC_SENSORS, data.get(CONF_DIAGNOSTIC_SENSORS, False))),
+            CONF_DEBUG_TRACE: bool(draft.get(CONF_DEBUG_TRACE, data.get(CONF_DEBUG_TRACE, False))),
+            CONF_RECORD_TRACE: bool(draft.get(CONF_RECORD_TRACE, data.get(CONF_RECORD_TRACE, False))),
             CONF_ENTITIES: entities,
+            **membership,
             CONF_FACTORS: {},
             CONF_MIN: {},
             CONF_MAX: {},
+            CONF_CURVES: curves,
+            CONF_COLOR_PROFILES: color_profiles,
         }
         for label, (kind, eid) in self._members_keymap.items():
             if kind == "factor":
@@ -185,11 +336,22 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 opts[CONF_MIN][eid] = int(user_input.get(label, int(data.get(CONF_MIN, {}).get(eid, 1))))
             elif kind == "max":
                 opts[CONF_MAX][eid] = int(user_input.get(label, int(data.get(CONF_MAX, {}).get(eid, 255))))
+        if _has_selector(membership):
+            # Per Service gesetzte Werte dynamischer Mitglieder nicht verwerfen
+            for kind in (CONF_FACTORS, CONF_MIN, CONF_MAX):
+                for eid, value in (data.get(kind) or {}).items():
+                    if eid not in entities:
+                        opts[kind][eid] = value
 
+        # Die per Service gesetzten Werte stecken jetzt in den Optionen
+        async_get_store(self.hass).async_clear(self.config_entry.entry_id)
         return self.async_create_entry(title="Options", data=opts)
 
     def _merged(self):
-        return self.config_entry.data | self.config_entry.options
+        # Per Service geänderte, noch nicht übernommene Werte als Vorgabe anzeigen
+        return async_get_store(self.hass).merge(
+            self.config_entry.entry_id, self.config_entry.data | self.config_entry.options
+        )
 
     def _friendly_name(self, eid: str) -> str:
         st = self.hass.states.get(eid)
@@ -205,17 +367,11 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         all_ct = True if entities else False
         any_color = False
         all_color = True if entities else False
+        dispatcher = async_get_dispatcher(self.hass)
         for eid in entities:
-            st = self.hass.states.get(eid)
-            supports_ct = False
-            supports_color = False
-            if st is not None:
-                scm = st.attributes.get("supported_color_modes")
-                if isinstance(scm, (list, set)):
-                    modes = {str(m).lower() for m in scm}
-                    supports_ct = "color_temp" in modes
-                    color_modes = {"hs", "xy", "rgb", "rgbw", "rgbww", "rgbcw"}
-                    supports_color = any(m in modes for m in color_modes)
+            caps = dispatcher.get_capabilities(eid)
+            supports_ct = caps.supports_ct
+            supports_color = caps.supports_color
             any_ct = any_ct or supports_ct
             all_ct = all_ct and supports_ct
             any_color = any_color or supports_color
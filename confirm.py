@@ -0,0 +1,143 @@
+from __future__ import annotations
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from homeassistant.components.light import ATTR_TRANSITION
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DEFAULT_CONFIRM_TIMEOUT, DEFAULT_CONFIRM_RETRIES
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _Pending:
+    __slots__ = ("service", "payload", "key", "sent", "deadline", "attempts")
+
+    def __init__(self, service: str, payload: dict[str, Any], key: Any, sent: float, deadline: float, attempts: int) -> None:
+        self.service = service
+        self.payload = payload
+        self.key = key
+        self.sent = sent
+        self.deadline = deadline
+        self.attempts = attempts
+
+
+class DeliveryTracker:
+    """Confirms child commands from state-change events and retries stragglers.
+
+    Every command sent to a child is expected to show up in the child's state
+    within ``timeout`` seconds (plus the transition). Children that confirm
+    are recorded with their end-to-end latency; only the children that miss
+    their deadline are sent the same command again, at most ``retries`` times.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        group: RelativeLightGroup,
+        matches: Callable[[Any, State], bool],
+        timeout: float = DEFAULT_CONFIRM_TIMEOUT,
+        retries: int = DEFAULT_CONFIRM_RETRIES,
+    ) -> None:
+        self.hass = hass
+        self.group = group
+        self._matches = matches
+        self.timeout = timeout
+        self.retries = retries
+        self._pending: dict[str, _Pending] = {}
+        # Aufgegebene Befehle; ein verspätet aus der Limiter-Queue gesendeter Retry startet keine neue Runde
+        self._given_up: dict[str, Any] = {}
+        self._unsub_timer: Callable[[], None] | None = None
+        self._timer_at: float | None = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @callback
+    def async_expect(self, child: str, service: str, payload: dict[str, Any], key: Any) -> None:
+        if child in self._given_up:
+            if self._given_up[child] == key:
+                return
+            del self._given_up[child]
+        now = time.monotonic()
+        previous = self._pending.get(child)
+        # Wiederholung desselben Befehls zählt weiter, ein neuer Befehl beginnt von vorn
+        # Latenz Ende-zu-Ende ab dem ersten Versand messen
+        if previous is not None and previous.key == key:
+            attempts, sent = previous.attempts, previous.sent
+        else:
+            attempts, sent = 0, now
+        state = self.hass.states.get(child)
+        if state is not None and self._matches(key, state):
+            # Kind steht schon auf dem Ziel: ein unveränderter Zustand löst kein Ereignis aus
+            self._pending.pop(child, None)
+            self.group.metrics.record_confirmation(child, now - sent)
+            return
+        deadline = now + self.timeout + float(payload.get(ATTR_TRANSITION) or 0)
+        self._pending[child] = _Pending(service, payload, key, sent, deadline, attempts)
+        self._schedule(deadline)
+
+    @callback
+    def async_child_reported(self, child: str, new_state: State | None) -> None:
+        self._given_up.pop(child, None)
+        pending = self._pending.get(child)
+        if pending is None or new_state is None or not self._matches(pending.key, new_state):
+            return
+        del self._pending[child]
+        self.group.metrics.record_confirmation(child, time.monotonic() - pending.sent)
+
+    @callback
+    def async_forget(self, child: str) -> None:
+        self._pending.pop(child, None)
+        self._given_up.pop(child, None)
+
+    @callback
+    def async_cancel(self) -> None:
+        self._pending.clear()
+        self._given_up.clear()
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+            self._timer_at = None
+
+    @callback
+    def _schedule(self, deadline: float) -> None:
+        if self._unsub_timer is not None:
+            if self._timer_at is not None and self._timer_at <= deadline:
+                return
+            self._unsub_timer()
+        self._timer_at = deadline
+        self._unsub_timer = async_call_later(self.hass, max(0.0, deadline - time.monotonic()), self._expired)
+
+    @callback
+    def _expired(self, _now: Any) -> None:
+        self._unsub_timer = None
+        self._timer_at = None
+        now = time.monotonic()
+        metrics = self.group.metrics
+        retry: dict[str, dict[str, tuple[dict[str, Any], Any]]] = {}
+        for child, pending in list(self._pending.items()):
+            if pending.deadline > now:
+                continue
+            if pending.attempts >= self.retries:
+                del self._pending[child]
+                self._given_up[child] = pending.key
+                metrics.unconfirmed += 1
+                _LOGGER.debug("%s: %s did not confirm %s", self.group.entity_id, child, pending.key)
+                self.group.async_child_unconfirmed(child)
+                continue
+            pending.attempts += 1
+            # Vorläufige Frist, bis der erneute Versand sie neu setzt (Limiter kann verzögern)
+            pending.deadline = now + self.timeout
+            metrics.retries += 1
+            retry.setdefault(pending.service, {})[child] = (pending.payload, pending.key)
+        if retry:
+            self.hass.async_create_task(self.group.async_retry_children(retry))
+        if self._pending:
+            self._schedule(min(p.deadline for p in self._pending.values()))
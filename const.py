@@ -1,14 +1,45 @@
 from __future__ import annotations
 DOMAIN = "relative_light_group"
-PLATFORMS = ["light"]
+PLATFORMS = ["light", "sensor"]
+
+# Schlüssel in hass.data[DOMAIN]
+DATA_DISPATCHER = "dispatcher"
+DATA_GROUPS = "groups"
+DATA_STORE = "store"
+DATA_FADE = "fade"
+DATA_LIMITER = "limiter"
+DATA_NESTING = "nesting"
+DATA_FINALIZER = "finalizer"
+DATA_MEMBERSHIP = "membership"
+DATA_BATCHER = "batcher"
+DATA_HEALTH = "health"
+DATA_TUNING = "tuning"
 
 CONF_ENTITIES = "entities"
 CONF_FACTORS = "factors"
 CONF_MIN = "min"
 CONF_MAX = "max"
+CONF_CURVES = "curves"
+CONF_COLOR_PROFILES = "color_profiles"
 CONF_NAME = "name"
 CONF_FORWARD_CT = "forward_color_temp"
 CONF_FORWARD_COLOR = "forward_color"
+CONF_COMMAND_WINDOW = "command_window"
+CONF_DEBUG_TRACE = "debug_trace"
+CONF_DIAGNOSTIC_SENSORS = "diagnostic_sensors"
+CONF_SOFTWARE_FADE = "software_fade"
+CONF_CONFIRM_DELIVERY = "confirm_delivery"
+CONF_COMPACT_ATTRIBUTES = "compact_attributes"
+CONF_FEEDBACK = "feedback"
+# Befehle und Kind-Events für die Offline-Wiedergabe aufzeichnen
+CONF_RECORD_TRACE = "record_trace"
+# Dynamische Mitglieder (Bereich/Etage/Label) und Standardregeln für sie
+CONF_AREAS = "areas"
+CONF_FLOORS = "floors"
+CONF_LABELS = "labels"
+CONF_DEFAULT_FACTOR = "default_factor"
+CONF_DEFAULT_MIN = "default_min"
+CONF_DEFAULT_MAX = "default_max"
 
 DEFAULT_NAME = "Relative Light Group"
 
@@ -18,11 +49,51 @@ DEFAULT_NAME = "Relative Light Group"
 DEFAULT_MAX_BRIGHTNESS = 254
 DEFAULT_MIN_BRIGHTNESS = 1
 
+# Zeitfenster (Sekunden), in dem schnelle Befehlsfolgen (Slider) zusammengefasst werden
+DEFAULT_COMMAND_WINDOW = 0.2
+
+# Dispatch-Limits (Token-Buckets) pro Kind und pro Integration des Kindes (Integration: je Service-Call)
+DEFAULT_CHILD_RATE = 10.0
+DEFAULT_CHILD_BURST = 5
+DEFAULT_INTEGRATION_RATE = 100.0
+DEFAULT_INTEGRATION_BURST = 100
+# Sekunden, die auf die Rückmeldung eines Kindes gewartet wird, bevor der nächste Befehl trotzdem rausgeht
+DEFAULT_ACK_TIMEOUT = 1.0
+DEFAULT_QUEUE_LIMIT = 1000
+
+# Mikro-Fenster (Sekunden), in dem die Fan-outs aller Gruppen zu einer Dispatch-Welle gebündelt werden
+DEFAULT_BATCH_WINDOW = 0.01
+
+# Circuit Breaker je Kind: nach so vielen fehlgeschlagenen Calls in Folge gesperrt,
+# nach der Pause (Sekunden) geht ein einzelner Befehl als Probe durch
+DEFAULT_BREAKER_FAILURES = 3
+DEFAULT_BREAKER_COOLDOWN = 30.0
+
+# Live-Tuning: Vorschau an die bearbeiteten Kinder höchstens so oft (Sekunden)
+DEFAULT_TUNING_INTERVAL = 0.1
+
+# Spätestens nach dieser Zeit (Sekunden) werden die Fähigkeiten beim Start festgelegt,
+# auch wenn noch nicht alle Kinder geladen sind
+DEFAULT_CAPABILITY_TIMEOUT = 30.0
+
+# Rückmeldemodus: Master höchstens so oft aus den Kindern schätzen (Sekunden),
+# und nicht innerhalb dieser Zeit nach einem eigenen Befehl (zzgl. Transition)
+DEFAULT_FEEDBACK_INTERVAL = 1.0
+DEFAULT_FEEDBACK_HOLDOFF = 2.0
+
+# Bestätigungsmodus: Frist je Kind (zzgl. Transition) und maximale Wiederholungen
+DEFAULT_CONFIRM_TIMEOUT = 3.0
+DEFAULT_CONFIRM_RETRIES = 2
+
 ATTR_MASTER_BRIGHTNESS = "master_brightness"
 ATTR_FACTORS = "factors"
 ATTR_MIN = "min"
 ATTR_MAX = "max"
+ATTR_CHILD = "entity_id_child"
+ATTR_FACTOR = "factor"
+ATTR_FORCE = "force"
 
 SERVICE_SET_FACTOR = "set_factor"
 SERVICE_SET_MIN_MAX = "set_min_max"
-SERVICE_APPLY = "apply"  # reapplies current master to children
\ No newline at end of file
+SERVICE_APPLY = "apply"  # reapplies current master to children
+SERVICE_SET_PARAMETERS = "set_parameters"  # bulk factors/min/max for many children
@@ -0,0 +1,105 @@
+from __future__ import annotations
+from functools import lru_cache
+
+from .const import DEFAULT_MIN_BRIGHTNESS, DEFAULT_MAX_BRIGHTNESS
+
+CURVE_LINEAR = "linear"
+CURVE_CIE = "cie"
+CURVE_GAMMA = "gamma"
+CURVE_POINTS = "points"
+
+# Tabelle über den gesamten Master-Bereich; Index = Master-Helligkeit
+Table = tuple[int, ...]
+
+
+class CurveNotMonotone(ValueError):
+    """Breakpoints whose input or output values decrease."""
+
+
+def normalize_curve(spec: str | None) -> str:
+    """Validate a curve spec and return its canonical form.
+
+    Accepted forms: ``linear``, ``cie``, ``gamma:<g>`` and
+    ``points:<x>:<y>,<x>:<y>,...`` with breakpoints on the 0–254 scale,
+    listed with rising ``x`` and non-falling ``y``. Raises ``ValueError``
+    (``CurveNotMonotone`` for falling breakpoints) for anything else.
+    """
+    text = (spec or CURVE_LINEAR).strip().lower().replace(" ", "")
+    if text in ("", CURVE_LINEAR):
+        return CURVE_LINEAR
+    if text == CURVE_CIE:
+        return CURVE_CIE
+    kind, _, arg = text.partition(":")
+    if kind == CURVE_GAMMA:
+        gamma = float(arg)
+        if not 0.1 <= gamma <= 5.0:
+            raise ValueError(f"gamma out of range: {gamma}")
+        return f"{CURVE_GAMMA}:{gamma:g}"
+    if kind == CURVE_POINTS:
+        points = _parse_points(arg)
+        return f"{CURVE_POINTS}:" + ",".join(f"{x:g}:{y:g}" for x, y in points)
+    raise ValueError(f"unknown curve: {spec}")
+
+
+def _parse_points(arg: str) -> list[tuple[float, float]]:
+    points: list[tuple[float, float]] = []
+    for pair in arg.split(","):
+        x, y = (float(v) for v in pair.split(":"))
+        if not (0 <= x <= DEFAULT_MAX_BRIGHTNESS and 0 <= y <= DEFAULT_MAX_BRIGHTNESS):
+            raise ValueError(f"breakpoint out of range: {pair}")
+        # Tabellen müssen monoton sein: die Rückrechnung (Feedback) sucht per Bisektion darin
+        if points and (x <= points[-1][0] or y < points[-1][1]):
+            raise CurveNotMonotone(f"breakpoint {pair} does not rise after {points[-1][0]:g}:{points[-1][1]:g}")
+        points.append((x, y))
+    # Endpunkte ergänzen, damit der ganze Bereich abgedeckt ist
+    if points[0][0] > 0:
+        points.insert(0, (0.0, 0.0))
+    if points[-1][0] < DEFAULT_MAX_BRIGHTNESS:
+        points.append((float(DEFAULT_MAX_BRIGHTNESS), float(DEFAULT_MAX_BRIGHTNESS)))
+    return points
+
+
+def _curve_values(spec: str) -> list[float]:
+    """Curve output for every master level 0..254, on the 0..254 scale."""
+    top = float(DEFAULT_MAX_BRIGHTNESS)
+    levels = range(DEFAULT_MAX_BRIGHTNESS + 1)
+    if spec == CURVE_LINEAR:
+        return [float(b) for b in levels]
+    if spec == CURVE_CIE:
+        # CIE 1931: Master als wahrgenommene Helligkeit L*, Ausgabe als Leuchtdichte Y
+        out = []
+        for b in levels:
+            lightness = b / top * 100.0
+            y = ((lightness + 16.0) / 116.0) ** 3 if lightness > 8.0 else lightness / 903.3
+            out.append(y * top)
+        return out
+    kind, _, arg = spec.partition(":")
+    if kind == CURVE_GAMMA:
+        gamma = float(arg)
+        return [(b / top) ** gamma * top for b in levels]
+    points = _parse_points(arg)
+    out = []
+    i = 0
+    for b in levels:
+        while points[i + 1][0] < b:
+            i += 1
+        (x0, y0), (x1, y1) = points[i], points[i + 1]
+        out.append(y0 + (y1 - y0) * (b - x0) / (x1 - x0))
+    return out
+
+
+@lru_cache(maxsize=1024)
+def compile_table(spec: str, factor: float, lo: int, hi: int) -> Table:
+    """Per-child lookup table: curve, then factor, then min/max clamp.
+
+    Children with identical parameters share one table.
+    """
+    return tuple(
+        max(lo, min(hi, int(round(value * factor))))
+        for value in _curve_values(spec)
+    )
+
+
+def compose_tables(outer: Table, inner: Table) -> Table:
+    """Table of a child in a nested group: the outer table feeds the inner one."""
+    return tuple(inner[max(DEFAULT_MIN_BRIGHTNESS, min(DEFAULT_MAX_BRIGHTNESS, level))] for level in outer)
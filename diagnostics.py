@@ -0,0 +1,27 @@
+from __future__ import annotations
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .batcher import async_get_batcher
+from .calibration import cache_info
+from .const import DOMAIN, DATA_GROUPS
+from .health import async_get_health
+from .ratelimit import async_get_limiter
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    group = hass.data.get(DOMAIN, {}).get(DATA_GROUPS, {}).get(entry.entry_id)
+    return {
+        "entry": {
+            "title": entry.title,
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "group": group.diagnostics() if group is not None else None,
+        "batcher": async_get_batcher(hass).diagnostics(),
+        "limiter": async_get_limiter(hass).diagnostics(),
+        "health": async_get_health(hass).diagnostics(),
+        "color_cache": cache_info(),
+    }
@@ -0,0 +1,126 @@
+from __future__ import annotations
+import logging
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+from .capabilities import CapabilityCache, ChildCapabilities, parse_capabilities
+from .const import DOMAIN, DATA_DISPATCHER
+from .health import async_get_health
+from .ratelimit import async_get_limiter
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ChildStateDispatcher:
+    """Domain-wide child subscription index.
+
+    Every child entity is tracked exactly once, no matter how many groups it
+    belongs to. State-change events are routed only to the groups that
+    contain the child.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._groups_by_child: dict[str, list[RelativeLightGroup]] = {}
+        self._children_by_group: dict[RelativeLightGroup, set[str]] = {}
+        self._unsubs: dict[str, Callable[[], None]] = {}
+        self.capabilities = CapabilityCache(hass)
+
+    @property
+    def listener_count(self) -> int:
+        return len(self._unsubs)
+
+    def groups_for(self, child: str) -> list[RelativeLightGroup]:
+        return self._groups_by_child.get(child, [])
+
+    def get_capabilities(self, child: str) -> ChildCapabilities:
+        # Nur abonnierte Kinder cachen – nur für sie kommt eine Invalidierung an
+        if child in self._unsubs:
+            return self.capabilities.get(child)
+        return parse_capabilities(self.hass.states.get(child))
+
+    @callback
+    def async_add_group(self, group: RelativeLightGroup, children: Iterable[str]) -> Callable[[], None]:
+        self.async_update_members(group, children)
+
+        @callback
+        def _remove() -> None:
+            self.async_remove_group(group)
+
+        return _remove
+
+    @callback
+    def async_remove_group(self, group: RelativeLightGroup) -> None:
+        for child in self._children_by_group.pop(group, set()):
+            self._detach(group, child)
+
+    @callback
+    def async_update_members(self, group: RelativeLightGroup, children: Iterable[str]) -> tuple[set[str], set[str]]:
+        """Apply a membership change; only added/removed children are touched."""
+        new = set(children)
+        old = self._children_by_group.get(group, set())
+        added = new - old
+        removed = old - new
+        self._children_by_group[group] = new
+        for child in removed:
+            self._detach(group, child)
+        for child in added:
+            self._attach(group, child)
+        return added, removed
+
+    @callback
+    def _attach(self, group: RelativeLightGroup, child: str) -> None:
+        groups = self._groups_by_child.setdefault(child, [])
+        groups.append(group)
+        if child not in self._unsubs:
+            self._unsubs[child] = async_track_state_change_event(self.hass, [child], self._async_state_changed)
+            async_get_health(self.hass).async_seed(child, self.hass.states.get(child))
+
+    @callback
+    def _detach(self, group: RelativeLightGroup, child: str) -> None:
+        groups = self._groups_by_child.get(child)
+        if not groups:
+            return
+        try:
+            groups.remove(group)
+        except ValueError:
+            pass
+        if groups:
+            return
+        del self._groups_by_child[child]
+        if (unsub := self._unsubs.pop(child, None)) is not None:
+            unsub()
+        self.capabilities.async_forget(child)
+        async_get_health(self.hass).async_forget(child)
+
+    @callback
+    def _async_state_changed(self, event: Event[Any]) -> None:
+        child = event.data.get("entity_id")
+        # Jede Zustandsmeldung quittiert den zuletzt gesendeten Befehl (Backpressure)
+        async_get_limiter(self.hass).async_child_reported(child)
+        caps_changed = self.capabilities.async_state_changed(event)
+        # Gesundheit des Kindes: tote Kinder werden übersprungen, zurückgekehrte nachgezogen
+        catch_up = async_get_health(self.hass).async_child_state(
+            child, event.data.get("old_state"), event.data.get("new_state")
+        )
+        # Kopie, falls ein Handler die Mitgliedschaft ändert
+        for group in tuple(self._groups_by_child.get(child, ())):
+            if caps_changed:
+                group.async_child_capabilities_changed(child)
+            if catch_up:
+                # Vor dem Event, damit der zuletzt befohlene Zustand der Gruppe maßgeblich ist
+                group.async_child_recovered(child)
+            group.async_child_state_changed(event)
+
+
+@callback
+def async_get_dispatcher(hass: HomeAssistant) -> ChildStateDispatcher:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (dispatcher := domain_data.get(DATA_DISPATCHER)) is None:
+        dispatcher = domain_data[DATA_DISPATCHER] = ChildStateDispatcher(hass)
+    return dispatcher
@@ -0,0 +1,130 @@
+from __future__ import annotations
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN, DATA_FADE
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+
+_LOGGER = logging.getLogger(__name__)
+
+# Globales Budget: Kind-Updates pro Sekunde über alle laufenden Fades
+FADE_COMMAND_BUDGET = 60.0
+MIN_STEP_INTERVAL = 0.1
+MAX_STEP_INTERVAL = 2.0
+
+
+class Fade:
+    """Software ramp of one group's children from start to target levels."""
+
+    __slots__ = ("start", "target", "current", "duration", "started", "turn_off")
+
+    def __init__(self, start: dict[str, int], target: dict[str, int], duration: float, turn_off: bool) -> None:
+        self.start = start
+        self.target = target
+        # Zuletzt gesendete Stufe je Kind; Ausgangspunkt, falls ein neuer Befehl den Fade ersetzt
+        self.current = dict(start)
+        self.duration = duration
+        self.started = time.monotonic()
+        self.turn_off = turn_off
+
+    def levels_at(self, now: float) -> tuple[dict[str, int], bool]:
+        """Levels that changed since the last step, and whether the fade is done."""
+        progress = 1.0 if self.duration <= 0 else min(1.0, (now - self.started) / self.duration)
+        changed: dict[str, int] = {}
+        for eid, target in self.target.items():
+            start = self.start[eid]
+            level = int(round(start + (target - start) * progress))
+            if level != self.current.get(eid):
+                changed[eid] = level
+                self.current[eid] = level
+        return changed, progress >= 1.0
+
+
+class FadeEngine:
+    """One shared timer driving the software fades of all groups.
+
+    The step interval adapts to the number of children currently fading so
+    the total update rate stays within ``FADE_COMMAND_BUDGET``.
+    """
+
+    def __init__(self, hass: HomeAssistant, budget: float = FADE_COMMAND_BUDGET) -> None:
+        self.hass = hass
+        self.budget = budget
+        self._fades: dict[RelativeLightGroup, Fade] = {}
+        self._unsub_timer: Callable[[], None] | None = None
+        self.steps = 0
+
+    @property
+    def active(self) -> int:
+        return len(self._fades)
+
+    def is_fading(self, group: RelativeLightGroup) -> bool:
+        return group in self._fades
+
+    def current_levels(self, group: RelativeLightGroup) -> dict[str, int]:
+        fade = self._fades.get(group)
+        return dict(fade.current) if fade is not None else {}
+
+    @callback
+    def async_start(self, group: RelativeLightGroup, start: dict[str, int], target: dict[str, int], duration: float, turn_off: bool = False) -> None:
+        # Ein neuer Fade ersetzt einen laufenden mitten in der Rampe
+        self._fades[group] = Fade(start, target, duration, turn_off)
+        if self._unsub_timer is None:
+            self._schedule(0)
+
+    @callback
+    def async_cancel(self, group: RelativeLightGroup) -> None:
+        self._fades.pop(group, None)
+        if not self._fades and self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def _schedule(self, delay: float) -> None:
+        self._unsub_timer = async_call_later(self.hass, delay, self._tick)
+
+    def _interval(self) -> float:
+        children = sum(len(f.target) for f in self._fades.values())
+        return min(MAX_STEP_INTERVAL, max(MIN_STEP_INTERVAL, children / self.budget))
+
+    @callback
+    def _tick(self, _now: Any) -> None:
+        self._unsub_timer = None
+        now = time.monotonic()
+        steps: list[tuple[RelativeLightGroup, dict[str, int], bool]] = []
+        for group, fade in list(self._fades.items()):
+            levels, done = fade.levels_at(now)
+            if done:
+                del self._fades[group]
+                if fade.turn_off:
+                    # Letzter Schritt eines Ausschalt-Fades: alle beteiligten Kinder ausschalten
+                    steps.append((group, dict(fade.target), True))
+                    continue
+            if levels:
+                steps.append((group, levels, False))
+        self.steps += 1
+        if steps:
+            self.hass.async_create_task(self._async_run_steps(steps))
+        if self._fades:
+            self._schedule(self._interval())
+
+    async def _async_run_steps(self, steps: list[tuple[RelativeLightGroup, dict[str, int], bool]]) -> None:
+        for group, levels, turn_off in steps:
+            try:
+                await group.async_fade_step(levels, turn_off)
+            except Exception:  # noqa: BLE001
+                _LOGGER.exception("%s: software fade step failed", group.entity_id)
+
+
+@callback
+def async_get_fade_engine(hass: HomeAssistant) -> FadeEngine:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (engine := domain_data.get(DATA_FADE)) is None:
+        engine = domain_data[DATA_FADE] = FadeEngine(hass)
+    return engine
@@ -0,0 +1,107 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+    from .ratelimit import QueuedCommand
+
+# Ein Service-Call einer Welle: Dienst, Kinder, Payload und ggf. Fehler
+WaveCall = tuple[str, list[str], dict[str, Any], BaseException | None]
+
+
+def _payload_key(payload: dict[str, Any]) -> tuple:
+    # Payload-Werte sind Skalare oder Tupel (hs); Listen werden hashbar gemacht
+    return tuple(sorted(
+        (k, tuple(v) if isinstance(v, list) else v) for k, v in payload.items()
+    ))
+
+
+class FanoutPlan:
+    """Service calls for one fan-out, children grouped by identical payload."""
+
+    __slots__ = ("batches", "children")
+
+    def __init__(self, batches: list[tuple[list[str], dict[str, Any]]], children: int) -> None:
+        self.batches = batches
+        self.children = children
+
+    @property
+    def calls(self) -> int:
+        return len(self.batches)
+
+    @property
+    def saved(self) -> int:
+        # Anzahl eingesparter Service-Calls gegenüber einem Call pro Kind
+        return self.children - len(self.batches)
+
+
+def plan_fanout(payloads: dict[str, dict[str, Any]]) -> FanoutPlan:
+    """Group per-child payloads so each distinct payload is sent exactly once.
+
+    Batches keep the order in which their first child appears, so members
+    listed first in the group are still addressed first.
+    """
+    groups: dict[tuple, tuple[list[str], dict[str, Any]]] = {}
+    # Gemeinsam genutzte Payload-Vorlagen nur einmal in einen Schlüssel umwandeln
+    keys: dict[int, tuple] = {}
+    for eid, payload in payloads.items():
+        key = keys.get(id(payload))
+        if key is None:
+            key = keys[id(payload)] = _payload_key(payload)
+        batch = groups.get(key)
+        if batch is None:
+            groups[key] = ([eid], payload)
+        else:
+            batch[0].append(eid)
+    return FanoutPlan(list(groups.values()), len(payloads))
+
+
+async def _async_call(hass: HomeAssistant, service: str, entity_ids: list[str], payload: dict[str, Any]) -> BaseException | None:
+    try:
+        await hass.services.async_call("light", service, {"entity_id": entity_ids, **payload}, blocking=False)
+    except asyncio.CancelledError:
+        raise
+    except Exception as err:  # noqa: BLE001
+        return err
+    return None
+
+
+async def async_send_wave(hass: HomeAssistant, wave: dict[str, QueuedCommand]) -> list[str]:
+    """Send the admitted commands of all groups as one dispatch wave.
+
+    Children of different groups that get the same service and payload share
+    one service call. Each group is then told which of its children were
+    addressed by which call. Returns the children whose call failed.
+    """
+    by_service: dict[str, dict[str, dict[str, Any]]] = {}
+    for child, item in wave.items():
+        by_service.setdefault(item.service, {})[child] = item.payload
+    batches = [
+        (service, eids, payload)
+        for service, payloads in by_service.items()
+        for eids, payload in plan_fanout(payloads).batches
+    ]
+    if not batches:
+        return []
+    wall = time.time()
+    started = time.perf_counter()
+    errors = await asyncio.gather(*(_async_call(hass, service, eids, payload) for service, eids, payload in batches))
+    duration = time.perf_counter() - started
+    failed: list[str] = []
+    # Aufteilen nach Gruppe: jede Gruppe verbucht nur ihre eigenen Kinder
+    calls: dict[RelativeLightGroup, list[WaveCall]] = {}
+    for (service, eids, payload), error in zip(batches, errors):
+        if error is not None:
+            failed.extend(eids)
+        own: dict[RelativeLightGroup, list[str]] = {}
+        for eid in eids:
+            own.setdefault(wave[eid].group, []).append(eid)
+        for group, group_eids in own.items():
+            calls.setdefault(group, []).append((service, group_eids, payload, error))
+    for group, group_calls in calls.items():
+        group.async_wave_sent(group_calls, wave, wall, duration)
+    return failed
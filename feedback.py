@@ -0,0 +1,118 @@
+from __future__ import annotations
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Callable
+
+from homeassistant.components.light import ATTR_BRIGHTNESS
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DEFAULT_MIN_BRIGHTNESS, DEFAULT_MAX_BRIGHTNESS, DEFAULT_FEEDBACK_INTERVAL, DEFAULT_FEEDBACK_HOLDOFF
+from .curves import Table
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+
+# Abweichung, ab der eine Schätzung den Master überschreibt (Rundung der Kinder)
+FEEDBACK_TOLERANCE = 3
+
+
+def estimate_master(table: Table, state: State | None) -> float | None:
+    """Master level a child's reported brightness corresponds to, or None.
+
+    Children that are off, report no brightness, or sit at one of their
+    clamps (where the level says nothing about the master) are ignored.
+    """
+    if state is None or state.state != "on":
+        return None
+    bri = state.attributes.get(ATTR_BRIGHTNESS)
+    if bri is None:
+        return None
+    bri = int(bri)
+    if bri <= table[DEFAULT_MIN_BRIGHTNESS] or bri >= table[DEFAULT_MAX_BRIGHTNESS]:
+        return None
+    # Tabellen sind monoton: Umkehrung per Binärsuche über 254 Stufen
+    return float(min(DEFAULT_MAX_BRIGHTNESS, bisect_left(table, bri, DEFAULT_MIN_BRIGHTNESS)))
+
+
+class FeedbackEstimator:
+    """Estimates the master brightness from the children, with running sums.
+
+    Each child's contribution is replaced in O(1) when its state changes. The
+    estimate is applied to the group at most once per interval and not within
+    the hold-off after a command of the group itself, so transitions and
+    rounding of the group's own fan-out do not move the master.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        group: RelativeLightGroup,
+        interval: float = DEFAULT_FEEDBACK_INTERVAL,
+        holdoff: float = DEFAULT_FEEDBACK_HOLDOFF,
+    ) -> None:
+        self.hass = hass
+        self.group = group
+        self.interval = interval
+        self.holdoff = holdoff
+        self._contrib: dict[str, float] = {}
+        self._sum = 0.0
+        self._unsub_timer: Callable[[], None] | None = None
+        self._last_command = 0.0
+        self.updates = 0
+
+    @property
+    def contributors(self) -> int:
+        return len(self._contrib)
+
+    @property
+    def estimate(self) -> float | None:
+        return self._sum / len(self._contrib) if self._contrib else None
+
+    @callback
+    def async_reset(self, children: dict[str, Table]) -> None:
+        self._contrib.clear()
+        self._sum = 0.0
+        for eid, table in children.items():
+            self._set(eid, estimate_master(table, self.hass.states.get(eid)))
+
+    @callback
+    def async_child_reported(self, eid: str, table: Table, new_state: State | None) -> None:
+        self._set(eid, estimate_master(table, new_state))
+        if self._unsub_timer is None:
+            self._unsub_timer = async_call_later(self.hass, self.interval, self._async_apply)
+
+    @callback
+    def async_command_sent(self, transition: float | None = None) -> None:
+        self._last_command = time.monotonic() + float(transition or 0)
+
+    @callback
+    def async_cancel(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    def _set(self, eid: str, value: float | None) -> None:
+        old = self._contrib.pop(eid, None)
+        if old is not None:
+            self._sum -= old
+        if value is not None:
+            self._contrib[eid] = value
+            self._sum += value
+
+    @callback
+    def _async_apply(self, _now: Any) -> None:
+        self._unsub_timer = None
+        wait = self._last_command + self.holdoff - time.monotonic()
+        if wait > 0:
+            # Eigener Befehl läuft noch (Transition/Rundung) – später erneut prüfen
+            self._unsub_timer = async_call_later(self.hass, wait, self._async_apply)
+            return
+        estimate = self.estimate
+        if estimate is None:
+            return
+        level = max(DEFAULT_MIN_BRIGHTNESS, min(DEFAULT_MAX_BRIGHTNESS, int(round(estimate))))
+        if abs(level - self.group.master_brightness) < FEEDBACK_TOLERANCE:
+            return
+        self.updates += 1
+        self.group.async_set_master_from_feedback(level)
@@ -0,0 +1,136 @@
+from __future__ import annotations
+import logging
+import time
+from typing import Any, Iterable
+
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant, State, callback
+
+from .const import DOMAIN, DATA_HEALTH, DEFAULT_BREAKER_FAILURES, DEFAULT_BREAKER_COOLDOWN
+
+_LOGGER = logging.getLogger(__name__)
+
+_DEAD_STATES = (STATE_UNAVAILABLE, STATE_UNKNOWN)
+
+
+def _alive(state: State | None) -> bool:
+    return state is not None and state.state not in _DEAD_STATES
+
+
+class _Breaker:
+    __slots__ = ("reason", "since", "retry_at", "was_alive", "missed")
+
+    def __init__(self, reason: str, since: float, retry_at: float | None, was_alive: bool) -> None:
+        self.reason = reason
+        self.since = since
+        # Nur bei Fehler-Sperren: ab hier geht ein Befehl als Probe durch
+        self.retry_at = retry_at
+        self.was_alive = was_alive
+        self.missed = 0
+
+
+class ChildHealth:
+    """Domain-wide circuit breaker per child.
+
+    A child that reports ``unavailable`` or ``unknown`` is open: commands for
+    it are dropped at admission instead of sent, so dead bulbs neither occupy
+    service calls nor delay the healthy children of the wave. Repeatedly
+    failing service calls open it as well, for a cooldown after which one
+    command is let through as a probe. The next live state report closes the
+    breaker; the groups then send the child a single catch-up command.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        failure_limit: int = DEFAULT_BREAKER_FAILURES,
+        cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+    ) -> None:
+        self.hass = hass
+        self.failure_limit = failure_limit
+        self.cooldown = cooldown
+        self._open: dict[str, _Breaker] = {}
+        self._failures: dict[str, int] = {}
+        self.trips = 0
+        self.recoveries = 0
+        self.skipped = 0
+
+    def is_open(self, child: str) -> bool:
+        return child in self._open
+
+    def admits(self, child: str, now: float) -> bool:
+        """Whether a command for the child may be sent; counts it as missed otherwise."""
+        breaker = self._open.get(child)
+        if breaker is None:
+            return True
+        if breaker.retry_at is not None and now >= breaker.retry_at:
+            # Halb offen: ein Befehl als Probe, danach wieder bis zur nächsten Pause gesperrt
+            breaker.retry_at = now + self.cooldown
+            return True
+        breaker.missed += 1
+        self.skipped += 1
+        return False
+
+    @callback
+    def async_seed(self, child: str, state: State | None) -> None:
+        # Beim Abonnieren bereits tote Kinder (None = noch nicht geladen, wie bisher senden)
+        if state is not None and not _alive(state):
+            self._trip(child, "unavailable", None, False)
+
+    @callback
+    def async_child_state(self, child: str, old_state: State | None, new_state: State | None) -> bool:
+        """Feed a child's state change; returns True when the child needs a catch-up."""
+        if not _alive(new_state):
+            self._trip(child, "unavailable", None, _alive(old_state))
+            return False
+        self._failures.pop(child, None)
+        breaker = self._open.pop(child, None)
+        if breaker is None:
+            return False
+        self.recoveries += 1
+        _LOGGER.debug("%s is back after %.1f s (%d commands missed)", child, time.monotonic() - breaker.since, breaker.missed)
+        # Nachziehen, wenn das Kind vorher lief oder in der Zwischenzeit Befehle verpasst hat
+        return breaker.was_alive or breaker.missed > 0
+
+    @callback
+    def async_calls_failed(self, children: Iterable[str]) -> None:
+        now = time.monotonic()
+        for child in children:
+            count = self._failures[child] = self._failures.get(child, 0) + 1
+            if count >= self.failure_limit:
+                self._trip(child, "errors", now + self.cooldown, True)
+
+    @callback
+    def async_forget(self, child: str) -> None:
+        self._open.pop(child, None)
+        self._failures.pop(child, None)
+
+    def _trip(self, child: str, reason: str, retry_at: float | None, was_alive: bool) -> None:
+        breaker = self._open.get(child)
+        if breaker is not None:
+            breaker.reason = reason
+            breaker.retry_at = retry_at
+            return
+        self._open[child] = _Breaker(reason, time.monotonic(), retry_at, was_alive)
+        self.trips += 1
+        _LOGGER.debug("Skipping %s until it recovers (%s)", child, reason)
+
+    def diagnostics(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "trips": self.trips,
+            "recoveries": self.recoveries,
+            "skipped": self.skipped,
+            "open": {
+                child: {"reason": b.reason, "since_s": round(now - b.since, 1), "missed": b.missed}
+                for child, b in self._open.items()
+            },
+        }
+
+
+@callback
+def async_get_health(hass: HomeAssistant) -> ChildHealth:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (health := domain_data.get(DATA_HEALTH)) is None:
+        health = domain_data[DATA_HEALTH] = ChildHealth(hass)
+    return health
@@ -1,7 +1,9 @@
 from __future__ import annotations
 import logging
-import asyncio
-from typing import Any
+import time
+from typing import Any, Callable
+
+import voluptuous as vol
 
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
@@ -13,22 +15,43 @@ from homeassistant.components.light import (
     LightEntityFeature,
 )
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_platform
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers.event import async_track_state_change_event
-from homeassistant.const import CONF_NAME
+from homeassistant.helpers.event import async_call_later
+from homeassistant.const import CONF_NAME, STATE_UNAVAILABLE, STATE_UNKNOWN
 
 from .const import (
     DOMAIN,
+    DATA_GROUPS,
     CONF_ENTITIES,
     CONF_FACTORS,
     CONF_MIN,
     CONF_MAX,
+    CONF_CURVES,
+    CONF_COLOR_PROFILES,
     CONF_FORWARD_CT,
     CONF_FORWARD_COLOR,
     DEFAULT_NAME,
     DEFAULT_MAX_BRIGHTNESS,
     DEFAULT_MIN_BRIGHTNESS,
+    CONF_COMMAND_WINDOW,
+    DEFAULT_COMMAND_WINDOW,
+    CONF_DEBUG_TRACE,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_SOFTWARE_FADE,
+    CONF_CONFIRM_DELIVERY,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_FEEDBACK,
+    CONF_RECORD_TRACE,
+    CONF_AREAS,
+    CONF_FLOORS,
+    CONF_LABELS,
+    CONF_DEFAULT_FACTOR,
+    CONF_DEFAULT_MIN,
+    CONF_DEFAULT_MAX,
+    DEFAULT_FEEDBACK_HOLDOFF,
     ATTR_MASTER_BRIGHTNESS,
     ATTR_FACTORS,
     ATTR_MIN,
@@ -36,30 +59,116 @@ from .const import (
     SERVICE_SET_FACTOR,
     SERVICE_SET_MIN_MAX,
     SERVICE_APPLY,
+    SERVICE_SET_PARAMETERS,
+    ATTR_CHILD,
+    ATTR_FACTOR,
+    ATTR_FORCE,
 )
+from .batcher import async_get_batcher
+from .calibration import ColorProfile, calibrate_hs, calibrate_kelvin, parse_color_profile
+from .capabilities import ChildCapabilities
+from .confirm import DeliveryTracker
+from .curves import CURVE_LINEAR, normalize_curve
+from .dispatcher import async_get_dispatcher
+from .fade import FadeEngine, async_get_fade_engine
+from .fanout import WaveCall
+from .feedback import FeedbackEstimator
+from .membership import MemberSelector, async_get_registry_index
+from .metrics import GroupMetrics
+from .nesting import FlatChild, FlatPlan, async_get_group_index, flatten
+from .ratelimit import QueuedCommand, async_get_limiter
+from .scheduler import CommandScheduler
+from .startup import async_get_finalizer
+from .storage import async_get_store
+from .tuning import async_cancel_tuning
+from .tracing import TraceRecorder, trace_config
 
 _LOGGER = logging.getLogger(__name__)
 
+# Marker im Sende-Cache für "zuletzt ausgeschaltet"
+_SENT_OFF = "off"
+# Obergrenze der wiederverwendeten Payload-Vorlagen je Gruppe
+_TEMPLATE_LIMIT = 512
+# Abweichungen, die Kinder durch Rundung melden, ohne dass sich etwas geändert hat
+_BRIGHTNESS_TOLERANCE = 2
+_KELVIN_TOLERANCE = 50
+_HS_TOLERANCE = 2.0
 
 
-async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
-    data = {**entry.data, **entry.options}
-    name = data.get(CONF_NAME, DEFAULT_NAME)
-    def _normalize_entities(value) -> list[str]:
-        if isinstance(value, str):
-            return [value]
-        result: list[str] = []
-        if isinstance(value, list):
-            for item in value:
-                if isinstance(item, str) and item:
-                    result.append(item)
-                elif isinstance(item, dict):
-                    cand = item.get("entity_id") or item.get("entity")
-                    if isinstance(cand, str) and cand:
-                        result.append(cand)
-        return result
+def _hs_differs(reported: Any, hs: tuple[float, float]) -> bool:
+    try:
+        hue, sat = float(reported[0]), float(reported[1])
+    except (TypeError, ValueError, IndexError):
+        return False
+    # Farbton ist zyklisch (359° liegt neben 0°)
+    dh = abs(hue - hs[0]) % 360.0
+    return min(dh, 360.0 - dh) > _HS_TOLERANCE or abs(sat - hs[1]) > _HS_TOLERANCE
+
+
+
+def _normalize_entities(value) -> list[str]:
+    if isinstance(value, str):
+        return [value]
+    result: list[str] = []
+    if isinstance(value, list):
+        for item in value:
+            if isinstance(item, str) and item:
+                result.append(item)
+            elif isinstance(item, dict):
+                cand = item.get("entity_id") or item.get("entity")
+                if isinstance(cand, str) and cand:
+                    result.append(cand)
+    return result
+
+
+def _parse_curves(value: Any, entities: list[str]) -> dict[str, str]:
+    curves: dict[str, str] = {}
+    if not isinstance(value, dict):
+        return curves
+    for eid in entities:
+        try:
+            spec = normalize_curve(value.get(eid))
+        except ValueError as err:
+            _LOGGER.warning("Ignoring response curve of %s: %s", eid, err)
+            continue
+        # Lineare Kurven nicht speichern – Standardfall
+        if spec != CURVE_LINEAR:
+            curves[eid] = spec
+    return curves
+
+
+def _parse_color_profiles(value: Any, entities: list[str]) -> dict[str, ColorProfile]:
+    profiles: dict[str, ColorProfile] = {}
+    if not isinstance(value, dict):
+        return profiles
+    for eid in entities:
+        try:
+            profile = parse_color_profile(value.get(eid))
+        except ValueError as err:
+            _LOGGER.warning("Ignoring color calibration of %s: %s", eid, err)
+            continue
+        if profile is not None:
+            profiles[eid] = profile
+    return profiles
+
+
+def _parse_ids(value: Any) -> frozenset[str]:
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        return frozenset()
+    return frozenset(v for v in value if isinstance(v, str) and v)
 
+
+def parse_entry_parameters(data: dict[str, Any]) -> dict[str, Any]:
+    """Parse merged entry data/options into the group's constructor parameters."""
     entities = _normalize_entities(data.get(CONF_ENTITIES, []))
+    selector = MemberSelector(
+        _parse_ids(data.get(CONF_AREAS)), _parse_ids(data.get(CONF_FLOORS)), _parse_ids(data.get(CONF_LABELS))
+    )
+    default_factor = float(data.get(CONF_DEFAULT_FACTOR, 1.0))
+    default_min = int(data.get(CONF_DEFAULT_MIN, DEFAULT_MIN_BRIGHTNESS))
+    default_max = int(data.get(CONF_DEFAULT_MAX, DEFAULT_MAX_BRIGHTNESS))
 
     src_factors = data.get(CONF_FACTORS, {})
     if not isinstance(src_factors, dict):
@@ -71,30 +180,114 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
     if not isinstance(src_max, dict):
         src_max = {}
 
-    factors: dict[str, float] = {e: float(src_factors.get(e, 1.0)) for e in entities}
-    min_map: dict[str, int] = {e: int(src_min.get(e, DEFAULT_MIN_BRIGHTNESS)) for e in entities}
-    max_map: dict[str, int] = {e: int(src_max.get(e, DEFAULT_MAX_BRIGHTNESS)) for e in entities}
-    forward_ct = bool(data.get(CONF_FORWARD_CT, False))
-    forward_color = bool(data.get(CONF_FORWARD_COLOR, False))
+    # Dynamische Mitglieder folgen den Standardregeln; explizite Werte (z. B. per Service) bleiben erhalten
+    overrides = entities if selector.empty else [*entities, *(e for e in src_factors if e not in entities)]
+    overrides_min = entities if selector.empty else [*entities, *(e for e in src_min if e not in entities)]
+    overrides_max = entities if selector.empty else [*entities, *(e for e in src_max if e not in entities)]
+
+    return {
+        "name": data.get(CONF_NAME, DEFAULT_NAME),
+        "entities": entities,
+        "selector": selector,
+        "default_factor": default_factor,
+        "default_min": default_min,
+        "default_max": default_max,
+        "factors": {e: float(src_factors.get(e, default_factor)) for e in overrides},
+        "min_map": {e: int(src_min.get(e, default_min)) for e in overrides_min},
+        "max_map": {e: int(src_max.get(e, default_max)) for e in overrides_max},
+        "curves": _parse_curves(data.get(CONF_CURVES), entities),
+        "color_profiles": _parse_color_profiles(data.get(CONF_COLOR_PROFILES), entities),
+        "forward_ct": bool(data.get(CONF_FORWARD_CT, False)),
+        "forward_color": bool(data.get(CONF_FORWARD_COLOR, False)),
+        "command_window": float(data.get(CONF_COMMAND_WINDOW, DEFAULT_COMMAND_WINDOW)),
+        "debug_trace": bool(data.get(CONF_DEBUG_TRACE, False)),
+        "software_fade": bool(data.get(CONF_SOFTWARE_FADE, False)),
+        "confirm_delivery": bool(data.get(CONF_CONFIRM_DELIVERY, False)),
+        "compact_attributes": bool(data.get(CONF_COMPACT_ATTRIBUTES, False)),
+        "feedback": bool(data.get(CONF_FEEDBACK, False)),
+        "record_trace": bool(data.get(CONF_RECORD_TRACE, False)),
+        "diagnostic_sensors": bool(data.get(CONF_DIAGNOSTIC_SENSORS, False)),
+    }
+
+
+async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
+    # Zur Laufzeit per Service geänderte Werte liegen im Store und überlagern die Optionen
+    params = parse_entry_parameters(
+        async_get_store(hass).merge(entry.entry_id, {**entry.data, **entry.options})
+    )
 
     rel = RelativeLightGroup(
         hass,
-        name,
-        entities,
-        factors,
-        min_map,
-        max_map,
-        forward_ct,
-        forward_color,
+        params["name"],
+        params["entities"],
+        params["factors"],
+        params["min_map"],
+        params["max_map"],
+        params["forward_ct"],
+        params["forward_color"],
         unique_id=entry.entry_id,
+        command_window=params["command_window"],
+        debug_trace=params["debug_trace"],
+        software_fade=params["software_fade"],
+        confirm_delivery=params["confirm_delivery"],
+        compact_attributes=params["compact_attributes"],
+        curves=params["curves"],
+        color_profiles=params["color_profiles"],
+        feedback=params["feedback"],
+        record_trace=params["record_trace"],
+        selector=params["selector"],
+        default_factor=params["default_factor"],
+        default_min=params["default_min"],
+        default_max=params["default_max"],
     )
+    rel.diagnostic_sensors = params["diagnostic_sensors"]
 
     async_add_entities([rel])
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_SET_FACTOR,
+        {
+            vol.Required(ATTR_CHILD): cv.entity_id,
+            vol.Required(ATTR_FACTOR): vol.All(vol.Coerce(float), vol.Range(min=0, max=5)),
+        },
+        "async_service_set_factor",
+    )
+    platform.async_register_entity_service(
+        SERVICE_SET_MIN_MAX,
+        {
+            vol.Required(ATTR_CHILD): cv.entity_id,
+            vol.Optional(ATTR_MIN): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+            vol.Optional(ATTR_MAX): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+        },
+        "async_service_set_min_max",
+    )
+    platform.async_register_entity_service(
+        SERVICE_SET_PARAMETERS,
+        {
+            vol.Optional(ATTR_FACTORS): {cv.entity_id: vol.All(vol.Coerce(float), vol.Range(min=0, max=5))},
+            vol.Optional(ATTR_MIN): {cv.entity_id: vol.All(vol.Coerce(int), vol.Range(min=0, max=255))},
+            vol.Optional(ATTR_MAX): {cv.entity_id: vol.All(vol.Coerce(int), vol.Range(min=0, max=255))},
+        },
+        "async_service_set_parameters",
+    )
+    platform.async_register_entity_service(
+        SERVICE_APPLY,
+        {
+            vol.Optional(ATTR_TRANSITION): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+            vol.Optional(ATTR_FORCE, default=False): cv.boolean,
+        },
+        "async_service_apply",
+    )
+
 class RelativeLightGroup(LightEntity, RestoreEntity):
     _attr_should_poll = False
     _attr_available = True
     _attr_supported_features = LightEntityFeature.TRANSITION
+    # Tuning-Parameter nicht bei jedem Zustandswechsel in die Recorder-Datenbank schreiben
+    _unrecorded_attributes = frozenset({ATTR_FACTORS, ATTR_MIN, ATTR_MAX})
+    # Ob für diese Gruppe Diagnose-Sensoren angelegt wurden (Änderung erfordert Reload)
+    diagnostic_sensors = False
 
     def __init__(
         self,
@@ -107,6 +300,19 @@ class RelativeLightGroup(LightEntity, RestoreEntity):
         forward_ct: bool,
         forward_color: bool,
         unique_id: str | None = None,
+        command_window: float = DEFAULT_COMMAND_WINDOW,
+        debug_trace: bool = False,
+        software_fade: bool = False,
+        confirm_delivery: bool = False,
+        compact_attributes: bool = False,
+        curves: dict[str, str] | None = None,
+        color_profiles: dict[str, ColorProfile] | None = None,
+        feedback: bool = False,
+        record_trace: bool = False,
+        selector: MemberSelector | None = None,
+        default_factor: float = 1.0,
+        default_min: int = DEFAULT_MIN_BRIGHTNESS,
+        default_max: int = DEFAULT_MAX_BRIGHTNESS,
     ) -> None:
         self.hass = hass
         self._attr_name = name
@@ -114,34 +320,81 @@ class RelativeLightGroup(LightEntity, RestoreEntity):
         # Matter/Alexa-Kompatibilität: Explizite Kategorisierung
         self._attr_entity_category = None  # Hauptgerät, nicht versteckt
         self.entities = [e for e in entities if isinstance(e, str) and e]
+        # Feste Mitglieder plus die aus Bereichen/Etagen/Labels aufgelösten (Registry-Index)
+        self._static_entities = list(self.entities)
+        self._dynamic_entities: set[str] = set()
+        self.selector = selector or MemberSelector()
+        # Regeln für Kinder ohne eigene Werte (v. a. dynamische Mitglieder)
+        self.default_factor = default_factor
+        self.default_min = default_min
+        self.default_max = default_max
         self.factors = factors
         self.min_map = min_map
         self.max_map = max_map
-        # gamma removed
+        # Antwortkurven je Kind (werden mit Faktor und Clamps zu Lookup-Tabellen kompiliert)
+        self.curves = curves or {}
+        # Farbkalibrierung je Kind (Gamut, Weißpunkt, CT-Offset); Umrechnungen sind gecacht
+        self.color_profiles = color_profiles or {}
         self.forward_ct = forward_ct
         self.forward_color = forward_color
+        # Transitionen selbst rampen statt an die Kinder durchzureichen
+        self.software_fade = software_fade
+        self._fade_extras: dict[str, dict[str, Any]] = {}
         self._child_supports_ct: dict[str, bool] = {}
         self._child_supports_color: dict[str, bool] = {}
+        self._child_supports_transition: dict[str, bool] = {}
+        self._child_kelvin: dict[str, tuple[int, int]] = {}
+        # Anzahl der Kinder je unterer/oberer Kelvin-Grenze: Schnittmenge ohne Iteration über alle Kinder
+        self._kelvin_lo_counts: dict[int, int] = {}
+        self._kelvin_hi_counts: dict[int, int] = {}
+        self._attr_min_color_temp_kelvin = None
+        self._attr_max_color_temp_kelvin = None
         
-        # Initialisiere mit Standard-Farbmodus
+        # Initialisiere mit Standard-Farbmodus; die finalen Capabilities legt der
+        # gemeinsame Finalizer fest, sobald die Kinder geladen sind (stabil für Matter)
         self._attr_color_mode = ColorMode.BRIGHTNESS
         self._attr_supported_color_modes = {ColorMode.BRIGHTNESS}
-        
-        self._refresh_child_capabilities()
-
-        # Finale Capabilities einmalig festlegen (stabil für Matter-Kompatibilität)
-        self._finalize_supported_color_modes()
+        self._capabilities_final = False
 
         self._is_on = False
         self._master_brightness = DEFAULT_MAX_BRIGHTNESS
         self._last_kelvin: int | None = None
         self._last_hs: tuple[float, float] | None = None
+        # Zähler und Latenzen für Diagnose (Download + optionale Sensoren)
+        self._metrics = GroupMetrics(trace=debug_trace)
+        # Zuletzt gesendeter Zustand je Kind: (brightness, kelvin, hs) oder _SENT_OFF
+        self._last_sent: dict[str, tuple | str] = {}
+        # Wiederverwendete Payloads je (brightness, kelvin, hs); gelten für die Transition, mit der sie gebaut wurden
+        self._payload_templates: dict[tuple, dict[str, Any]] = {}
+        self._template_transition: float | None = None
+        self._scheduler = CommandScheduler(hass, command_window)
+        # Optional: Zustellung über Kind-Events bestätigen und nur Nachzügler erneut senden
+        self._delivery: DeliveryTracker | None = (
+            DeliveryTracker(hass, self, self.child_reached) if confirm_delivery else None
+        )
+        # Optional: Master aus der gemeldeten Helligkeit der Kinder schätzen (ohne Fan-out)
+        self._feedback: FeedbackEstimator | None = FeedbackEstimator(hass, self) if feedback else None
+        # Optional: Befehle und Kind-Events aufzeichnen; angelegt, sobald die entity_id feststeht
+        self._record_trace = record_trace
+        self._trace: TraceRecorder | None = None
 
         # listen only to on/off availability changes to reflect is_on; do not read brightness back
         self._unsubs: list[Any] = []
-        self._subscribe_child_states()
+        self._on_children: set[str] = set()
+        self._write_scheduled = False
+        self._write_baseline = False
+        # Eigene Befehle (inkl. Transition/Fade): bis dahin meldet is_on den Befehl, nicht die Kinder
+        self._reconcile_after = 0.0
+        self._unsub_reconcile: Callable[[], None] | None = None
+        # Attribute nur bei Parameteränderungen neu aufbauen; kompakt = Tuning nur über Diagnose
+        self.compact_attributes = compact_attributes
+        self._attrs_cache: dict[str, Any] | None = None
+        # Verschachtelte Relative-Gruppen werden zu einem flachen Plan aufgelöst (pro Index-Generation)
+        self._flat: FlatPlan | None = None
+        self._flat_generation = -1
+        self._nested_leaves: set[str] = set()
         # mark unavailable if no children configured
-        if not self.entities:
+        if not self.entities and self.selector.empty:
             self._attr_available = False
 
     @property
@@ -155,23 +408,92 @@ class RelativeLightGroup(LightEntity, RestoreEntity):
 
     @callback
     def _subscribe_child_states(self):
-        @callback
-        def _state_changed(event):
-            eid = event.data.get("entity_id")
-            any_on = any(self.hass.states.is_state(e, "on") for e in self.entities)
-            self._is_on = any_on
-            # Nur den on/off Status aktualisieren, keine Capabilities neu berechnen
-            # (Capabilities bleiben stabil für Matter-Kompatibilität)
-            self.async_write_ha_state()
-        # Spezifische State-Tracker für bessere Performance
-        self._unsubs.append(async_track_state_change_event(self.hass, self.entities, _state_changed))
+        # Eingeschaltete Kinder inkrementell führen statt bei jedem Event alle Mitglieder zu prüfen
+        self._on_children = {e for e in self.entities if self.hass.states.is_state(e, "on")}
+        # Gemeinsamer Dispatcher: ein Listener pro Kind, auch wenn es in mehreren Gruppen ist
+        self._unsubs.append(async_get_dispatcher(self.hass).async_add_group(self, self.entities))
+
+    @callback
+    def async_child_state_changed(self, event) -> None:
+        eid = event.data.get("entity_id")
+        new_state = event.data.get("new_state")
+        if self._trace is not None:
+            self._trace.async_child_event(eid, new_state)
+        self._invalidate_last_sent(eid, new_state)
+        if self._delivery is not None:
+            self._delivery.async_child_reported(eid, new_state)
+        if self._feedback is not None and (flat := self._flat_plan().children.get(eid)) is not None:
+            self._feedback.async_child_reported(eid, flat.table, new_state)
+        if new_state is not None and new_state.state == "on":
+            self._on_children.add(eid)
+        else:
+            self._on_children.discard(eid)
+        self._async_reconcile_is_on()
+
+    @callback
+    def _async_reconcile_timer(self, _now: Any) -> None:
+        self._unsub_reconcile = None
+        self._async_reconcile_is_on()
+
+    @callback
+    def _async_reconcile_is_on(self) -> None:
+        # Mit dem veröffentlichten Zustand vergleichen, nicht mit dem vorigen Aggregat:
+        # ein Kind, das ein optimistisches Aus ignoriert, muss die Gruppe wieder einschalten
+        any_on = bool(self._on_children)
+        if any_on == self._is_on:
+            return
+        # Während eines Fades (Schritte sind turn_on) und kurz nach eigenen Befehlen nicht umschalten;
+        # danach einmal erneut prüfen
+        wait = self._reconcile_after - time.monotonic()
+        if wait > 0 or async_get_fade_engine(self.hass).is_fading(self):
+            if self._unsub_reconcile is None:
+                self._unsub_reconcile = async_call_later(
+                    self.hass, wait if wait > 0 else DEFAULT_FEEDBACK_HOLDOFF, self._async_reconcile_timer
+                )
+            return
+        # Nur den on/off Status aktualisieren, keine Capabilities neu berechnen
+        # (Capabilities bleiben stabil für Matter-Kompatibilität)
+        self._async_schedule_state_write()
+        self._is_on = any_on
+
+    def _hold_reconcile(self, transition: float | None) -> None:
+        delay = float(transition or 0) + DEFAULT_FEEDBACK_HOLDOFF
+        self._reconcile_after = time.monotonic() + delay
+        if self._unsub_reconcile is None:
+            # Auch prüfen, wenn kein Kind mehr meldet (unveränderter Zustand löst kein Event aus)
+            self._unsub_reconcile = async_call_later(self.hass, delay, self._async_reconcile_timer)
+
+    @callback
+    def _async_schedule_state_write(self) -> None:
+        # Höchstens ein State-Write pro Event-Loop-Durchlauf (z. B. bei Szenenwechseln)
+        if self._write_scheduled:
+            return
+        self._write_scheduled = True
+        self._write_baseline = self._is_on
+        self.hass.loop.call_soon(self._async_flush_state_write)
+
+    @callback
+    def _async_flush_state_write(self) -> None:
+        self._write_scheduled = False
+        if self._is_on == self._write_baseline or self.entity_id is None:
+            return
+        self.async_write_ha_state()
 
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
-        # Beim Hinzufügen einmal Fähigkeiten der Kinder erfassen und UI anpassen
-        self._refresh_child_capabilities()
-        self._finalize_supported_color_modes()
-        if (state := await self.async_get_last_state()) is not None:
+        if not self.selector.empty:
+            # Dynamische Mitglieder vor dem Abonnieren auflösen, danach hält der Index sie aktuell
+            async_get_registry_index(self.hass).async_track(self, self.selector)
+        # Erst nach dem Hinzufügen abonnieren, damit Events keinen State vor der Registrierung schreiben;
+        # vor der Fähigkeitsermittlung, damit diese aus dem gemeinsamen Cache kommt
+        self._subscribe_child_states()
+        state = await self.async_get_last_state()
+        if state is not None:
+            # Bis zur Festlegung die zuletzt veröffentlichten Capabilities weiterverwenden
+            self._restore_capabilities(state)
+        # Fähigkeiten der Kinder gebündelt für alle Gruppen festlegen, sobald sie geladen sind
+        async_get_finalizer(self.hass).async_request(self)
+        if state is not None:
             self._is_on = state.state == "on"
             mb = state.attributes.get(ATTR_MASTER_BRIGHTNESS)
             if mb is not None:
@@ -194,14 +516,51 @@ class RelativeLightGroup(LightEntity, RestoreEntity):
                 self._set_color_mode_if_supported(ColorMode.HS)
             elif self.forward_ct and self._last_kelvin is not None:
                 self._set_color_mode_if_supported(ColorMode.COLOR_TEMP)
+        if self.unique_id is not None:
+            # Für In-Place-Updates aus dem Options-Listener auffindbar machen
+            self.hass.data.setdefault(DOMAIN, {}).setdefault(DATA_GROUPS, {})[self.unique_id] = self
+        # Als mögliches Mitglied anderer Gruppen bekannt machen (Verschachtelung)
+        async_get_group_index(self.hass).async_register(self)
+        if self._record_trace:
+            self._trace = TraceRecorder(self.hass, self)
         # Initialen Zustand veröffentlichen
         self.async_write_ha_state()
 
+    async def async_will_remove_from_hass(self) -> None:
+        if self.unique_id is not None:
+            self.hass.data.get(DOMAIN, {}).get(DATA_GROUPS, {}).pop(self.unique_id, None)
+        async_get_group_index(self.hass).async_unregister(self)
+        async_get_registry_index(self.hass).async_untrack(self)
+        async_get_finalizer(self.hass).async_forget(self)
+        async_cancel_tuning(self.hass, self)
+        self._scheduler.async_cancel()
+        if self._unsub_reconcile is not None:
+            self._unsub_reconcile()
+            self._unsub_reconcile = None
+        if self._delivery is not None:
+            self._delivery.async_cancel()
+        if self._feedback is not None:
+            self._feedback.async_cancel()
+        if self._trace is not None:
+            self._trace.async_close()
+            self._trace = None
+        async_get_fade_engine(self.hass).async_cancel(self)
+        async_get_batcher(self.hass).async_forget_group(self)
+        async_get_limiter(self.hass).async_forget_group(self)
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs.clear()
+        await super().async_will_remove_from_hass()
+
     # ---------- LightEntity API ----------
     @property
     def is_on(self) -> bool:
         return self._is_on
 
+    @property
+    def master_brightness(self) -> int:
+        return self._master_brightness
+
     @property
     def brightness(self) -> int | None:
         # Matter-kompatibel: Bei ausgeschaltetem Zustand None zurückgeben
@@ -212,15 +571,24 @@ class RelativeLightGroup(LightEntity, RestoreEntity):
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
-        # `entity_id` sorgt dafür, dass die Frontend-Detailansicht (More Info)
-        # die Mitglieder wie bei einer normalen Lichtgruppe mit anzeigt.
-        return {
-            "entity_id": list(self.entities),
-            ATTR_MASTER_BRIGHTNESS: self._master_brightness,
-            ATTR_FACTORS: self.factors,
-            ATTR_MIN: self.min_map,
-            ATTR_MAX: self.max_map,
-        }
+        if (attrs := self._attrs_cache) is None:
+            # `entity_id` sorgt dafür, dass die Frontend-Detailansicht (More Info)
+            # die Mitglieder wie bei einer normalen Lichtgruppe mit anzeigt.
+            # Kopien, damit frühere State-Objekte nicht mitverändert werden
+            attrs = {"entity_id": list(self.entities)}
+            if not self.compact_attributes:
+                attrs[ATTR_FACTORS] = dict(self.factors)
+                attrs[ATTR_MIN] = dict(self.min_map)
+                attrs[ATTR_MAX] = dict(self.max_map)
+            self._attrs_cache = attrs
+        if attrs.get(ATTR_MASTER_BRIGHTNESS) != self._master_brightness:
+            # Neues Objekt statt Mutation: HA übernimmt die Werte in den State
+            attrs = self._attrs_cache = {**attrs, ATTR_MASTER_BRIGHTNESS: self._master_brightness}
+        return attrs
+
+    @callback
+    def _invalidate_attributes(self) -> None:
+        self._attrs_cache = None
 
     @property
     def hs_color(self) -> tuple[float, float] | None:
@@ -236,7 +604,16 @@ class RelativeLightGroup(LightEntity, RestoreEntity):
             return self._last_kelvin
         return None
 
+    @callback
+    def async_write_ha_state(self) -> None:
+        self._metrics.state_writes += 1
+        super().async_write_ha_state()
+
     async def async_turn_on(self, **kwargs: Any) -> None:
+        started = time.perf_counter()
+        self._metrics.commands += 1
+        if self._trace is not None:
+            self._trace.async_command("turn_on", kwargs)
         # Brightness im Matter-kompatiblen Bereich 0-254 begrenzen
         b = int(kwargs.get(ATTR_BRIGHTNESS, self._master_brightness))
         self._master_brightness = max(DEFAULT_MIN_BRIGHTNESS, min(DEFAULT_MAX_BRIGHTNESS, int(b)))
@@ -267,108 +644,478 @@ class RelativeLightGroup(LightEntity, RestoreEntity):
         tr = kwargs.get(ATTR_TRANSITION)
         # Optimistic state update für Matter-Kompatibilität
         self._is_on = True
-        self.async_write_ha_state()
-        await self.async_apply_to_children(transition=tr)
+        self._hold_reconcile(tr)
+        if self._feedback is not None:
+            self._feedback.async_command_sent(tr)
+
+        async def _job() -> None:
+            self.async_write_ha_state()
+            await self.async_apply_to_children(transition=tr)
+
+        # Slider-Bursts zusammenfassen: nur der neueste Zielwert erreicht die Kinder
+        self._scheduler.async_submit(_job)
+        self._metrics.latency["command"].observe(time.perf_counter() - started)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
-        data = {}
-        if ATTR_TRANSITION in kwargs:
-            data[ATTR_TRANSITION] = kwargs[ATTR_TRANSITION]
+        started = time.perf_counter()
+        self._metrics.commands += 1
+        if self._trace is not None:
+            self._trace.async_command("turn_off", kwargs)
+        tr = kwargs.get(ATTR_TRANSITION)
         self._is_on = False
-        self.async_write_ha_state()
-        await self.hass.services.async_call("light", "turn_off", {"entity_id": self.entities, **data}, blocking=False)
+        self._hold_reconcile(tr)
+        if self._feedback is not None:
+            self._feedback.async_command_sent(tr)
+
+        async def _job() -> None:
+            self.async_write_ha_state()
+            await self.async_turn_off_children(transition=tr)
+
+        self._scheduler.async_submit(_job)
+        self._metrics.latency["command"].observe(time.perf_counter() - started)
 
     # ---------- Helpers ----------
-    def _apply_gamma(self, base: int) -> int:
-        # gamma removed: passthrough
-        return base
+    async def async_apply_to_children(self, transition: float | None = None, force: bool = False) -> None:
+        started = time.perf_counter()
+        base = self._master_brightness
+        plan = self._flat_plan()
+        payloads: dict[str, dict[str, Any]] = {}
+        sent: dict[str, tuple] = {}
+        last_sent = self._last_sent
+        kelvin_in = self._last_kelvin if self.forward_ct else None
+        hs_in = tuple(self._last_hs) if self.forward_color and self._last_hs is not None else None
+        # Payload-Vorlagen je Zielzustand; bei unverändertem Zustand wird dasselbe Dict wiederverwendet
+        templates = self._payload_templates
+        if transition != self._template_transition or len(templates) > _TEMPLATE_LIMIT:
+            templates.clear()
+            self._template_transition = transition
+        # Nur noch die vorkompilierten Datensätze lesen (Tabelle, Fähigkeiten, Kalibrierung)
+        for eid, flat in plan.items:
+            target = flat.table[base]
+            kelvin = None
+            hs = None
+            if kelvin_in is not None and flat.ct:
+                kelvin = kelvin_in if flat.profile is None else calibrate_kelvin(flat.profile, kelvin_in, flat.kelvin_range)
+            if hs_in is not None and flat.color:
+                # Wiederkehrende Szenenfarben kosten nur einen Cache-Treffer
+                hs = hs_in if flat.profile is None else calibrate_hs(flat.profile, hs_in)
+            key = (target, kelvin, hs)
+            # Delta-Unterdrückung: Kind hat diesen Zustand bereits erhalten
+            if not force and last_sent.get(eid) == key:
+                continue
+            payload = templates.get(key)
+            if payload is None:
+                payload = {ATTR_BRIGHTNESS: target}
+                if transition is not None:
+                    payload[ATTR_TRANSITION] = transition
+                if kelvin is not None:
+                    payload[ATTR_COLOR_TEMP_KELVIN] = kelvin
+                if hs is not None:
+                    payload[ATTR_HS_COLOR] = hs
+                templates[key] = payload
+            payloads[eid] = payload
+            sent[eid] = key
 
-    async def async_apply_to_children(self, transition: float | None = None) -> None:
-        base = self._apply_gamma(self._master_brightness)
-        tasks = []
-        for eid in self.entities:
-            fac = float(self.factors.get(eid, 1.0))
-            target = int(round(base * fac))
-            target = max(self.min_map.get(eid, DEFAULT_MIN_BRIGHTNESS),
-                        min(self.max_map.get(eid, DEFAULT_MAX_BRIGHTNESS), target))
-
-            payload: dict[str, Any] = {ATTR_BRIGHTNESS: target}
-            if transition is not None:
-                payload[ATTR_TRANSITION] = transition
-            if self.forward_ct and self._last_kelvin is not None and self._child_supports_ct.get(eid, False):
-                payload[ATTR_COLOR_TEMP_KELVIN] = self._last_kelvin
-            if self.forward_color and self._last_hs is not None and self._child_supports_color.get(eid, False):
-                payload[ATTR_HS_COLOR] = self._last_hs
-
-            # WICHTIG: coroutine sammeln
-            tasks.append(
-                self.hass.services.async_call("light", "turn_on", {"entity_id": eid, **payload}, blocking=False)
-            )
-        if tasks:
-            # führt die coroutines tatsächlich aus; wartet NICHT auf Gerätezustellungsende
-            await asyncio.gather(*tasks, return_exceptions=True)
+        metrics = self._metrics
+        metrics.children_suppressed += len(plan.children) - len(payloads)
+        for group, flat in plan.nested:
+            # Zwischengruppen nur nachführen; ihre Kinder sind bereits im flachen Plan enthalten
+            group.async_follow_parent(flat.target(base), kelvin_in, self._last_hs if hs_in is not None else None)
+        fades = async_get_fade_engine(self.hass)
+        ramp: dict[str, dict[str, Any]] = {}
+        if self.software_fade and transition:
+            # Software-Fade nur für Kinder ohne native Transition; die übrigen erhalten die Transition direkt
+            ramp = {eid: p for eid, p in payloads.items() if not plan.children[eid].transition}
+        if ramp:
+            self._start_fade(fades, {eid: p[ATTR_BRIGHTNESS] for eid, p in ramp.items()}, float(transition))
+            self._fade_extras = {
+                eid: {k: v for k, v in p.items() if k not in (ATTR_BRIGHTNESS, ATTR_TRANSITION)}
+                for eid, p in ramp.items()
+            }
+            payloads = {eid: p for eid, p in payloads.items() if eid not in ramp}
+        else:
+            fades.async_cancel(self)
+        await self._async_dispatch_payloads(payloads, sent, started)
+
+    async def _async_dispatch_payloads(self, payloads: dict[str, dict[str, Any]], sent: dict[str, tuple], started: float) -> None:
+        self._metrics.latency["plan"].observe(time.perf_counter() - started)
+        if not payloads:
+            return
+        # Gemeinsame Welle mit anderen Gruppen, danach über den Limiter (langsame Kinder erhalten nur den neuesten Wert)
+        async_get_batcher(self.hass).async_submit(
+            self, "turn_on", {eid: (payload, sent[eid]) for eid, payload in payloads.items()}, started
+        )
+
+    @callback
+    def async_wave_sent(self, calls: list[WaveCall], wave: dict[str, QueuedCommand], wall: float, duration: float) -> None:
+        """Book the service calls of a dispatch wave that addressed our children."""
+        metrics = self._metrics
+        metrics.fanouts += 1
+        metrics.service_calls += len(calls)
+        children = sum(len(eids) for _service, eids, _payload, _error in calls)
+        metrics.calls_saved += children - len(calls)
+        metrics.latency["dispatch"].observe(duration)
+        _LOGGER.debug("%s: %d children with %d calls in this wave", self.entity_id, children, len(calls))
+        delivery = self._delivery
+        for service, eids, payload, error in calls:
+            metrics.record_dispatch(service, eids, payload, wall, duration, error)
+            if error is not None:
+                metrics.dispatch_errors += 1
+                _LOGGER.warning("%s: light.%s for %s failed: %s", self.entity_id, service, eids, error)
+                continue
+            for eid in eids:
+                key = wave[eid].key
+                self._last_sent[eid] = key
+                if delivery is not None:
+                    delivery.async_expect(eid, service, payload, key)
+
+    async def async_retry_children(self, retry: dict[str, dict[str, tuple[dict[str, Any], Any]]]) -> None:
+        """Resend unconfirmed commands to the stragglers only (called by the delivery tracker)."""
+        batcher = async_get_batcher(self.hass)
+        for service, commands in retry.items():
+            _LOGGER.debug("%s: retrying light.%s for %s", self.entity_id, service, list(commands))
+            batcher.async_submit(self, service, commands)
+
+    def _current_command(self, flat: FlatChild) -> tuple[str, dict[str, Any], tuple | str]:
+        """Service, payload and cache key that bring one child to the group's current state."""
+        if not self._is_on:
+            return "turn_off", {}, _SENT_OFF
+        kelvin = hs = None
+        if self.forward_ct and self._last_kelvin is not None and flat.ct:
+            kelvin = self._last_kelvin if flat.profile is None else calibrate_kelvin(flat.profile, self._last_kelvin, flat.kelvin_range)
+        if self.forward_color and self._last_hs is not None and flat.color:
+            hs = tuple(self._last_hs) if flat.profile is None else calibrate_hs(flat.profile, tuple(self._last_hs))
+        target = flat.table[self._master_brightness]
+        payload: dict[str, Any] = {ATTR_BRIGHTNESS: target}
+        if kelvin is not None:
+            payload[ATTR_COLOR_TEMP_KELVIN] = kelvin
+        if hs is not None:
+            payload[ATTR_HS_COLOR] = hs
+        return "turn_on", payload, (target, kelvin, hs)
+
+    @callback
+    def async_child_recovered(self, child: str) -> None:
+        """Resync a child that came back: one command with the group's current state."""
+        flat = self._flat_plan().children.get(child)
+        if flat is None:
+            return
+        if self._delivery is not None:
+            self._delivery.async_forget(child)
+        service, payload, key = self._current_command(flat)
+        state = self.hass.states.get(child)
+        if state is not None and self.child_reached(key, state):
+            # Kind hat den Zustand selbst wiederhergestellt
+            self._last_sent[child] = key
+            return
+        self._last_sent.pop(child, None)
+        self._metrics.catch_ups += 1
+        _LOGGER.debug("%s: catching up %s with light.%s", self.entity_id, child, service)
+        async_get_batcher(self.hass).async_submit(self, service, {child: (payload, key)})
 
+    @callback
+    def async_preview_children(self, children: list[str]) -> dict[str, int | None]:
+        """Send changed factors/clamps of some members to those children only (live tuning).
+
+        Returns the level each child was set to, ``None`` while the group is off.
+        The state is not written here; the tuning session does that once at the end.
+        """
+        # Faktoren/Clamps sind in die flachen Pläne kompiliert (auch die übergeordneter Gruppen)
+        async_get_group_index(self.hass).async_invalidate()
+        self._invalidate_attributes()
+        plan = self._flat_plan()
+        levels: dict[str, int | None] = {}
+        commands: dict[str, tuple[dict[str, Any], Any]] = {}
+        nested = False
+        for child in children:
+            flat = plan.children.get(child)
+            if flat is None:
+                # Verschachtelte Gruppe: betrifft alle ihre Kinder
+                nested = True
+                continue
+            if not self._is_on:
+                levels[child] = None
+                continue
+            _service, payload, key = self._current_command(flat)
+            levels[child] = key[0]
+            if self._last_sent.get(child) != key:
+                commands[child] = (payload, key)
+        if commands:
+            async_get_batcher(self.hass).async_submit(self, "turn_on", commands)
+        if nested and self._is_on:
+            self._scheduler.async_submit(self.async_apply_to_children)
+        return levels
+
+    @callback
+    def async_child_unconfirmed(self, child: str) -> None:
+        # Nach ausgeschöpften Wiederholungen beim nächsten Befehl nicht unterdrücken
+        self._last_sent.pop(child, None)
+
+    async def async_turn_off_children(self, transition: float | None = None, force: bool = False) -> None:
+        plan = self._flat_plan()
+        targets = [
+            eid for eid in plan.children
+            if force or not self._child_is_known_off(eid)
+        ]
+        self._metrics.children_suppressed += len(plan.children) - len(targets)
+        for group, _flat in plan.nested:
+            group.async_follow_parent(None)
+        fades = async_get_fade_engine(self.hass)
+        if not targets:
+            fades.async_cancel(self)
+            return
+        ramp: list[str] = []
+        if self.software_fade and transition:
+            ramp = [eid for eid in targets if not plan.children[eid].transition]
+        if ramp:
+            self._fade_extras = {}
+            self._start_fade(fades, {eid: 0 for eid in ramp}, float(transition), turn_off=True)
+            # Kinder mit nativer Transition schalten selbst weich aus
+            targets = [eid for eid in targets if plan.children[eid].transition]
+        else:
+            fades.async_cancel(self)
+        if not targets:
+            return
+        data: dict[str, Any] = {}
+        if transition is not None:
+            data[ATTR_TRANSITION] = transition
+        async_get_batcher(self.hass).async_submit(self, "turn_off", {eid: (data, _SENT_OFF) for eid in targets})
+
+    @callback
+    def async_set_master_from_feedback(self, level: int) -> None:
+        """Adopt a master level estimated from the children; nothing is sent to them."""
+        _LOGGER.debug("%s: master %s -> %s from child feedback", self.entity_id, self._master_brightness, level)
+        self._master_brightness = level
+        if self.entity_id is not None:
+            self.async_write_ha_state()
+
+    @callback
+    def async_follow_parent(self, brightness: int | None, kelvin: int | None = None, hs: tuple[float, float] | None = None) -> None:
+        """Mirror a command a parent group has already sent to our children."""
+        async_get_fade_engine(self.hass).async_cancel(self)
+        self._is_on = brightness is not None
+        self._hold_reconcile(None)
+        if brightness is not None:
+            self._master_brightness = max(DEFAULT_MIN_BRIGHTNESS, min(DEFAULT_MAX_BRIGHTNESS, brightness))
+            if self.forward_ct and kelvin is not None:
+                self._last_kelvin = kelvin
+            if self.forward_color and hs is not None:
+                self._last_hs = hs
+        if self.entity_id is not None:
+            self.async_write_ha_state()
+
+    # ---------- Nesting ----------
+    def _flat_plan(self) -> FlatPlan:
+        index = async_get_group_index(self.hass)
+        if self._flat is None or self._flat_generation != index.generation:
+            self._flat = flatten(self, index)
+            self._flat_generation = index.generation
+            leaves = set(self._flat.children).difference(self.entities)
+            if leaves != self._nested_leaves:
+                self._async_set_nested_leaves(leaves)
+            if self._feedback is not None:
+                # Neue Tabellen: Beiträge einmalig neu berechnen, danach wieder inkrementell
+                self._feedback.async_reset({eid: flat.table for eid, flat in self._flat.children.items()})
+        return self._flat
+
+    @callback
+    def _async_set_nested_leaves(self, leaves: set[str]) -> None:
+        # Kinder verschachtelter Gruppen mit abonnieren: Delta-Unterdrückung und Aus-Erkennung brauchen ihre Meldungen
+        for eid in self._nested_leaves - leaves:
+            self._last_sent.pop(eid, None)
+            if self._delivery is not None:
+                self._delivery.async_forget(eid)
+            self._on_children.discard(eid)
+        self._on_children.update(e for e in leaves - self._nested_leaves if self.hass.states.is_state(e, "on"))
+        self._nested_leaves = leaves
+        if self._unsubs:
+            async_get_dispatcher(self.hass).async_update_members(self, [*self.entities, *leaves])
+
+    # ---------- Software fade ----------
+    def _start_fade(self, fades: FadeEngine, target: dict[str, int], duration: float, turn_off: bool = False) -> None:
+        running = fades.current_levels(self)
+        start: dict[str, int] = {}
+        for eid in target:
+            level = running.get(eid)
+            if level is None:
+                last = self._last_sent.get(eid)
+                if isinstance(last, tuple):
+                    level = last[0]
+                elif last == _SENT_OFF:
+                    level = 0
+                else:
+                    st = self.hass.states.get(eid)
+                    bri = st.attributes.get(ATTR_BRIGHTNESS) if st is not None and st.state == "on" else None
+                    level = int(bri) if bri is not None else 0
+            start[eid] = level
+        fades.async_start(self, start, target, duration, turn_off)
+
+    async def async_fade_step(self, levels: dict[str, int], turn_off: bool) -> None:
+        """Send one step of a software fade (called by the shared fade engine)."""
+        started = time.perf_counter()
+        if turn_off:
+            async_get_batcher(self.hass).async_submit(self, "turn_off", {eid: ({}, _SENT_OFF) for eid in levels}, started)
+            return
+        payloads: dict[str, dict[str, Any]] = {}
+        sent: dict[str, tuple] = {}
+        for eid, level in levels.items():
+            # Auf dem Weg nach unten nicht vorzeitig ausschalten
+            level = max(DEFAULT_MIN_BRIGHTNESS, level)
+            extras = self._fade_extras.get(eid, {})
+            payloads[eid] = {ATTR_BRIGHTNESS: level, **extras}
+            sent[eid] = (level, extras.get(ATTR_COLOR_TEMP_KELVIN), extras.get(ATTR_HS_COLOR))
+        await self._async_dispatch_payloads(payloads, sent, started)
 
+    def _child_is_known_off(self, eid: str) -> bool:
+        last = self._last_sent.get(eid)
+        if last is not None:
+            return last == _SENT_OFF
+        # Noch nichts gesendet: auf den gemeldeten Zustand verlassen
+        return eid not in self._on_children
+
+    @staticmethod
+    def child_reached(key: tuple | str, state) -> bool:
+        """Whether a reported child state shows the commanded key."""
+        if key == _SENT_OFF:
+            return state.state == "off"
+        if state.state != "on":
+            return False
+        target, kelvin, hs = key
+        bri = state.attributes.get(ATTR_BRIGHTNESS)
+        if bri is not None and abs(int(bri) - target) > _BRIGHTNESS_TOLERANCE:
+            return False
+        child_k = state.attributes.get(ATTR_COLOR_TEMP_KELVIN)
+        if kelvin is not None and child_k is not None and abs(int(child_k) - kelvin) > _KELVIN_TOLERANCE:
+            return False
+        child_hs = state.attributes.get(ATTR_HS_COLOR)
+        return hs is None or child_hs is None or not _hs_differs(child_hs, hs)
+
+    @callback
+    def _invalidate_last_sent(self, eid: str, new_state) -> None:
+        """Forget the cached command when the child reports something else."""
+        last = self._last_sent.get(eid)
+        if last is None:
+            return
+        now_on = new_state is not None and new_state.state == "on"
+        if last == _SENT_OFF:
+            if now_on:
+                del self._last_sent[eid]
+            return
+        # Helligkeit, Kelvin und Farbe (hs) des gesendeten Schlüssels prüfen
+        if not self.child_reached(last, new_state):
+            del self._last_sent[eid]
 
     # ---------- Capabilities ----------
     def _refresh_child_capabilities(self, only_entities: list[str] | None = None) -> None:
         target_list = only_entities if only_entities is not None else self.entities
-        min_k_values: list[int] = []
-        max_k_values: list[int] = []
+        # Geparste Fähigkeiten kommen aus dem domänenweiten Cache (einmal pro Kind, nicht pro Gruppe)
+        dispatcher = async_get_dispatcher(self.hass)
         for child in target_list:
-            st = self.hass.states.get(child)
-            supports_ct = False
-            supports_color = False
-            if st is not None:
-                scm = st.attributes.get("supported_color_modes")
-                if isinstance(scm, (list, set)):
-                    modes = {str(m).lower() for m in scm}
-                    # Farbtemperatur
-                    supports_ct = "color_temp" in modes
-                    # Farbe (beliebiger Farbraum)
-                    color_modes = {"hs", "xy", "rgb", "rgbw", "rgbww", "rgbcw"}
-                    supports_color = any(m in modes for m in color_modes)
-                # Kelvin-Bereich ermitteln
-                if supports_ct:
-                    child_min_k = st.attributes.get("min_color_temp_kelvin")
-                    child_max_k = st.attributes.get("max_color_temp_kelvin")
-                    if child_min_k is None or child_max_k is None:
-                        # Fallback über mireds
-                        min_mireds = st.attributes.get("min_mireds")
-                        max_mireds = st.attributes.get("max_mireds")
-                        if max_mireds is not None:
-                            try:
-                                child_min_k = int(round(1000000.0 / float(max_mireds)))
-                            except Exception:
-                                child_min_k = None
-                        if min_mireds is not None:
-                            try:
-                                child_max_k = int(round(1000000.0 / float(min_mireds)))
-                            except Exception:
-                                child_max_k = None
-                    if isinstance(child_min_k, (int, float)):
-                        min_k_values.append(int(child_min_k))
-                    if isinstance(child_max_k, (int, float)):
-                        max_k_values.append(int(child_max_k))
-            self._child_supports_ct[child] = supports_ct
-            self._child_supports_color[child] = supports_color
-        # Gruppen-Kelvin-Bereich als Schnittmenge der Kinder (nur beim ersten Mal setzen)
-        if not hasattr(self, '_attr_min_color_temp_kelvin') and min_k_values and max_k_values:
-            self._attr_min_color_temp_kelvin = max(min_k_values)
-            self._attr_max_color_temp_kelvin = min(max_k_values)
-            if self._attr_min_color_temp_kelvin > self._attr_max_color_temp_kelvin:
-                # Fallback: unrealistischer Schnitt – nimm Spanne des ersten Kindes
-                self._attr_min_color_temp_kelvin = min(min_k_values)
-                self._attr_max_color_temp_kelvin = max(max_k_values)
-        elif not hasattr(self, '_attr_min_color_temp_kelvin'):
-            self._attr_min_color_temp_kelvin = None
-            self._attr_max_color_temp_kelvin = None
+            self._set_child_capabilities(child, dispatcher.get_capabilities(child))
+        self._update_kelvin_range()
+
+    def _set_child_capabilities(self, child: str, caps: ChildCapabilities) -> None:
+        if (
+            self._child_supports_ct.get(child) != caps.supports_ct
+            or self._child_supports_color.get(child) != caps.supports_color
+            or self._child_kelvin.get(child) != caps.kelvin_range
+            or self._child_supports_transition.get(child) != caps.supports_transition
+        ):
+            # Fähigkeiten sind in die flachen Pläne kompiliert
+            async_get_group_index(self.hass).async_invalidate()
+        self._child_supports_ct[child] = caps.supports_ct
+        self._child_supports_color[child] = caps.supports_color
+        self._child_supports_transition[child] = caps.supports_transition
+        self._set_child_kelvin(child, caps.kelvin_range)
+
+    def _set_child_kelvin(self, child: str, kelvin_range: tuple[int, int] | None) -> None:
+        old = self._child_kelvin.get(child)
+        if old == kelvin_range:
+            return
+        if old is not None:
+            for counts, bound in ((self._kelvin_lo_counts, old[0]), (self._kelvin_hi_counts, old[1])):
+                if counts[bound] == 1:
+                    del counts[bound]
+                else:
+                    counts[bound] -= 1
+            del self._child_kelvin[child]
+        if kelvin_range is not None:
+            self._child_kelvin[child] = kelvin_range
+            self._kelvin_lo_counts[kelvin_range[0]] = self._kelvin_lo_counts.get(kelvin_range[0], 0) + 1
+            self._kelvin_hi_counts[kelvin_range[1]] = self._kelvin_hi_counts.get(kelvin_range[1], 0) + 1
+
+    @callback
+    def async_child_capabilities_changed(self, child: str) -> None:
+        if child in self._nested_leaves:
+            # Fähigkeiten verschachtelter Kinder führt deren eigene Gruppe
+            return
+        # Nur dieses Kind aktualisieren; die Farbmodi der Gruppe bleiben stabil (Matter)
+        self._set_child_capabilities(child, async_get_dispatcher(self.hass).get_capabilities(child))
+        if not self._capabilities_final:
+            async_get_finalizer(self.hass).async_member_appeared(self)
+            return
+        if self._update_kelvin_range() and self.entity_id is not None:
+            self.async_write_ha_state()
+
+    def members_ready(self) -> bool:
+        """Whether every member has reported a state with usable attributes."""
+        for eid in self.entities:
+            st = self.hass.states.get(eid)
+            if st is None:
+                return False
+            if st.state in (STATE_UNAVAILABLE, STATE_UNKNOWN) and "supported_color_modes" not in st.attributes:
+                return False
+        return True
+
+    @callback
+    def async_finalize_capabilities(self) -> None:
+        """Fix color modes and kelvin range from the members (called once per setup)."""
+        self._refresh_child_capabilities()
+        self._finalize_supported_color_modes()
+        # Der Kelvin-Bereich aus dem wiederhergestellten Zustand ist nur vorläufig
+        self._update_kelvin_range(force=True)
+        self._capabilities_final = True
+        if self.entity_id is not None and self.hass.states.get(self.entity_id) is not None:
+            self.async_write_ha_state()
+
+    def _restore_capabilities(self, state) -> None:
+        modes = {
+            ColorMode(m) for m in state.attributes.get("supported_color_modes") or ()
+            if m in (ColorMode.BRIGHTNESS, ColorMode.COLOR_TEMP, ColorMode.HS)
+        }
+        if (ColorMode.COLOR_TEMP in modes and not self.forward_ct) or (ColorMode.HS in modes and not self.forward_color):
+            # Optionen haben sich seitdem geändert
+            return
+        if modes:
+            self._attr_supported_color_modes = modes | {ColorMode.BRIGHTNESS}
+        lo = state.attributes.get("min_color_temp_kelvin")
+        hi = state.attributes.get("max_color_temp_kelvin")
+        if isinstance(lo, (int, float)) and isinstance(hi, (int, float)):
+            self._attr_min_color_temp_kelvin = int(lo)
+            self._attr_max_color_temp_kelvin = int(hi)
+
+    def _update_kelvin_range(self, force: bool = False) -> bool:
+        """Set the group's kelvin range to the children's intersection; True if it changed."""
+        # Vor dem Finalisieren einen bereits gesetzten (wiederhergestellten) Bereich nicht überschreiben
+        if not self._child_kelvin or (self._attr_min_color_temp_kelvin is not None and not (force or self._capabilities_final)):
+            return False
+        # Distinkte Grenzen statt aller Kinder (meist nur wenige Lampenmodelle)
+        lo = max(self._kelvin_lo_counts)
+        hi = min(self._kelvin_hi_counts)
+        if lo > hi:
+            # Fallback: unrealistischer Schnitt – nimm Gesamtspanne der Kinder
+            lo = min(self._kelvin_lo_counts)
+            hi = max(self._kelvin_hi_counts)
+        if (lo, hi) == (self._attr_min_color_temp_kelvin, self._attr_max_color_temp_kelvin):
+            return False
+        self._attr_min_color_temp_kelvin = lo
+        self._attr_max_color_temp_kelvin = hi
+        return True
 
     # ---------- Modes ----------
     def _finalize_supported_color_modes(self) -> None:
         """Finale Capabilities einmalig festlegen (stabil für Matter-Kompatibilität)
         
-        WICHTIG: Diese Methode wird nur einmal bei der Initialisierung aufgerufen.
+        WICHTIG: Diese Methode wird nur einmal pro Setup aufgerufen (über den Finalizer).
         Matter/Alexa benötigen stabile Geräteeigenschaften und reagieren schlecht
         auf dynamische Änderungen der supported_color_modes.
         """
@@ -410,6 +1157,181 @@ class RelativeLightGroup(LightEntity, RestoreEntity):
         else:
             self._attr_color_mode = ColorMode.BRIGHTNESS
 
+    # ---------- Diagnostics ----------
+    @property
+    def metrics(self) -> GroupMetrics:
+        return self._metrics
+
+    def diagnostics(self) -> dict[str, Any]:
+        scheduler = self._scheduler
+        return {
+            "entity_id": self.entity_id,
+            "members": len(self.entities),
+            "dynamic_members": len(self._dynamic_entities),
+            "selector": {
+                "areas": sorted(self.selector.areas),
+                "floors": sorted(self.selector.floors),
+                "labels": sorted(self.selector.labels),
+            },
+            "children_on": len(self._on_children),
+            "is_on": self._is_on,
+            "master_brightness": self._master_brightness,
+            # Tuning-Parameter immer hier, auch wenn sie nicht als Attribute veröffentlicht werden
+            "factors": self.factors,
+            "min": self.min_map,
+            "max": self.max_map,
+            "curves": self.curves,
+            "color_profiles": {eid: profile.spec for eid, profile in self.color_profiles.items()},
+            "supported_color_modes": sorted(str(m) for m in self._attr_supported_color_modes or ()),
+            "scheduler": {
+                "window_s": scheduler.window,
+                "dispatched": scheduler.dispatched,
+                "coalesced": scheduler.coalesced,
+                "superseded": scheduler.superseded,
+            },
+            "delivery_pending": self._delivery.pending if self._delivery is not None else None,
+            "feedback": {
+                "estimate": self._feedback.estimate,
+                "contributors": self._feedback.contributors,
+                "updates": self._feedback.updates,
+            } if self._feedback is not None else None,
+            "trace": {
+                "path": self._trace.path,
+                "records": self._trace.records,
+            } if self._trace is not None else None,
+            "metrics": self._metrics.as_dict(),
+        }
+
+    # ---------- Reconfiguration ----------
+    @callback
+    def async_update_parameters(self, params: dict[str, Any]) -> bool:
+        """Apply changed options to the live entity.
+
+        Returns False when the change needs a full entry reload, i.e. when it
+        would alter the group's supported color modes.
+        """
+        if params["forward_ct"] != self.forward_ct or params["forward_color"] != self.forward_color:
+            return False
+        if params["diagnostic_sensors"] != self.diagnostic_sensors:
+            # Sensor-Entitäten kommen/gehen nur über einen Reload der Plattformen
+            return False
+        entities = params["entities"]
+        selector = params["selector"]
+        if not entities and selector.empty:
+            return False
+        if entities != self._static_entities:
+            members = [*entities, *sorted(self._dynamic_entities.difference(entities))]
+            if members != self.entities and not self._async_set_members(members):
+                return False
+            self._static_entities = list(entities)
+        self._attr_name = params["name"]
+        self.default_factor = params["default_factor"]
+        self.default_min = params["default_min"]
+        self.default_max = params["default_max"]
+        self.factors = params["factors"]
+        self.min_map = params["min_map"]
+        self.max_map = params["max_map"]
+        self.curves = params["curves"]
+        self.color_profiles = params["color_profiles"]
+        self._scheduler.window = max(0.0, params["command_window"])
+        self._metrics.set_trace(params["debug_trace"])
+        if not params["software_fade"]:
+            async_get_fade_engine(self.hass).async_cancel(self)
+        self.software_fade = params["software_fade"]
+        self.compact_attributes = params["compact_attributes"]
+        if params["feedback"] and self._feedback is None:
+            self._feedback = FeedbackEstimator(self.hass, self)
+        elif not params["feedback"] and self._feedback is not None:
+            self._feedback.async_cancel()
+            self._feedback = None
+        self._record_trace = params["record_trace"]
+        self._invalidate_attributes()
+        if params["confirm_delivery"] and self._delivery is None:
+            self._delivery = DeliveryTracker(self.hass, self, self.child_reached)
+        elif not params["confirm_delivery"] and self._delivery is not None:
+            self._delivery.async_cancel()
+            self._delivery = None
+        if selector != self.selector:
+            self.selector = selector
+            index = async_get_registry_index(self.hass)
+            if selector.empty:
+                index.async_untrack(self)
+                self.async_set_dynamic_members(set())
+            else:
+                index.async_track(self, selector)
+            self._attr_available = bool(self.entities) or not selector.empty
+        if self._trace is not None and (not self._record_trace or self._trace.config != trace_config(self)):
+            self._trace.async_close()
+            self._trace = None
+        if self._record_trace and self._trace is None and self.entity_id is not None:
+            # Neue Datei nur, wenn der Kopf nicht mehr zur Konfiguration passt
+            self._trace = TraceRecorder(self.hass, self)
+        async_get_group_index(self.hass).async_invalidate()
+        self.async_write_ha_state()
+        if self._is_on:
+            # Neue Faktoren sofort sichtbar machen; unveränderte Kinder filtert die Delta-Unterdrückung
+            self._scheduler.async_submit(self.async_apply_to_children)
+        return True
+
+    @callback
+    def async_set_dynamic_members(self, resolved: set[str]) -> None:
+        """Apply a new resolution of the area/floor/label selector.
+
+        Called by the registry index only when a relevant registry entry
+        changed; only added and removed children are (un)subscribed. Color
+        modes stay as they are (no reload), like for members that load late.
+        """
+        self._dynamic_entities = set(resolved)
+        entities = [*self._static_entities, *sorted(self._dynamic_entities.difference(self._static_entities))]
+        if entities == self.entities:
+            return
+        self._async_set_members(entities, strict=False)
+        self._attr_available = bool(self.entities) or not self.selector.empty
+        async_get_group_index(self.hass).async_invalidate()
+        if self.entity_id is None or not self._unsubs:
+            # Noch nicht hinzugefügt: Abonnement und Capabilities folgen in async_added_to_hass
+            return
+        self.async_write_ha_state()
+        if self._is_on:
+            # Neue Mitglieder auf den aktuellen Master bringen
+            self._scheduler.async_submit(self.async_apply_to_children)
+
+    @callback
+    def _async_set_members(self, entities: list[str], strict: bool = True) -> bool:
+        added = [e for e in entities if e not in self._child_supports_ct]
+        self._refresh_child_capabilities(only_entities=added)
+        has_ct = self.forward_ct and any(self._child_supports_ct.get(e, False) for e in entities)
+        has_color = self.forward_color and any(self._child_supports_color.get(e, False) for e in entities)
+        modes = self._attr_supported_color_modes or {ColorMode.BRIGHTNESS}
+        # strict=False (dynamische Mitglieder): Farbmodi bleiben, wie bei spät geladenen Kindern
+        if strict and (has_ct != (ColorMode.COLOR_TEMP in modes) or has_color != (ColorMode.HS in modes)):
+            # Farbmodi würden sich ändern – das erfordert einen Reload (Matter-Stabilität)
+            for e in added:
+                self._child_supports_ct.pop(e, None)
+                self._child_supports_color.pop(e, None)
+                self._child_supports_transition.pop(e, None)
+                self._set_child_kelvin(e, None)
+            return False
+        keep = set(entities)
+        for e in self.entities:
+            if e in keep:
+                continue
+            self._child_supports_ct.pop(e, None)
+            self._child_supports_color.pop(e, None)
+            self._child_supports_transition.pop(e, None)
+            self._set_child_kelvin(e, None)
+            self._last_sent.pop(e, None)
+            if self._delivery is not None:
+                self._delivery.async_forget(e)
+            self._on_children.discard(e)
+        self.entities = list(entities)
+        self._update_kelvin_range()
+        self._invalidate_attributes()
+        if self._unsubs:
+            async_get_dispatcher(self.hass).async_update_members(self, [*self.entities, *self._nested_leaves])
+        self._on_children.update(e for e in added if self.hass.states.is_state(e, "on"))
+        return True
+
     def set_factor(self, child: str, factor: float) -> None:
         self.factors[child] = float(factor)
 
@@ -420,4 +1342,83 @@ class RelativeLightGroup(LightEntity, RestoreEntity):
 
     async def async_write_parameters(self):
         # just update state; parameters live in memory (options flow updates config)
-        self.async_write_ha_state()
\ No newline at end of file
+        self.async_write_ha_state()
+
+    @callback
+    def async_set_parameters(
+        self,
+        factors: dict[str, float] | None = None,
+        min_values: dict[str, int] | None = None,
+        max_values: dict[str, int] | None = None,
+    ) -> None:
+        """Update factors/clamps of member children and persist them (debounced).
+
+        Raises ServiceValidationError, without changing anything, if a child is
+        not a member of the group.
+        """
+        members = set(self.entities)
+        unknown = (set(factors or {}) | set(min_values or {}) | set(max_values or {})) - members
+        if unknown:
+            raise ServiceValidationError(
+                f"{', '.join(sorted(unknown))} {'is' if len(unknown) == 1 else 'are'} not a member of {self.entity_id}"
+            )
+        changed_factors: dict[str, float] = {}
+        changed_min: dict[str, int] = {}
+        changed_max: dict[str, int] = {}
+        for child, factor in (factors or {}).items():
+            self.set_factor(child, factor)
+            changed_factors[child] = self.factors[child]
+        for child in set(min_values or {}) | set(max_values or {}):
+            self.set_min_max(
+                child,
+                (min_values or {}).get(child, self.min_map.get(child, self.default_min)),
+                (max_values or {}).get(child, self.max_map.get(child, self.default_max)),
+            )
+            changed_min[child] = self.min_map[child]
+            changed_max[child] = self.max_map[child]
+        if not (changed_factors or changed_min):
+            return
+        if self.unique_id is not None:
+            store = async_get_store(self.hass)
+            store.async_set(self.unique_id, CONF_FACTORS, changed_factors)
+            store.async_set(self.unique_id, CONF_MIN, changed_min)
+            store.async_set(self.unique_id, CONF_MAX, changed_max)
+        # Geänderte Faktoren/Clamps betreffen auch die flachen Pläne übergeordneter Gruppen
+        async_get_group_index(self.hass).async_invalidate()
+        self._invalidate_attributes()
+        self.async_write_ha_state()
+        if self._is_on:
+            self._scheduler.async_submit(self.async_apply_to_children)
+
+    # ---------- Services ----------
+    async def async_service_set_factor(self, **kwargs: Any) -> None:
+        self.async_set_parameters(factors={kwargs[ATTR_CHILD]: kwargs[ATTR_FACTOR]})
+
+    async def async_service_set_min_max(self, **kwargs: Any) -> None:
+        child = kwargs[ATTR_CHILD]
+        self.async_set_parameters(
+            min_values={child: kwargs[ATTR_MIN]} if ATTR_MIN in kwargs else None,
+            max_values={child: kwargs[ATTR_MAX]} if ATTR_MAX in kwargs else None,
+        )
+
+    async def async_service_set_parameters(self, **kwargs: Any) -> None:
+        self.async_set_parameters(
+            factors=kwargs.get(ATTR_FACTORS),
+            min_values=kwargs.get(ATTR_MIN),
+            max_values=kwargs.get(ATTR_MAX),
+        )
+
+    async def async_service_apply(self, **kwargs: Any) -> None:
+        transition = kwargs.get(ATTR_TRANSITION)
+        force = kwargs.get(ATTR_FORCE, False)
+        self._hold_reconcile(transition)
+
+        async def _job() -> None:
+            # Aktuellen Zustand der Gruppe erneut senden: an = Master, aus = Kinder aus
+            if self._is_on:
+                await self.async_apply_to_children(transition=transition, force=force)
+            else:
+                await self.async_turn_off_children(transition=transition, force=force)
+
+        # Über den Scheduler, damit ein neuerer Befehl gewinnt
+        self._scheduler.async_submit(_job)
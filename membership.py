@@ -0,0 +1,201 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import area_registry as ar, device_registry as dr, entity_registry as er
+
+from .const import DOMAIN, DATA_MEMBERSHIP
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+
+_NO_LABELS: frozenset[str] = frozenset()
+
+
+class MemberSelector(NamedTuple):
+    """Dynamic membership of a group: all lights in these areas, floors or with these labels."""
+
+    areas: frozenset[str] = frozenset()
+    floors: frozenset[str] = frozenset()
+    labels: frozenset[str] = frozenset()
+
+    @property
+    def empty(self) -> bool:
+        return not (self.areas or self.floors or self.labels)
+
+
+class RegistryIndex:
+    """Light entities indexed by area and label, kept current from registry events.
+
+    Built once from the registries; afterwards each registry event re-indexes
+    only the entities it concerns and re-resolves only the groups whose
+    selector touches the changed areas, floors or labels.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._by_area: dict[str, set[str]] = {}
+        self._by_label: dict[str, set[str]] = {}
+        # entity_id -> (area_id, labels), wie zuletzt indiziert
+        self._keys: dict[str, tuple[str | None, frozenset[str]]] = {}
+        self._area_floor: dict[str, str | None] = {}
+        self._groups: dict[RelativeLightGroup, MemberSelector] = {}
+        self._unsubs: list[Callable[[], None]] = []
+
+    # ---------- Groups ----------
+    @callback
+    def async_track(self, group: RelativeLightGroup, selector: MemberSelector) -> None:
+        if not self._unsubs:
+            self._async_load()
+        self._groups[group] = selector
+        group.async_set_dynamic_members(self.resolve(selector))
+
+    @callback
+    def async_untrack(self, group: RelativeLightGroup) -> None:
+        self._groups.pop(group, None)
+        if not self._groups:
+            for unsub in self._unsubs:
+                unsub()
+            self._unsubs.clear()
+
+    def resolve(self, selector: MemberSelector) -> set[str]:
+        areas = set(selector.areas)
+        if selector.floors:
+            areas.update(a for a, floor in self._area_floor.items() if floor in selector.floors)
+        members: set[str] = set()
+        for area in areas:
+            members |= self._by_area.get(area, set())
+        for label in selector.labels:
+            members |= self._by_label.get(label, set())
+        return members
+
+    # ---------- Index ----------
+    @callback
+    def _async_load(self) -> None:
+        bus = self.hass.bus
+        self._unsubs = [
+            bus.async_listen(er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_entity_updated),
+            bus.async_listen(dr.EVENT_DEVICE_REGISTRY_UPDATED, self._async_device_updated),
+            bus.async_listen(ar.EVENT_AREA_REGISTRY_UPDATED, self._async_area_updated),
+        ]
+        self._by_area.clear()
+        self._by_label.clear()
+        self._keys.clear()
+        self._area_floor = {area.id: area.floor_id for area in ar.async_get(self.hass).async_list_areas()}
+        for entry in er.async_get(self.hass).entities.values():
+            self._index(entry.entity_id, entry)
+
+    def _key(self, entry: er.RegistryEntry | None) -> tuple[str | None, frozenset[str]] | None:
+        if entry is None or entry.domain != "light" or entry.disabled_by is not None:
+            return None
+        # Eigene Gruppen nie dynamisch aufnehmen (Verschachtelung nur explizit)
+        if entry.platform == DOMAIN:
+            return None
+        area = entry.area_id
+        labels = frozenset(entry.labels) if entry.labels else _NO_LABELS
+        if entry.device_id is not None and (device := dr.async_get(self.hass).async_get(entry.device_id)) is not None:
+            if area is None:
+                area = device.area_id
+            if device.labels:
+                labels = labels | frozenset(device.labels)
+        return area, labels
+
+    def _index(self, entity_id: str, entry: er.RegistryEntry | None) -> tuple[set[str | None], set[str]] | None:
+        """Re-index one entity; returns the touched areas and labels if anything changed."""
+        old = self._keys.get(entity_id)
+        new = self._key(entry)
+        if old == new:
+            return None
+        areas: set[str | None] = set()
+        labels: set[str] = set()
+        if old is not None:
+            del self._keys[entity_id]
+            if old[0] is not None:
+                self._by_area.get(old[0], set()).discard(entity_id)
+            for label in old[1]:
+                self._by_label.get(label, set()).discard(entity_id)
+            areas.add(old[0])
+            labels |= old[1]
+        if new is not None:
+            self._keys[entity_id] = new
+            if new[0] is not None:
+                self._by_area.setdefault(new[0], set()).add(entity_id)
+            for label in new[1]:
+                self._by_label.setdefault(label, set()).add(entity_id)
+            areas.add(new[0])
+            labels |= new[1]
+        return areas, labels
+
+    @callback
+    def _async_refresh_groups(self, areas: set[str | None], labels: set[str], floors_changed: bool = False) -> None:
+        floors = {self._area_floor.get(a) for a in areas if a is not None}
+        for group, selector in list(self._groups.items()):
+            if (
+                selector.areas & areas
+                or selector.labels & labels
+                or selector.floors & floors
+                or (floors_changed and selector.floors)
+            ):
+                group.async_set_dynamic_members(self.resolve(selector))
+
+    # ---------- Registry events ----------
+    @callback
+    def _async_entity_updated(self, event: Event[Any]) -> None:
+        entity_id = event.data.get("entity_id", "")
+        old_entity_id = event.data.get("old_entity_id")
+        if not entity_id.startswith("light.") and not (old_entity_id or "").startswith("light."):
+            return
+        areas: set[str | None] = set()
+        labels: set[str] = set()
+        if old_entity_id:
+            # Umbenennung: alte ID austragen
+            if (touched := self._index(old_entity_id, None)) is not None:
+                areas |= touched[0]
+                labels |= touched[1]
+        entry = None if event.data.get("action") == "remove" else er.async_get(self.hass).async_get(entity_id)
+        if (touched := self._index(entity_id, entry)) is not None:
+            areas |= touched[0]
+            labels |= touched[1]
+        if areas or labels:
+            self._async_refresh_groups(areas, labels)
+
+    @callback
+    def _async_device_updated(self, event: Event[Any]) -> None:
+        if event.data.get("action") != "update":
+            # Entfernte Geräte räumen ihre Entitäten über Entity-Events ab
+            return
+        changes = event.data.get("changes") or {}
+        if "area_id" not in changes and "labels" not in changes:
+            return
+        registry = er.async_get(self.hass)
+        areas: set[str | None] = set()
+        labels: set[str] = set()
+        for entry in er.async_entries_for_device(registry, event.data["device_id"]):
+            if (touched := self._index(entry.entity_id, entry)) is not None:
+                areas |= touched[0]
+                labels |= touched[1]
+        if areas or labels:
+            self._async_refresh_groups(areas, labels)
+
+    @callback
+    def _async_area_updated(self, event: Event[Any]) -> None:
+        area_id = event.data.get("area_id")
+        if event.data.get("action") == "remove":
+            old = self._area_floor.pop(area_id, None)
+        else:
+            area = ar.async_get(self.hass).async_get_area(area_id)
+            new = area.floor_id if area is not None else None
+            old = self._area_floor.get(area_id)
+            self._area_floor[area_id] = new
+            if old == new:
+                return
+        if old is not None or self._area_floor.get(area_id) is not None:
+            self._async_refresh_groups(set(), set(), floors_changed=True)
+
+
+@callback
+def async_get_registry_index(hass: HomeAssistant) -> RegistryIndex:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (index := domain_data.get(DATA_MEMBERSHIP)) is None:
+        index = domain_data[DATA_MEMBERSHIP] = RegistryIndex(hass)
+    return index
@@ -0,0 +1,135 @@
+from __future__ import annotations
+from bisect import bisect_left
+from collections import deque
+from typing import Any
+
+# Obergrenzen der Histogramm-Buckets in Millisekunden (letzter Bucket: alles darüber)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+TRACE_LENGTH = 200
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; observing a sample is O(log buckets)."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimate below which ``q`` of the samples fall, interpolated within the bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(BUCKETS_MS):
+                    return self.max
+                lower = BUCKETS_MS[i - 1] if i else 0.0
+                # Linear im Bucket; nie über dem größten beobachteten Wert
+                return min(lower + (BUCKETS_MS[i] - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean, 3),
+            "p50_ms": round(self.quantile(0.5), 3),
+            "p90_ms": round(self.quantile(0.9), 3),
+            "p99_ms": round(self.quantile(0.99), 3),
+            "max_ms": round(self.max, 3),
+            "buckets_ms": {
+                (f"le_{b}" if i < len(BUCKETS_MS) else "inf"): n
+                for i, (b, n) in enumerate(zip((*BUCKETS_MS, None), self.counts))
+                if n
+            },
+        }
+
+
+class GroupMetrics:
+    """Cheap per-group counters, stage latencies and an optional dispatch trace."""
+
+    STAGES = ("command", "plan", "dispatch", "fanout", "confirm")
+
+    def __init__(self, trace: bool = False) -> None:
+        self.commands = 0
+        self.fanouts = 0
+        self.service_calls = 0
+        self.calls_saved = 0
+        self.children_suppressed = 0
+        self.children_deferred = 0
+        # Übersprungene Befehle an tote Kinder und Nachzieh-Befehle nach ihrer Rückkehr
+        self.children_skipped = 0
+        self.catch_ups = 0
+        self.dispatch_errors = 0
+        self.state_writes = 0
+        # Zustellbestätigung (nur im Bestätigungsmodus)
+        self.confirmed = 0
+        self.retries = 0
+        self.unconfirmed = 0
+        self.latency = {stage: LatencyHistogram() for stage in self.STAGES}
+        self.confirm_latency: dict[str, LatencyHistogram] = {}
+        self.trace: deque[dict[str, Any]] | None = deque(maxlen=TRACE_LENGTH) if trace else None
+
+    def set_trace(self, enabled: bool) -> None:
+        if enabled and self.trace is None:
+            self.trace = deque(maxlen=TRACE_LENGTH)
+        elif not enabled:
+            self.trace = None
+
+    def record_confirmation(self, child: str, seconds: float) -> None:
+        self.confirmed += 1
+        self.latency["confirm"].observe(seconds)
+        if (hist := self.confirm_latency.get(child)) is None:
+            hist = self.confirm_latency[child] = LatencyHistogram()
+        hist.observe(seconds)
+
+    def record_dispatch(self, service: str, entity_ids: list[str], payload: dict[str, Any], started: float, duration: float, error: BaseException | None = None) -> None:
+        if self.trace is None:
+            return
+        self.trace.append({
+            "ts": started,
+            "service": service,
+            "entity_ids": list(entity_ids),
+            "payload": {k: (list(v) if isinstance(v, tuple) else v) for k, v in payload.items()},
+            "duration_ms": round(duration * 1000.0, 3),
+            "error": repr(error) if error is not None else None,
+        })
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "commands": self.commands,
+            "fanouts": self.fanouts,
+            "service_calls": self.service_calls,
+            "calls_saved": self.calls_saved,
+            "children_suppressed": self.children_suppressed,
+            "children_deferred": self.children_deferred,
+            "children_skipped": self.children_skipped,
+            "catch_ups": self.catch_ups,
+            "dispatch_errors": self.dispatch_errors,
+            "state_writes": self.state_writes,
+            "confirmed": self.confirmed,
+            "retries": self.retries,
+            "unconfirmed": self.unconfirmed,
+            "latency": {stage: hist.as_dict() for stage, hist in self.latency.items()},
+            "confirm_latency": {child: hist.as_dict() for child, hist in self.confirm_latency.items()},
+            "trace": list(self.trace) if self.trace is not None else None,
+        }
+
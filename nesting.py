@@ -0,0 +1,166 @@
+from __future__ import annotations
+import logging
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, DATA_NESTING
+from .curves import CURVE_LINEAR, Table, compile_table, compose_tables
+
+if TYPE_CHECKING:
+    from .calibration import ColorProfile
+    from .light import RelativeLightGroup
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FlatChild:
+    """One leaf light of a flattened group: everything the fan-out needs, compiled once.
+
+    Records are not modified after compilation; parameter or capability
+    changes compile a new plan instead.
+    """
+
+    __slots__ = ("factor", "lo", "hi", "table", "owner", "ct", "color", "profile", "kelvin_range", "transition")
+
+    def __init__(
+        self,
+        factor: float,
+        lo: int,
+        hi: int,
+        table: Table,
+        owner: RelativeLightGroup,
+        ct: bool,
+        color: bool,
+        profile: ColorProfile | None = None,
+        kelvin_range: tuple[int, int] | None = None,
+        transition: bool = False,
+    ) -> None:
+        self.factor = factor
+        self.lo = lo
+        self.hi = hi
+        # Master-Helligkeit -> Kind-Helligkeit (Kurve, Faktor, Clamps aller Ebenen)
+        self.table = table
+        # Gruppe, in der das Kind direkt Mitglied ist
+        self.owner = owner
+        # Farbtemperatur/Farbe senden: alle Gruppen auf dem Pfad reichen sie weiter und das Kind kann sie
+        self.ct = ct
+        self.color = color
+        # Farbkalibrierung und Kelvin-Bereich des Kindes (aus der besitzenden Gruppe)
+        self.profile = profile
+        self.kelvin_range = kelvin_range
+        # Kind kann Übergänge selbst (kein Software-Fade nötig)
+        self.transition = transition
+
+    def target(self, base: int) -> int:
+        return self.table[base]
+
+
+class FlatPlan:
+    """Flattened fan-out of a group: leaf children plus the nested groups passed through."""
+
+    __slots__ = ("children", "items", "nested")
+
+    def __init__(self, children: dict[str, FlatChild], nested: list[tuple[RelativeLightGroup, FlatChild]]) -> None:
+        self.children = children
+        # Für den Fan-out: einmal materialisiert statt bei jedem Befehl über das Dict zu iterieren
+        self.items = tuple(children.items())
+        self.nested = nested
+
+
+def _clamp(value: float, lo: int, hi: int) -> int:
+    return int(round(max(lo, min(hi, value))))
+
+
+def flatten(root: RelativeLightGroup, index: GroupIndex) -> FlatPlan:
+    """Compile ``root`` and all relative groups nested in it into one plan.
+
+    For a child with factor ``f2`` and clamps ``a2..b2`` inside a nested group
+    that the parent reaches with factor ``f1`` and clamps ``a1..b1``, the
+    combined factor is ``f1 * f2`` and the clamps are
+    ``clamp(a1 * f2, a2, b2)..clamp(b1 * f2, a2, b2)``. Nested groups that
+    would close a cycle are skipped. Response curves are compiled into
+    lookup tables; a nested child's table is the parent's table fed into
+    the child's own one. Capabilities and color calibration of the leaves are
+    resolved here too, so the fan-out only reads the compiled records.
+    """
+    children: dict[str, FlatChild] = {}
+    nested: list[tuple[RelativeLightGroup, FlatChild]] = []
+
+    def visit(group: RelativeLightGroup, via: FlatChild | None, stack: tuple[RelativeLightGroup, ...]) -> None:
+        for eid in group.entities:
+            # Ohne eigene Werte gelten die Standardregeln der Gruppe (dynamische Mitglieder)
+            f2 = float(group.factors.get(eid, group.default_factor))
+            a2 = int(group.min_map.get(eid, group.default_min))
+            b2 = int(group.max_map.get(eid, group.default_max))
+            table = compile_table(group.curves.get(eid, CURVE_LINEAR), f2, a2, b2)
+            if via is None:
+                factor, lo, hi, ct, color = f2, a2, b2, True, True
+            else:
+                factor, lo, hi = via.factor * f2, _clamp(via.lo * f2, a2, b2), _clamp(via.hi * f2, a2, b2)
+                table = compose_tables(via.table, table)
+                ct, color = via.ct and group.forward_ct, via.color and group.forward_color
+            sub = index.get(eid)
+            if sub is not None:
+                if sub in stack:
+                    _LOGGER.warning(
+                        "%s: nested group %s would create a cycle and is skipped",
+                        root.entity_id, eid,
+                    )
+                    continue
+                flat = FlatChild(factor, lo, hi, table, group, ct, color)
+                nested.append((sub, flat))
+                visit(sub, flat, (*stack, sub))
+                continue
+            if eid in children:
+                # Über mehrere Pfade erreichbares Kind: der erste Pfad gewinnt
+                continue
+            children[eid] = FlatChild(
+                factor, lo, hi, table, group,
+                ct and group._child_supports_ct.get(eid, False),
+                color and group._child_supports_color.get(eid, False),
+                group.color_profiles.get(eid),
+                group._child_kelvin.get(eid),
+                group._child_supports_transition.get(eid, False),
+            )
+
+    visit(root, None, (root,))
+    return FlatPlan(children, nested)
+
+
+class GroupIndex:
+    """Live relative groups by entity_id, with a generation bumped on every change.
+
+    Groups cache their flattened plan per generation, so any change to
+    membership or parameters of any group recompiles the plans lazily.
+    """
+
+    def __init__(self) -> None:
+        self._by_entity: dict[str, RelativeLightGroup] = {}
+        self.generation = 0
+
+    def get(self, entity_id: str) -> RelativeLightGroup | None:
+        return self._by_entity.get(entity_id)
+
+    @callback
+    def async_register(self, group: RelativeLightGroup) -> None:
+        self._by_entity[group.entity_id] = group
+        self.generation += 1
+
+    @callback
+    def async_unregister(self, group: RelativeLightGroup) -> None:
+        if self._by_entity.get(group.entity_id) is group:
+            del self._by_entity[group.entity_id]
+        self.generation += 1
+
+    @callback
+    def async_invalidate(self) -> None:
+        self.generation += 1
+
+
+@callback
+def async_get_group_index(hass: HomeAssistant) -> GroupIndex:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (index := domain_data.get(DATA_NESTING)) is None:
+        index = domain_data[DATA_NESTING] = GroupIndex()
+    return index
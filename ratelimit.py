@@ -0,0 +1,281 @@
+from __future__ import annotations
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    DOMAIN,
+    DATA_LIMITER,
+    DEFAULT_CHILD_RATE,
+    DEFAULT_CHILD_BURST,
+    DEFAULT_INTEGRATION_RATE,
+    DEFAULT_INTEGRATION_BURST,
+    DEFAULT_ACK_TIMEOUT,
+    DEFAULT_QUEUE_LIMIT,
+)
+from .fanout import async_send_wave, plan_fanout
+from .health import async_get_health
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+
+_LOGGER = logging.getLogger(__name__)
+
+# Payload und Cache-Schlüssel eines Kindes, wie sie die Gruppe senden möchte
+ChildCommand = tuple[dict[str, Any], Any]
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "stamp")
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.stamp:
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+    def ready(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= 1.0
+
+    def take(self) -> None:
+        self.tokens -= 1.0
+
+    def delay(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+
+class QueuedCommand:
+    """Command for one child: the group it comes from, service, payload and cache key."""
+
+    __slots__ = ("group", "service", "payload", "key")
+
+    def __init__(self, group: RelativeLightGroup, service: str, payload: dict[str, Any], key: Any) -> None:
+        self.group = group
+        self.service = service
+        self.payload = payload
+        self.key = key
+
+
+class DispatchLimiter:
+    """Domain-wide dispatch layer with backpressure.
+
+    A child is sent a command right away only if its own token bucket and the
+    bucket of its backing integration have capacity (the latter is charged
+    once per service call, not per child), and it has acknowledged the
+    previous command (reported a state change, or already showed its target
+    when it was sent) or the acknowledgement timed out. Otherwise the command
+    is queued; a newer command for the same child replaces the queued one, so
+    slow children only ever get the newest value while fast children stay
+    instant. Released children go out as one wave, bundled by payload.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.child_rate = DEFAULT_CHILD_RATE
+        self.child_burst = DEFAULT_CHILD_BURST
+        self.integration_rate = DEFAULT_INTEGRATION_RATE
+        self.integration_burst = DEFAULT_INTEGRATION_BURST
+        self.ack_timeout = DEFAULT_ACK_TIMEOUT
+        self.queue_limit = DEFAULT_QUEUE_LIMIT
+        self._child_buckets: dict[str, TokenBucket] = {}
+        self._integration_buckets: dict[str, TokenBucket] = {}
+        self._integration_of: dict[str, str] = {}
+        self._awaiting: dict[str, float] = {}
+        self._queue: dict[str, QueuedCommand] = {}
+        self._unsub_timer: Callable[[], None] | None = None
+        self.sent = 0
+        # Versandte Wellen (sofort zugelassene und aus der Queue freigegebene)
+        self.waves = 0
+        self.queued = 0
+        self.replaced = 0
+        self.dropped = 0
+
+    # ---------- Keys ----------
+    def integration_of(self, child: str) -> str:
+        if (platform := self._integration_of.get(child)) is None:
+            entry = er.async_get(self.hass).async_get(child)
+            platform = entry.platform if entry is not None else "unknown"
+            self._integration_of[child] = platform
+        return platform
+
+    def _bucket(self, buckets: dict[str, TokenBucket], key: str, rate: float, burst: float) -> TokenBucket:
+        if (bucket := buckets.get(key)) is None:
+            bucket = buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    def _child_ready(self, child: str, now: float) -> bool:
+        deadline = self._awaiting.get(child)
+        if deadline is not None and now < deadline:
+            return False
+        return self._bucket(self._child_buckets, child, self.child_rate, self.child_burst).ready(now)
+
+    def _admit(self, candidates: dict[str, QueuedCommand], now: float) -> dict[str, QueuedCommand]:
+        """Children that may be sent now.
+
+        Child buckets are charged per child; the bucket of an integration is
+        charged once per outgoing service call that addresses its children.
+        """
+        ready = {child: item for child, item in candidates.items() if self._child_ready(child, now)}
+        by_service: dict[str, dict[str, dict[str, Any]]] = {}
+        for child, item in ready.items():
+            by_service.setdefault(item.service, {})[child] = item.payload
+        admitted: dict[str, QueuedCommand] = {}
+        blocked: set[str] = set()
+        # Dieselbe Bündelung wie beim Versand: ein Call je Dienst und Payload
+        for payloads in by_service.values():
+            for eids, _payload in plan_fanout(payloads).batches:
+                charged: set[str] = set()
+                for child in eids:
+                    integration = self.integration_of(child)
+                    if integration in blocked:
+                        continue
+                    if integration not in charged:
+                        bucket = self._bucket(
+                            self._integration_buckets, integration, self.integration_rate, self.integration_burst
+                        )
+                        if not bucket.ready(now):
+                            blocked.add(integration)
+                            continue
+                        bucket.take()
+                        charged.add(integration)
+                    self._child_buckets[child].take()
+                    self._awaiting[child] = now + self.ack_timeout
+                    admitted[child] = ready[child]
+        return admitted
+
+    # ---------- API ----------
+    @property
+    def queue_length(self) -> int:
+        return len(self._queue)
+
+    async def async_dispatch(self, wave: dict[str, QueuedCommand]) -> None:
+        """Admit a dispatch wave (commands of any number of groups); send what may go now."""
+        now = time.monotonic()
+        health = async_get_health(self.hass)
+        candidates: dict[str, QueuedCommand] = {}
+        for child, item in wave.items():
+            # Neuer Befehl ersetzt einen wartenden (latest wins)
+            if self._queue.pop(child, None) is not None:
+                self.replaced += 1
+            if not health.admits(child, now):
+                # Totes Kind: nicht senden, nicht einreihen; bei Rückkehr zieht die Gruppe es nach
+                item.group.metrics.children_skipped += 1
+                continue
+            candidates[child] = item
+        ready = self._admit(candidates, now)
+        for child, item in candidates.items():
+            if child not in ready:
+                self._enqueue(child, item)
+        if self._queue:
+            self._schedule_drain(now)
+        if ready:
+            self.sent += len(ready)
+            await self._async_send(ready)
+
+    @callback
+    def async_child_reported(self, child: str) -> None:
+        """Acknowledge the outstanding command of a child (any state change)."""
+        if self._awaiting.pop(child, None) is not None and child in self._queue:
+            self._schedule_drain(time.monotonic(), immediate=True)
+
+    @callback
+    def async_forget_group(self, group: RelativeLightGroup) -> None:
+        for child in [c for c, q in self._queue.items() if q.group is group]:
+            del self._queue[child]
+
+    # ---------- Queue ----------
+    def _enqueue(self, child: str, item: QueuedCommand) -> None:
+        self.queued += 1
+        if len(self._queue) >= self.queue_limit:
+            # Begrenzte Queue: ältesten Eintrag verwerfen
+            oldest = next(iter(self._queue))
+            del self._queue[oldest]
+            self.dropped += 1
+            _LOGGER.debug("Dispatch queue full, dropped pending command for %s", oldest)
+        item.group.metrics.children_deferred += 1
+        self._queue[child] = item
+
+    def _next_delay(self, now: float) -> float:
+        delay = self.ack_timeout
+        for child in self._queue:
+            deadline = self._awaiting.get(child)
+            wait = max(0.0, deadline - now) if deadline is not None else 0.0
+            child_bucket = self._child_buckets.get(child)
+            if child_bucket is not None:
+                wait = max(wait, child_bucket.delay(now))
+            integration_bucket = self._integration_buckets.get(self.integration_of(child))
+            if integration_bucket is not None:
+                wait = max(wait, integration_bucket.delay(now))
+            delay = min(delay, wait)
+        return delay
+
+    @callback
+    def _schedule_drain(self, now: float, immediate: bool = False) -> None:
+        if self._unsub_timer is not None:
+            if not immediate:
+                return
+            self._unsub_timer()
+        delay = 0.0 if immediate else self._next_delay(now)
+        self._unsub_timer = async_call_later(self.hass, delay, self._drain)
+
+    @callback
+    def _drain(self, _now: Any) -> None:
+        self._unsub_timer = None
+        now = time.monotonic()
+        health = async_get_health(self.hass)
+        for child in list(self._queue):
+            if health.is_open(child) and not health.admits(child, now):
+                self._queue.pop(child).group.metrics.children_skipped += 1
+        ready = self._admit(self._queue, now)
+        for child in ready:
+            del self._queue[child]
+        if ready:
+            # Alle freigegebenen Kinder als eine Welle, nach Payload gebündelt statt einzeln
+            self.sent += len(ready)
+            self.hass.async_create_task(self._async_send(ready))
+        if self._queue:
+            self._schedule_drain(now)
+
+    async def _async_send(self, ready: dict[str, QueuedCommand]) -> None:
+        self.waves += 1
+        failed = await async_send_wave(self.hass, ready)
+        for child in failed:
+            # Fehlgeschlagene Kinder blockieren nicht bis zum Timeout
+            self._awaiting.pop(child, None)
+        states = self.hass.states
+        for child, item in ready.items():
+            # Zeigt das Kind den Befehl bereits, kommt kein state_changed mehr: sofort als bestätigt werten
+            if child in self._awaiting and (state := states.get(child)) is not None and item.group.child_reached(item.key, state):
+                self.async_child_reported(child)
+        if failed:
+            async_get_health(self.hass).async_calls_failed(failed)
+
+    def diagnostics(self) -> dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "waves": self.waves,
+            "queued": self.queued,
+            "replaced": self.replaced,
+            "dropped": self.dropped,
+            "queue_length": len(self._queue),
+            "awaiting_ack": len(self._awaiting),
+        }
+
+
+@callback
+def async_get_limiter(hass: HomeAssistant) -> DispatchLimiter:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (limiter := domain_data.get(DATA_LIMITER)) is None:
+        limiter = domain_data[DATA_LIMITER] = DispatchLimiter(hass)
+    return limiter
@@ -0,0 +1,83 @@
+from __future__ import annotations
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class CommandScheduler:
+    """Latest-wins scheduler for the commands of one group.
+
+    The first command after a quiet period is dispatched immediately (leading
+    edge). Commands arriving within the coalescing window only replace the
+    pending one; when the window closes, the newest of them is dispatched
+    (trailing edge). Dispatching a command cancels a fan-out that is still in
+    flight, so stale targets never reach the children after newer ones.
+    """
+
+    def __init__(self, hass: HomeAssistant, window: float) -> None:
+        self.hass = hass
+        self.window = max(0.0, float(window))
+        self._pending: Job | None = None
+        self._inflight: asyncio.Task | None = None
+        self._unsub_timer: Callable[[], None] | None = None
+        self.dispatched = 0
+        self.coalesced = 0
+        self.superseded = 0
+
+    @callback
+    def async_submit(self, job: Job) -> None:
+        if self.window <= 0:
+            self._dispatch(job)
+            return
+        if self._unsub_timer is None:
+            # Leading edge: sofort senden und Fenster öffnen
+            self._dispatch(job)
+            self._unsub_timer = async_call_later(self.hass, self.window, self._window_closed)
+            return
+        if self._pending is not None:
+            self.coalesced += 1
+        self._pending = job
+
+    @callback
+    def _window_closed(self, _now: Any) -> None:
+        self._unsub_timer = None
+        job, self._pending = self._pending, None
+        if job is None:
+            return
+        # Trailing edge: neuesten Befehl senden, Fenster bleibt für weitere Bursts offen
+        self._dispatch(job)
+        self._unsub_timer = async_call_later(self.hass, self.window, self._window_closed)
+
+    @callback
+    def _dispatch(self, job: Job) -> None:
+        if self._inflight is not None and not self._inflight.done():
+            self._inflight.cancel()
+            self.superseded += 1
+        self.dispatched += 1
+        self._inflight = self.hass.async_create_task(self._run(job))
+
+    async def _run(self, job: Job) -> None:
+        try:
+            await job()
+        except asyncio.CancelledError:
+            _LOGGER.debug("Superseded fan-out cancelled")
+            raise
+        except Exception:  # noqa: BLE001
+            _LOGGER.exception("Error while dispatching group command")
+
+    @callback
+    def async_cancel(self) -> None:
+        self._pending = None
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if self._inflight is not None and not self._inflight.done():
+            self._inflight.cancel()
+        self._inflight = None
@@ -0,0 +1,65 @@
+from __future__ import annotations
+from datetime import timedelta
+from typing import Any, Callable
+
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import DeviceInfo
+
+from .const import DOMAIN, DATA_GROUPS, CONF_NAME, CONF_DIAGNOSTIC_SENSORS, DEFAULT_NAME
+from .metrics import GroupMetrics
+
+# Metriken werden gepollt statt gepusht, damit Befehle keine zusätzlichen State-Writes auslösen
+SCAN_INTERVAL = timedelta(seconds=30)
+
+# key, name, unit, value
+_SENSORS: tuple[tuple[str, str, str | None, Callable[[GroupMetrics], Any]], ...] = (
+    ("fanout_latency", "Fan-out latency", UnitOfTime.MILLISECONDS, lambda m: round(m.latency["fanout"].mean, 3)),
+    ("fanout_latency_p99", "Fan-out latency p99", UnitOfTime.MILLISECONDS, lambda m: m.latency["fanout"].quantile(0.99)),
+    ("commands", "Commands", None, lambda m: m.commands),
+    ("service_calls", "Service calls", None, lambda m: m.service_calls),
+    ("calls_saved", "Service calls saved", None, lambda m: m.calls_saved),
+    ("children_suppressed", "Unchanged children skipped", None, lambda m: m.children_suppressed),
+    ("children_deferred", "Deferred child commands", None, lambda m: m.children_deferred),
+    ("children_skipped", "Unavailable children skipped", None, lambda m: m.children_skipped),
+    ("dispatch_errors", "Dispatch errors", None, lambda m: m.dispatch_errors),
+    ("state_writes", "State writes", None, lambda m: m.state_writes),
+)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry, async_add_entities):
+    data = {**entry.data, **entry.options}
+    if not data.get(CONF_DIAGNOSTIC_SENSORS, False):
+        return
+    async_add_entities(
+        RelativeGroupMetricSensor(entry.entry_id, data.get(CONF_NAME, DEFAULT_NAME), *spec) for spec in _SENSORS
+    )
+
+
+class RelativeGroupMetricSensor(SensorEntity):
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        entry_id: str,
+        group_name: str,
+        key: str,
+        name: str,
+        unit: str | None,
+        value: Callable[[GroupMetrics], Any],
+    ) -> None:
+        self._entry_id = entry_id
+        self._value = value
+        self._attr_name = name
+        self._attr_unique_id = f"{entry_id}_{key}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_state_class = SensorStateClass.MEASUREMENT if unit else SensorStateClass.TOTAL_INCREASING
+        # Gleiches Gerät wie die Gruppe, damit die Sensoren dort erscheinen
+        self._attr_device_info = DeviceInfo(identifiers={(DOMAIN, entry_id)}, name=group_name)
+
+    async def async_update(self) -> None:
+        group = self.hass.data.get(DOMAIN, {}).get(DATA_GROUPS, {}).get(self._entry_id)
+        self._attr_available = group is not None
+        self._attr_native_value = self._value(group.metrics) if group is not None else None
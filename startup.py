@@ -0,0 +1,112 @@
+from __future__ import annotations
+import logging
+from typing import TYPE_CHECKING, Any, Callable
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.core import CoreState, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN, DATA_FINALIZER, DEFAULT_CAPABILITY_TIMEOUT
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CapabilityFinalizer:
+    """Fixes the color capabilities of all groups in one batched pass.
+
+    At boot the children are often not loaded yet when a group is added.
+    Instead of parsing incomplete state per group, groups wait until all of
+    their members have appeared, Home Assistant has started, or the timeout
+    expired. Groups that become ready in the same loop iteration are
+    finalized together.
+    """
+
+    def __init__(self, hass: HomeAssistant, timeout: float = DEFAULT_CAPABILITY_TIMEOUT) -> None:
+        self.hass = hass
+        self.timeout = timeout
+        self._pending: set[RelativeLightGroup] = set()
+        self._unsub_started: Callable[[], None] | None = None
+        self._unsub_timer: Callable[[], None] | None = None
+        self._flush_scheduled = False
+        self.passes = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @callback
+    def async_request(self, group: RelativeLightGroup) -> None:
+        if self.hass.state is CoreState.running and group.members_ready():
+            # Reload/Optionen zur Laufzeit: Kinder sind da, sofort festlegen
+            group.async_finalize_capabilities()
+            return
+        self._pending.add(group)
+        if self._unsub_started is None and self.hass.state is not CoreState.running:
+            self._unsub_started = self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, self._async_started)
+        if self._unsub_timer is None:
+            self._unsub_timer = async_call_later(self.hass, self.timeout, self._async_timeout)
+        if group.members_ready():
+            self._schedule_flush()
+
+    @callback
+    def async_member_appeared(self, group: RelativeLightGroup) -> None:
+        if group in self._pending and group.members_ready():
+            self._schedule_flush()
+
+    @callback
+    def async_forget(self, group: RelativeLightGroup) -> None:
+        self._pending.discard(group)
+
+    @callback
+    def _schedule_flush(self) -> None:
+        if self._flush_scheduled:
+            return
+        self._flush_scheduled = True
+        self.hass.loop.call_soon(self._flush, True)
+
+    @callback
+    def _flush(self, only_ready: bool) -> None:
+        self._flush_scheduled = False
+        groups = [g for g in self._pending if not only_ready or g.members_ready()]
+        if not groups:
+            return
+        self.passes += 1
+        _LOGGER.debug("Finalizing capabilities of %d groups", len(groups))
+        for group in groups:
+            self._pending.discard(group)
+            group.async_finalize_capabilities()
+        if not self._pending:
+            self._cancel_triggers()
+
+    @callback
+    def _cancel_triggers(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if self._unsub_started is not None:
+            self._unsub_started()
+            self._unsub_started = None
+
+    @callback
+    def _async_started(self, _event: Event[Any]) -> None:
+        # listen_once hat den Listener bereits entfernt
+        self._unsub_started = None
+        self._flush(False)
+
+    @callback
+    def _async_timeout(self, _now: Any) -> None:
+        self._unsub_timer = None
+        if self._pending:
+            _LOGGER.debug("Capability discovery timed out for %d groups", len(self._pending))
+        self._flush(False)
+
+
+@callback
+def async_get_finalizer(hass: HomeAssistant) -> CapabilityFinalizer:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (finalizer := domain_data.get(DATA_FINALIZER)) is None:
+        finalizer = domain_data[DATA_FINALIZER] = CapabilityFinalizer(hass)
+    return finalizer
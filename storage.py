@@ -0,0 +1,85 @@
+from __future__ import annotations
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    DATA_STORE,
+    CONF_FACTORS,
+    CONF_MIN,
+    CONF_MAX,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.parameters"
+# Sekunden, in denen Änderungen gesammelt und dann in einem Schreibvorgang gespeichert werden
+SAVE_DELAY = 10
+
+_KINDS = (CONF_FACTORS, CONF_MIN, CONF_MAX)
+
+
+class ParameterStore:
+    """Runtime parameter overrides per config entry.
+
+    Values changed through services are kept here instead of being written to
+    the config entry, so a burst of changes results in one delayed disk write
+    and no entry reload. The options flow folds the overrides back into the
+    entry options, after which they are cleared; removing the entry clears
+    them as well.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._entries: dict[str, dict[str, dict[str, Any]]] = {}
+        self.loaded = False
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+        if isinstance(data, dict) and isinstance(data.get("entries"), dict):
+            self._entries = data["entries"]
+        self.loaded = True
+
+    def get(self, entry_id: str) -> dict[str, dict[str, Any]]:
+        return self._entries.get(entry_id, {})
+
+    def merge(self, entry_id: str, data: dict[str, Any]) -> dict[str, Any]:
+        """Return entry data/options with the stored overrides applied."""
+        overrides = self._entries.get(entry_id)
+        if not overrides:
+            return data
+        merged = dict(data)
+        for kind in _KINDS:
+            if overrides.get(kind):
+                base = merged.get(kind)
+                merged[kind] = {**(base if isinstance(base, dict) else {}), **overrides[kind]}
+        return merged
+
+    @callback
+    def async_set(self, entry_id: str, kind: str, values: dict[str, Any]) -> None:
+        if not values:
+            return
+        entry = self._entries.setdefault(entry_id, {})
+        entry.setdefault(kind, {}).update(values)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_clear(self, entry_id: str) -> None:
+        if self._entries.pop(entry_id, None) is not None:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"entries": self._entries}
+
+
+@callback
+def async_get_store(hass: HomeAssistant) -> ParameterStore:
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (store := domain_data.get(DATA_STORE)) is None:
+        store = domain_data[DATA_STORE] = ParameterStore(hass)
+    return store
@@ -0,0 +1,17 @@
+"""Shared fixtures: the integration loaded as ``relative_light_group`` on the simulated core."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from fake_core import load_integration  # noqa: E402
+
+
+@pytest.fixture
+def integration() -> ModuleType:
+    return load_integration()
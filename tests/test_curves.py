@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import sys
+from types import ModuleType
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        "points:64:180,192:20",  # Ausgang fällt
+        "points:192:200,64:40",  # Eingang fällt
+        "points:64:40,64:80",  # doppelter Eingang
+    ],
+)
+def test_rejects_falling_breakpoints(integration: ModuleType, spec: str) -> None:
+    curves = sys.modules["relative_light_group.curves"]
+    with pytest.raises(curves.CurveNotMonotone):
+        curves.normalize_curve(spec)
+
+
+def test_points_curve_compiles_monotone(integration: ModuleType) -> None:
+    curves = sys.modules["relative_light_group.curves"]
+    spec = curves.normalize_curve("points:64:20,128:128,192:128")
+    table = curves.compile_table(spec, 1.0, 0, 254)
+    assert all(a <= b for a, b in zip(table, table[1:]))
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable
+
+from fake_core import FakeHass
+
+
+class MemoryStore:
+    """Stands in for ``homeassistant.helpers.storage.Store``; saves land in ``saved``."""
+
+    def __init__(self, data: dict[str, Any] | None) -> None:
+        self.data = data
+        self.saved: dict[str, Any] | None = None
+
+    async def async_load(self) -> dict[str, Any] | None:
+        return self.data
+
+    def async_delay_save(self, data_func: Callable[[], dict[str, Any]], delay: float = 0) -> None:
+        self.saved = data_func()
+
+
+def test_remove_entry_clears_runtime_overrides(integration: ModuleType) -> None:
+    storage = sys.modules["relative_light_group.storage"]
+
+    async def scenario() -> None:
+        hass = FakeHass(asyncio.get_running_loop())
+        store = storage.async_get_store(hass)
+        store._store = backend = MemoryStore({
+            "entries": {
+                "removed": {"factors": {"light.a": 0.5}},
+                "kept": {"min": {"light.b": 10}},
+            }
+        })
+        # Store noch nicht geladen (z. B. Setup fehlgeschlagen): wird vor dem Leeren geladen
+        await integration.async_remove_entry(hass, SimpleNamespace(entry_id="removed"))
+        assert backend.saved == {"entries": {"kept": {"min": {"light.b": 10}}}}
+        # Ein späterer Eintrag mit derselben ID startet ohne die alten Werte
+        assert store.merge("removed", {"factors": {"light.a": 1.0}}) == {"factors": {"light.a": 1.0}}
+        assert store.merge("kept", {})["min"] == {"light.b": 10}
+
+    asyncio.run(scenario())
+
+
+def test_remove_entry_without_overrides_does_not_save(integration: ModuleType) -> None:
+    storage = sys.modules["relative_light_group.storage"]
+
+    async def scenario() -> None:
+        hass = FakeHass(asyncio.get_running_loop())
+        store = storage.async_get_store(hass)
+        store._store = backend = MemoryStore(None)
+        await store.async_load()
+        await integration.async_remove_entry(hass, SimpleNamespace(entry_id="unknown"))
+        assert backend.saved is None
+
+    asyncio.run(scenario())
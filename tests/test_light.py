@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pytest
+from homeassistant.exceptions import ServiceValidationError
+
+from fake_core import FakeHass, attach_group, install
+
+CHILDREN = ["light.a", "light.b"]
+
+
+def _group(hass: FakeHass, integration: ModuleType):
+    install(hass, integration)
+    hass.add_children(CHILDREN)
+    light = sys.modules["relative_light_group.light"]
+    group = light.RelativeLightGroup(
+        hass, "G", CHILDREN, {"light.a": 1.0, "light.b": 0.5}, {}, {}, False, False, command_window=0.0
+    )
+    attach_group(hass, group, "light.g")
+    return group
+
+
+def test_set_parameters_rejects_unknown_children(integration: ModuleType) -> None:
+    const = sys.modules["relative_light_group.const"]
+
+    async def scenario() -> None:
+        group = _group(FakeHass(asyncio.get_running_loop()), integration)
+        with pytest.raises(ServiceValidationError, match="light.typo, light.x are not a member of light.g"):
+            group.async_set_parameters(
+                factors={"light.a": 0.2, "light.typo": 0.3},
+                min_values={"light.x": 5},
+            )
+        # Nichts übernommen, auch nicht für die gültigen Kinder des Aufrufs
+        assert group.factors == {"light.a": 1.0, "light.b": 0.5}
+        assert "light.x" not in group.min_map
+
+        with pytest.raises(ServiceValidationError, match="light.typo is not a member"):
+            await group.async_service_set_factor(**{const.ATTR_CHILD: "light.typo", const.ATTR_FACTOR: 0.3})
+
+    asyncio.run(scenario())
+
+
+def test_set_parameters_updates_members(integration: ModuleType) -> None:
+    async def scenario() -> None:
+        group = _group(FakeHass(asyncio.get_running_loop()), integration)
+        group.async_set_parameters(factors={"light.b": 0.8}, max_values={"light.a": 200})
+        assert group.factors["light.b"] == 0.8
+        assert group.max_map["light.a"] == 200
+
+    asyncio.run(scenario())
+
+
+def test_child_reached(integration: ModuleType) -> None:
+    light = sys.modules["relative_light_group.light"]
+    on = SimpleNamespace(state="on", attributes={"brightness": 128})
+    assert light.RelativeLightGroup.child_reached((128, None, None), on)
+    assert not light.RelativeLightGroup.child_reached((200, None, None), on)
+    assert not light.RelativeLightGroup.child_reached(light._SENT_OFF, on)
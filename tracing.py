@@ -0,0 +1,172 @@
+from __future__ import annotations
+import gzip
+import json
+import logging
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACE_VERSION = 1
+# Gepufferte Zeilen werden spätestens nach dieser Zeit (Sekunden) bzw. ab dieser Anzahl geschrieben
+TRACE_FLUSH_INTERVAL = 5.0
+TRACE_FLUSH_LINES = 500
+# Danach wird die Aufzeichnung beendet, damit eine vergessene Option die Platte nicht füllt
+TRACE_MAX_RECORDS = 200_000
+
+# Attribute eines Kind-Zustands, die in die Aufzeichnung übernommen werden (kurze Schlüssel)
+_CHILD_ATTRS = (("brightness", "b"), ("color_temp_kelvin", "k"), ("hs_color", "h"))
+
+
+def _child_snapshot(hass: HomeAssistant, eid: str) -> dict[str, Any]:
+    if (state := hass.states.get(eid)) is None:
+        return {"s": None}
+    return {
+        "s": state.state,
+        "b": state.attributes.get("brightness"),
+        "modes": sorted(str(m) for m in state.attributes.get("supported_color_modes") or ()),
+    }
+
+
+def trace_header(group: RelativeLightGroup) -> dict[str, Any]:
+    """Group configuration and starting state needed to rebuild the group for a replay."""
+    return {
+        "v": TRACE_VERSION,
+        "start": dt_util.utcnow().isoformat(),
+        "is_on": group.is_on,
+        "master_brightness": group.master_brightness,
+        # Fähigkeiten und Ausgangszustand der Kinder, damit die Simulation gleich startet
+        "children": {eid: _child_snapshot(group.hass, eid) for eid in group.entities},
+        "group": trace_config(group),
+    }
+
+
+def trace_config(group: RelativeLightGroup) -> dict[str, Any]:
+    """The configuration part of the trace header; a change needs a new trace file."""
+    return {
+        "entity_id": group.entity_id,
+        "entities": list(group.entities),
+        "factors": dict(group.factors),
+        "min": dict(group.min_map),
+        "max": dict(group.max_map),
+        "default_factor": group.default_factor,
+        "default_min": group.default_min,
+        "default_max": group.default_max,
+        "curves": dict(group.curves),
+        "color_profiles": {eid: profile.spec for eid, profile in group.color_profiles.items()},
+        "forward_ct": group.forward_ct,
+        "forward_color": group.forward_color,
+        "command_window": group._scheduler.window,
+        "software_fade": group.software_fade,
+        "confirm_delivery": group._delivery is not None,
+    }
+
+
+class TraceRecorder:
+    """Records the commands a group receives and its children's state changes.
+
+    One gzip-compressed JSON line per record, with a relative timestamp in
+    milliseconds precision: ``{"t": 1.234, "c": "turn_on", "a": {...}}`` for
+    commands and ``{"t": 1.3, "e": "light.x", "s": "on", "b": 120}`` for child
+    events. The first line holds the group's configuration. Lines are
+    buffered in memory and written in the executor, one write at a time.
+    """
+
+    def __init__(self, hass: HomeAssistant, group: RelativeLightGroup) -> None:
+        self.hass = hass
+        self.group = group
+        stamp = dt_util.now().strftime("%Y%m%d-%H%M%S")
+        name = (group.entity_id or group.unique_id or "group").replace(".", "_")
+        self.path = hass.config.path(DOMAIN, "traces", f"{name}-{stamp}.jsonl.gz")
+        self.records = 0
+        self._started = time.monotonic()
+        header = trace_header(group)
+        self.config = header["group"]
+        self._lines: list[str] = [json.dumps(header, separators=(",", ":"))]
+        self._unsub_timer: Callable[[], None] | None = None
+        # Höchstens ein Schreibvorgang gleichzeitig, sonst verschränken sich die gzip-Member
+        self._writing: asyncio.Future[None] | None = None
+        self._stopped = False
+
+    def _append(self, record: dict[str, Any]) -> None:
+        if self._stopped:
+            return
+        self.records += 1
+        if self.records > TRACE_MAX_RECORDS:
+            _LOGGER.warning("%s: trace reached %d records and was stopped: %s", self.group.entity_id, TRACE_MAX_RECORDS, self.path)
+            self._stopped = True
+            self._async_flush(None)
+            return
+        record["t"] = round(time.monotonic() - self._started, 3)
+        self._lines.append(json.dumps(record, separators=(",", ":")))
+        if len(self._lines) >= TRACE_FLUSH_LINES:
+            self._async_flush(None)
+        elif self._unsub_timer is None:
+            self._unsub_timer = async_call_later(self.hass, TRACE_FLUSH_INTERVAL, self._async_flush)
+
+    @callback
+    def async_command(self, service: str, kwargs: dict[str, Any]) -> None:
+        args = {k: (list(v) if isinstance(v, tuple) else v) for k, v in kwargs.items()}
+        self._append({"c": service, "a": args} if args else {"c": service})
+
+    @callback
+    def async_child_event(self, eid: str, new_state: State | None) -> None:
+        record: dict[str, Any] = {"e": eid, "s": new_state.state if new_state is not None else None}
+        if new_state is not None:
+            for attr, short in _CHILD_ATTRS:
+                if (value := new_state.attributes.get(attr)) is not None:
+                    record[short] = list(value) if isinstance(value, tuple) else value
+        self._append(record)
+
+    @callback
+    def _async_flush(self, _now: Any) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if not self._lines or self._writing is not None:
+            # Während eines Schreibvorgangs gepuffert lassen; er hängt sie danach in Reihenfolge an
+            return
+        lines, self._lines = self._lines, []
+        self._writing = self.hass.async_add_executor_job(self._write, lines)
+        self._writing.add_done_callback(self._write_done)
+
+    @callback
+    def _write_done(self, _future: asyncio.Future[None]) -> None:
+        self._writing = None
+        if self._lines:
+            self._async_flush(None)
+
+    def _write(self, lines: list[str]) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # Jeder Flush hängt ein eigenes gzip-Member an; gzip liest sie als eine Datei
+            with gzip.open(self.path, "at", encoding="utf-8") as fh:
+                fh.write("\n".join(lines) + "\n")
+        except OSError as err:
+            _LOGGER.warning("Could not write trace %s: %s", self.path, err)
+
+    @callback
+    def async_close(self) -> None:
+        self._async_flush(None)
+        self._stopped = True
+
+
+def load_trace(path: str) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Read a trace file (gzip or plain JSON lines) into its header and records."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as fh:
+        lines = [json.loads(line) for line in fh if line.strip()]
+    if not lines or lines[0].get("v") != TRACE_VERSION:
+        raise ValueError(f"not a relative light group trace: {path}")
+    return lines[0], lines[1:]
@@ -0,0 +1,259 @@
+from __future__ import annotations
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN, DATA_TUNING, DEFAULT_TUNING_INTERVAL
+from .nesting import async_get_group_index
+
+if TYPE_CHECKING:
+    from .light import RelativeLightGroup
+
+_LOGGER = logging.getLogger(__name__)
+
+WS_TUNE_START = f"{DOMAIN}/tune/start"
+WS_TUNE_PREVIEW = f"{DOMAIN}/tune/preview"
+WS_TUNE_COMMIT = f"{DOMAIN}/tune/commit"
+
+ERR_IN_PROGRESS = "in_progress"
+ERR_NOT_TUNING = "not_tuning"
+
+
+class TuningSession:
+    """Live factor/min/max edits for one group, previewed on the edited children only.
+
+    Edits change the group's parameters in memory and are sent at most every
+    ``interval`` seconds, the newest edit per child winning. Nothing is
+    persisted until commit; ending the session without a commit restores the
+    values it started from.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        group: RelativeLightGroup,
+        send_event: Callable[[dict[str, Any]], None],
+        interval: float = DEFAULT_TUNING_INTERVAL,
+    ) -> None:
+        self.hass = hass
+        self.group = group
+        self.interval = interval
+        self._send_event = send_event
+        self._snapshot = self._values()
+        self._draft: dict[str, dict[str, float]] = {}
+        # Seit Beginn bzw. letztem Commit geänderte Kinder
+        self._edited: set[str] = set()
+        self._unsub_timer: Callable[[], None] | None = None
+        self._last_flush = 0.0
+        self.edits = 0
+        self.previews = 0
+
+    def _values(self) -> tuple[dict[str, float], dict[str, int], dict[str, int]]:
+        group = self.group
+        return dict(group.factors), dict(group.min_map), dict(group.max_map)
+
+    def initial_event(self) -> dict[str, Any]:
+        group = self.group
+        return {
+            "type": "start",
+            "members": list(group.entities),
+            "is_on": group.is_on,
+            "master_brightness": group.master_brightness,
+            "factors": dict(group.factors),
+            "min": dict(group.min_map),
+            "max": dict(group.max_map),
+        }
+
+    @callback
+    def async_edit(self, child: str, values: dict[str, float]) -> None:
+        self._draft.setdefault(child, {}).update(values)
+        self.edits += 1
+        if self._unsub_timer is not None:
+            return
+        # Erste Änderung nach einer Pause sofort, danach höchstens einmal pro Intervall
+        wait = self._last_flush + self.interval - time.monotonic()
+        if wait <= 0:
+            self._async_flush(None)
+        else:
+            self._unsub_timer = async_call_later(self.hass, wait, self._async_flush)
+
+    @callback
+    def _async_flush(self, _now: Any) -> None:
+        self._unsub_timer = None
+        self._last_flush = time.monotonic()
+        draft, self._draft = self._draft, {}
+        if not draft:
+            return
+        group = self.group
+        for child, edit in draft.items():
+            if "factor" in edit:
+                group.set_factor(child, edit["factor"])
+            if "min" in edit or "max" in edit:
+                group.set_min_max(
+                    child,
+                    edit.get("min", group.min_map.get(child, group.default_min)),
+                    edit.get("max", group.max_map.get(child, group.default_max)),
+                )
+        self._edited.update(draft)
+        levels = group.async_preview_children(list(draft))
+        self.previews += 1
+        self._send_event({
+            "type": "preview",
+            "children": {
+                child: {
+                    "factor": group.factors.get(child, group.default_factor),
+                    "min": group.min_map.get(child, group.default_min),
+                    "max": group.max_map.get(child, group.default_max),
+                    "level": levels.get(child),
+                }
+                for child in draft
+            },
+        })
+
+    @callback
+    def async_commit(self) -> int:
+        """Persist all edits of the session once; returns the number of children changed."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+        self._async_flush(None)
+        edited, self._edited = self._edited, set()
+        # Während der Sitzung entfernte Mitglieder (dynamische Mitgliedschaft) nicht speichern
+        edited &= set(self.group.entities)
+        if edited:
+            group = self.group
+            # Über den Parameter-Store: ein verzögerter Schreibvorgang, kein Reload des Eintrags
+            group.async_set_parameters(
+                factors={c: group.factors[c] for c in edited if c in group.factors},
+                min_values={c: group.min_map[c] for c in edited if c in group.min_map},
+                max_values={c: group.max_map[c] for c in edited if c in group.max_map},
+            )
+        self._snapshot = self._values()
+        _LOGGER.debug("%s: committed tuning of %d children (%d edits)", self.group.entity_id, len(edited), self.edits)
+        return len(edited)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Stop without touching the group (it is being removed)."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._draft.clear()
+        self._edited.clear()
+        self._send_event({"type": "ended"})
+
+    @callback
+    def async_end(self) -> None:
+        """End the session; edits that were not committed are rolled back."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._draft.clear()
+        if not self._edited:
+            return
+        group = self.group
+        factors, min_map, max_map = self._snapshot
+        for child in self._edited:
+            for current, before in ((group.factors, factors), (group.min_map, min_map), (group.max_map, max_map)):
+                if child in before:
+                    current[child] = before[child]
+                else:
+                    current.pop(child, None)
+        group.async_preview_children(list(self._edited))
+        self._edited.clear()
+        if group.entity_id is not None:
+            group.async_write_ha_state()
+
+
+def _sessions(hass: HomeAssistant) -> dict[RelativeLightGroup, tuple[Any, TuningSession]]:
+    return hass.data.setdefault(DOMAIN, {}).setdefault(DATA_TUNING, {})
+
+
+@callback
+def async_cancel_tuning(hass: HomeAssistant, group: RelativeLightGroup) -> None:
+    """Close an open tuning session of a group that goes away."""
+    if (entry := _sessions(hass).pop(group, None)) is not None:
+        _connection, session = entry
+        session.async_cancel()
+
+
+def _get_session(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> TuningSession | None:
+    group = async_get_group_index(hass).get(msg["entity_id"])
+    entry = _sessions(hass).get(group) if group is not None else None
+    if entry is None or entry[0] is not connection:
+        connection.send_error(msg["id"], ERR_NOT_TUNING, "No tuning session for this group on this connection")
+        return None
+    return entry[1]
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command({vol.Required("type"): WS_TUNE_START, vol.Required("entity_id"): cv.entity_id})
+@callback
+def ws_tune_start(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    """Open a tuning session; previews are streamed as events of this subscription."""
+    group = async_get_group_index(hass).get(msg["entity_id"])
+    if group is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Relative light group not found")
+        return
+    sessions = _sessions(hass)
+    if group in sessions:
+        connection.send_error(msg["id"], ERR_IN_PROGRESS, "Group is already being tuned")
+        return
+    msg_id = msg["id"]
+    session = TuningSession(hass, group, lambda event: connection.send_message(websocket_api.event_message(msg_id, event)))
+    sessions[group] = (connection, session)
+
+    @callback
+    def _unsubscribe() -> None:
+        # Abmelden oder Verbindungsabbruch ohne Commit: Werte zurücksetzen
+        if (entry := sessions.get(group)) is not None and entry[1] is session:
+            del sessions[group]
+            session.async_end()
+
+    connection.subscriptions[msg_id] = _unsubscribe
+    connection.send_result(msg_id)
+    connection.send_message(websocket_api.event_message(msg_id, session.initial_event()))
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command({
+    vol.Required("type"): WS_TUNE_PREVIEW,
+    vol.Required("entity_id"): cv.entity_id,
+    vol.Required("child"): cv.entity_id,
+    vol.Optional("factor"): vol.All(vol.Coerce(float), vol.Range(min=0, max=5)),
+    vol.Optional("min"): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+    vol.Optional("max"): vol.All(vol.Coerce(int), vol.Range(min=0, max=255)),
+})
+@callback
+def ws_tune_preview(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    """Stream one edit; it is applied and sent to the child with the next throttled preview."""
+    if (session := _get_session(hass, connection, msg)) is None:
+        return
+    if msg["child"] not in session.group.entities:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Not a member of this group")
+        return
+    session.async_edit(msg["child"], {key: msg[key] for key in ("factor", "min", "max") if key in msg})
+    connection.send_result(msg["id"])
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command({vol.Required("type"): WS_TUNE_COMMIT, vol.Required("entity_id"): cv.entity_id})
+@callback
+def ws_tune_commit(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    """Persist the session's edits; the session stays open for further tuning."""
+    if (session := _get_session(hass, connection, msg)) is None:
+        return
+    connection.send_result(msg["id"], {"children": session.async_commit()})
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, ws_tune_start)
+    websocket_api.async_register_command(hass, ws_tune_preview)
+    websocket_api.async_register_command(hass, ws_tune_commit)